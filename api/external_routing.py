@@ -1,14 +1,172 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from config import (
+    FEED_PARSE_EXECUTOR,
+    FEED_PARSE_INLINE_MAX_BYTES,
+    FEED_PARSE_WORKERS,
+    HTTP_FEED_TIMEOUT_SECONDS,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS
+)
+from dataclasses import dataclass
 from fastapi import HTTPException
+import asyncio
+import hashlib
 import httpx
+import multiprocessing
 import xml.etree.ElementTree as ET
+from typing import AsyncIterator, List
 
-async def fetch_external_data(external_url: str):
+@dataclass
+class FeedResponse:
+    """Result of fetching a feed with the validators of the previous fetch.
+
+    items is None when the feed did not change since that fetch, either
+    because the server answered 304 or because the body hash matched.
+    """
+
+    items: list | None
+    etag: str | None
+    last_modified: str | None
+    body_hash: str | None
+    not_modified: bool = False
+
+
+# Process-wide HTTP client, created in the FastAPI lifespan
+_client: httpx.AsyncClient | None = None
+
+# Process-wide pool that parses large feeds, created in the FastAPI lifespan
+_parse_executor: Executor | None = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Create the process-wide HTTP client
+
+    The client keeps connections to the feed hosts open between
+    requests, bounded by the configured connection limits.
+
+    Returns
+    -------
+    httpx.AsyncClient
+        The client shared by every outgoing request
+    """
+
+    global _client
+
+    if _client is None:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS
+            ),
+            timeout=HTTP_FEED_TIMEOUT_SECONDS,
+            follow_redirects=True
+        )
+
+    return _client
+
+
+async def close_http_client():
+    """Close the process-wide HTTP client"""
+
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the process-wide HTTP client
+
+    Returns
+    -------
+    httpx.AsyncClient
+        The client created by create_http_client
+
+    Raises
+    ------
+    RuntimeError
+        If the client has not been created yet
+    """
+
+    if _client is None:
+        raise RuntimeError("HTTP client has not been created.")
+
+    return _client
+
+
+def create_parse_executor(kind: str = FEED_PARSE_EXECUTOR, workers: int = FEED_PARSE_WORKERS) -> Executor | None:
+    """Create the process-wide pool that parses feeds off the event loop
+
+    A thread pool parses the feed chunk by chunk while it downloads. The
+    GIL is still shared with the event loop, but the loop gets to run
+    between chunks. A process pool parses in parallel to the loop, at the
+    cost of holding the body in memory and copying it to the worker.
+
+    Parameters
+    ----------
+    kind : str
+        "thread", "process" or "inline" to parse on the event loop
+    workers : int
+        Number of threads or processes in the pool
+
+    Returns
+    -------
+    Executor | None
+        The pool, None when feeds are parsed inline
+
+    Raises
+    ------
+    ValueError
+        If kind is not one of the supported executors
+    """
+
+    global _parse_executor
+
+    if _parse_executor is None:
+        if kind == "thread":
+            _parse_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="feed-parse")
+        elif kind == "process":
+            # Spawned workers do not inherit the event loop, sockets or locks of this process
+            _parse_executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        elif kind != "inline":
+            raise ValueError(f"Unknown feed parse executor {kind!r}.")
+
+    return _parse_executor
+
+
+def close_parse_executor():
+    """Shut down the process-wide parse pool"""
+
+    global _parse_executor
+
+    if _parse_executor is not None:
+        _parse_executor.shutdown(wait=False, cancel_futures=True)
+        _parse_executor = None
+
+
+def get_parse_executor() -> Executor | None:
+    """Get the process-wide parse pool
+
+    Returns
+    -------
+    Executor | None
+        The pool created by create_parse_executor, None when feeds are
+        parsed inline, including before the pool is created
+    """
+
+    return _parse_executor
+
+
+async def fetch_external_data(external_url: str, timeout: float = HTTP_FEED_TIMEOUT_SECONDS):
     """Calls an external URL and returns its content.
 
     Parameters
     ----------
     external_url : str
         The URL to fetch data from.
+    timeout : float
+        Seconds allowed for the whole fetch.
 
     Returns
     -------
@@ -16,15 +174,84 @@ async def fetch_external_data(external_url: str):
         The content of the URL parsed as a dictionary.
     """
 
+    feed = await fetch_feed(external_url, None, timeout)
+
+    return feed.items
+
+
+async def fetch_feed(external_url: str, cached: dict | None = None, timeout: float = HTTP_FEED_TIMEOUT_SECONDS) -> FeedResponse:
+    """Fetch a feed, skipping the parse when it has not changed.
+
+    The ETag and Last-Modified of the previous fetch are sent as
+    If-None-Match and If-Modified-Since. A 304 response is returned as
+    not modified without reading the body. Otherwise the body is
+    streamed through the RSS parser and hashed on the way, and a body
+    with the same hash as before is also returned as not modified.
+
+    Parameters
+    ----------
+    external_url : str
+        The URL to fetch data from.
+    cached : dict | None
+        The etag, last_modified and body_hash of the previous fetch.
+    timeout : float
+        Seconds allowed for the whole fetch, from connecting to parsing
+        the last item.
+
+    Returns
+    -------
+    FeedResponse
+        The parsed items with the validators of this response.
+    """
+
+    cached = cached or {}
+    headers = {}
+
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(external_url)
-            response.raise_for_status()
+        # The client timeout applies to each phase, this bounds the whole feed
+        async with asyncio.timeout(timeout):
+            async with get_http_client().stream("GET", external_url, headers=headers, timeout=timeout) as response:
+                if response.status_code == 304:
+                    return FeedResponse(
+                        items=None,
+                        etag=response.headers.get("ETag", cached.get("etag")),
+                        last_modified=response.headers.get("Last-Modified", cached.get("last_modified")),
+                        body_hash=cached.get("body_hash"),
+                        not_modified=True
+                    )
+
+                response.raise_for_status()
+
+                # Hash the body while it is parsed, it is never held in memory whole
+                digest = hashlib.sha256()
+
+                async def hashed_chunks():
+                    async for chunk in response.aiter_bytes():
+                        digest.update(chunk)
+                        yield chunk
+
+                items = [item async for item in iter_rss_items(hashed_chunks(), get_parse_executor())]
+
+            body_hash = digest.hexdigest()
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
 
-            headlines_list = parse_items_from_rss(response.text)
+            if body_hash == cached.get("body_hash"):
+                return FeedResponse(None, etag, last_modified, body_hash, not_modified=True)
+
+            return FeedResponse(items if items else None, etag, last_modified, body_hash)
+
+    except httpx.TimeoutException as exc:
+        raise HTTPException(status_code=504, detail=f"Timed out while requesting {exc.request.url!r}.")
+
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Timed out while requesting {external_url!r}.")
 
-            return headlines_list
-        
     except httpx.RequestError as exc:
         raise HTTPException(status_code=500, detail=f"An error occurred while requesting {exc.request.url!r}.")
     
@@ -58,29 +285,176 @@ def parse_xml(xml_string: str):
     return xml_dict if xml_dict else None
 
 
-def parse_items_from_rss(xml_string: str):
+class RssItemParser:
+    """Incrementally parse the <item> elements of an RSS feed.
 
-    root = ET.fromstring(xml_string)
+    The feed is handed over in chunks of any size. Every <item> is
+    returned as soon as its closing tag has been read, and the parsed
+    elements of the channel are dropped right after, so memory use does
+    not grow with the size of the feed.
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._path: List[str] = []
+        self._channel: ET.Element | None = None
+
+    def feed(self, data: bytes | str) -> List[dict]:
+        """Parse the next chunk of the feed
+
+        Parameters
+        ----------
+        data : bytes | str
+            The next part of the document
+
+        Returns
+        -------
+        List[dict]
+            The items completed by this chunk
+        """
+
+        self._parser.feed(data)
+
+        return self._read_items()
+
+    def close(self) -> List[dict]:
+        """Finish the document and return the items it completed"""
+
+        self._parser.close()
+
+        return self._read_items()
+
+    def _read_items(self) -> List[dict]:
+        items = []
+
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                self._path.append(elem.tag)
+                if len(self._path) == 2 and elem.tag == "channel":
+                    self._channel = elem
+                continue
+
+            # Children of <channel>, such as <item>, are complete here
+            if len(self._path) == 3 and self._path[1] == "channel":
+                if elem.tag == "item":
+                    items.append(parse_item(elem))
+
+                elem.clear()
+                self._channel.remove(elem)
+
+            self._path.pop()
+
+        return items
+
+
+async def iter_rss_items(
+    chunks: AsyncIterator[bytes],
+    executor: Executor | None = None,
+    inline_max_bytes: int = FEED_PARSE_INLINE_MAX_BYTES
+) -> AsyncIterator[dict]:
+    """Yield the items of an RSS feed while it is being downloaded
+
+    The first inline_max_bytes of the feed are parsed on the event loop.
+    Past that the rest is parsed in the executor, so a large feed does
+    not hold up other requests while it is parsed. A process pool cannot
+    share the parser, so the feed is collected and parsed there whole.
+
+    Parameters
+    ----------
+    chunks : AsyncIterator[bytes]
+        The body of the feed, for example httpx's response.aiter_bytes()
+    executor : Executor | None
+        The pool large feeds are parsed in, None to parse everything inline
+    inline_max_bytes : int
+        Size up to which the feed is parsed on the event loop
+
+    Yields
+    ------
+    dict
+        Each <item> of the feed, in document order
+    """
+
+    if isinstance(executor, ProcessPoolExecutor):
+        body = b"".join([chunk async for chunk in chunks])
+
+        if len(body) <= inline_max_bytes:
+            items = parse_items_from_rss(body)
+        else:
+            items = await asyncio.get_running_loop().run_in_executor(executor, parse_items_from_rss, body)
+
+        for item in items or []:
+            yield item
+
+        return
+
+    parser = RssItemParser()
+    received = 0
 
-    items = []
+    async def parse(method, *args) -> List[dict]:
+        if executor is None or received <= inline_max_bytes:
+            return method(*args)
+
+        # One chunk at a time, the parser is never used by two threads at once
+        return await asyncio.get_running_loop().run_in_executor(executor, method, *args)
+
+    async for chunk in chunks:
+        received += len(chunk)
+        for item in await parse(parser.feed, chunk):
+            yield item
+
+    for item in await parse(parser.close):
+        yield item
+
+
+def parse_items_from_rss(xml_string: str | bytes):
+    """Parse every <item> of an RSS document held in memory.
+
+    Parameters
+    ----------
+    xml_string : str | bytes
+        The RSS document.
 
-    # Find all <item> elements
-    for item in root.findall('./channel/item'):
-        item_data = {}
-        for elem in item:
-            tag = elem.tag
-            # Remove namespace from tag
-            if '}' in tag:
-                tag = tag.split('}', 1)[1]
+    Returns
+    -------
+    list | None
+        The items of the feed, None if it has none.
+    """
 
-            # If element has sub-elements (like media:content -> media:thumbnail)
-            extract_subitems(item_data, elem, tag)
+    parser = RssItemParser()
 
-        items.append(item_data)
+    items = parser.feed(xml_string) + parser.close()
 
     return items if items else None
 
 
+def parse_item(item: ET.Element) -> dict:
+    """Convert a complete <item> element into a dictionary.
+
+    Parameters
+    ----------
+    item : xml.etree.ElementTree.Element
+        The <item> element.
+
+    Returns
+    -------
+    dict
+        The text or sub-elements of each child, keyed by tag name.
+    """
+
+    item_data = {}
+
+    for elem in item:
+        tag = elem.tag
+        # Remove namespace from tag
+        if '}' in tag:
+            tag = tag.split('}', 1)[1]
+
+        # If element has sub-elements (like media:content -> media:thumbnail)
+        extract_subitems(item_data, elem, tag)
+
+    return item_data
+
+
 def extract_subitems(item_data, elem, tag):
     """Extracts subitems from an XML element and adds them to the item data.
 
@@ -1,5 +1,7 @@
 from fastapi import APIRouter
 from features.headlines.routes import router as headlines_router
+from features.picks.routes import router as picks_router
 
 api_router = APIRouter()
 api_router.include_router(headlines_router)
+api_router.include_router(picks_router)
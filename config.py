@@ -1 +1,73 @@
 # App-level configuration
+import os
+
+# Database connection pool
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", 2))
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", 10))
+DB_POOL_ACQUIRE_TIMEOUT = float(os.environ.get("DB_POOL_ACQUIRE_TIMEOUT", 10.0))
+DB_POOL_MAX_INACTIVE_LIFETIME = float(os.environ.get("DB_POOL_MAX_INACTIVE_LIFETIME", 300.0))
+DB_POOL_MAX_QUERIES = int(os.environ.get("DB_POOL_MAX_QUERIES", 50000))
+
+# RabbitMQ consumer batching, off by default. A batch is applied as a whole,
+# so above 1 it replaces the partition lanes and the worker pool
+RABBITMQ_BATCH_SIZE = int(os.environ.get("RABBITMQ_BATCH_SIZE", 1))
+RABBITMQ_BATCH_TIMEOUT_MS = int(os.environ.get("RABBITMQ_BATCH_TIMEOUT_MS", 50))
+
+# RabbitMQ consumer flow control, applied per exchange
+RABBITMQ_PREFETCH_COUNT = int(os.environ.get("RABBITMQ_PREFETCH_COUNT", 200))
+RABBITMQ_WORKER_CONCURRENCY = int(os.environ.get("RABBITMQ_WORKER_CONCURRENCY", 4))
+
+# RabbitMQ message deduplication
+IDEMPOTENCY_CACHE_SIZE = int(os.environ.get("IDEMPOTENCY_CACHE_SIZE", 100000))
+IDEMPOTENCY_TTL_HOURS = int(os.environ.get("IDEMPOTENCY_TTL_HOURS", 72))
+IDEMPOTENCY_PURGE_INTERVAL_SECONDS = int(os.environ.get("IDEMPOTENCY_PURGE_INTERVAL_SECONDS", 3600))
+
+# RabbitMQ failed message handling, see events/retry.py
+RABBITMQ_MAX_ATTEMPTS = int(os.environ.get("RABBITMQ_MAX_ATTEMPTS", 5))
+RABBITMQ_RETRY_BASE_DELAY_MS = int(os.environ.get("RABBITMQ_RETRY_BASE_DELAY_MS", 1000))
+RABBITMQ_RETRY_MAX_DELAY_MS = int(os.environ.get("RABBITMQ_RETRY_MAX_DELAY_MS", 300000))
+
+# Outgoing HTTP requests to the RSS feeds
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", 20))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("HTTP_MAX_KEEPALIVE_CONNECTIONS", 10))
+HTTP_FEED_TIMEOUT_SECONDS = float(os.environ.get("HTTP_FEED_TIMEOUT_SECONDS", 10.0))
+HEADLINES_FETCH_CONCURRENCY = int(os.environ.get("HEADLINES_FETCH_CONCURRENCY", 5))
+
+# RSS parsing off the event loop. FEED_PARSE_EXECUTOR is "thread", "process"
+# or "inline". Feeds up to FEED_PARSE_INLINE_MAX_BYTES are parsed on the event
+# loop, where handing them to a worker would cost more than the parse
+FEED_PARSE_EXECUTOR = os.environ.get("FEED_PARSE_EXECUTOR", "thread").lower()
+FEED_PARSE_WORKERS = int(os.environ.get("FEED_PARSE_WORKERS", 2))
+FEED_PARSE_INLINE_MAX_BYTES = int(os.environ.get("FEED_PARSE_INLINE_MAX_BYTES", 65536))
+
+# Read-through cache, see core/cache.py. Redis is only used when REDIS_URL is set
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", 1024))
+HEADLINES_CACHE_TTL_SECONDS = float(os.environ.get("HEADLINES_CACHE_TTL_SECONDS", 300.0))
+REDIS_URL = os.environ.get("REDIS_URL")
+
+# GET /headlines/{league_id} page size, and whether the page is served as
+# JSON bytes rendered once per refresh instead of being encoded per request.
+# HEADLINES_MAX_PAGE_SIZE caps the limit clients may ask for and
+# HEADLINES_MAX_LEAGUES the league_ids of one GET /headlines request
+HEADLINES_PAGE_SIZE = int(os.environ.get("HEADLINES_PAGE_SIZE", 10))
+HEADLINES_MAX_PAGE_SIZE = int(os.environ.get("HEADLINES_MAX_PAGE_SIZE", 100))
+HEADLINES_MAX_LEAGUES = int(os.environ.get("HEADLINES_MAX_LEAGUES", 25))
+HEADLINES_RAW_RESPONSES = os.environ.get("HEADLINES_RAW_RESPONSES", "true").lower() == "true"
+
+# Background headline refresh, see features/headlines/jobs.py. An interval
+# of 0 turns the scheduler off and leaves refreshes to POST /headlines
+HEADLINES_REFRESH_INTERVAL_SECONDS = float(os.environ.get("HEADLINES_REFRESH_INTERVAL_SECONDS", 900.0))
+HEADLINES_REFRESH_JITTER_SECONDS = float(os.environ.get("HEADLINES_REFRESH_JITTER_SECONDS", 60.0))
+HEADLINES_REFRESH_CONCURRENCY = int(os.environ.get("HEADLINES_REFRESH_CONCURRENCY", 2))
+HEADLINES_MAX_TRACKED_JOBS = int(os.environ.get("HEADLINES_MAX_TRACKED_JOBS", 1000))
+
+# Per-league headline retention, applied after every refresh, unchanged feeds
+# included. A league keeps at most HEADLINES_RETENTION_MAX_ITEMS headlines, none
+# older than HEADLINES_RETENTION_MAX_AGE_DAYS unless still in its feed, 0 turns
+# either limit off. Expired rows are
+# deleted HEADLINES_RETENTION_BATCH_SIZE at a time. With HEADLINES_KEEP_HISTORY
+# headlines that drop out of a feed are kept until retention removes them
+HEADLINES_RETENTION_MAX_ITEMS = int(os.environ.get("HEADLINES_RETENTION_MAX_ITEMS", 500))
+HEADLINES_RETENTION_MAX_AGE_DAYS = int(os.environ.get("HEADLINES_RETENTION_MAX_AGE_DAYS", 90))
+HEADLINES_RETENTION_BATCH_SIZE = int(os.environ.get("HEADLINES_RETENTION_BATCH_SIZE", 1000))
+HEADLINES_KEEP_HISTORY = os.environ.get("HEADLINES_KEEP_HISTORY", "false").lower() == "true"
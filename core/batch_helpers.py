@@ -0,0 +1,27 @@
+from typing import List, Sequence
+
+def latest_by_key(batch: List[dict], key_fields: Sequence[str]) -> List[dict]:
+    """Collapse a batch to the last message seen for each natural key.
+
+    Parameters
+    ----------
+    batch : List[dict]
+        Messages in the order they were received
+    key_fields : Sequence[str]
+        Fields that make up the natural key of the message
+
+    Returns
+    -------
+    List[dict]
+        One message per key, in the order each key was last seen
+    """
+
+    latest = {}
+
+    for data in batch:
+        key = tuple(data[field] for field in key_fields)
+        # Re-insert so the dict keeps the order of the last occurrence
+        latest.pop(key, None)
+        latest[key] = data
+
+    return list(latest.values())
@@ -0,0 +1,286 @@
+import logging
+import time
+from collections import OrderedDict
+from config import CACHE_MAX_ENTRIES, REDIS_URL
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Set, Tuple
+
+# redis is optional, without it only the in-process tier is used
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - depends on the environment
+    aioredis = None
+
+# Process-wide Redis client, created in the FastAPI lifespan when configured
+_redis = None
+
+
+def create_redis_client():
+    """Create the process-wide Redis client when REDIS_URL is set
+
+    Returns
+    -------
+    redis.asyncio.Redis | None
+        The client, None when Redis is not configured or not installed
+    """
+
+    global _redis
+
+    if _redis is None and REDIS_URL:
+        if aioredis is None:
+            logger = logging.getLogger(__name__)
+            logger.warning("REDIS_URL is set but the redis package is not installed, using the memory cache only.")
+            return None
+
+        _redis = aioredis.from_url(REDIS_URL)
+
+    return _redis
+
+
+async def close_redis_client():
+    """Close the process-wide Redis client"""
+
+    global _redis
+
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+
+
+def get_redis_client():
+    """Get the process-wide Redis client, None when it is not in use"""
+    return _redis
+
+
+class ReadThroughCache:
+    """Two tier cache in front of a loader, invalidated a group at a time.
+
+    Values are kept in a bounded in-process LRU whose entries expire
+    after ttl_seconds. When a Redis client is available a miss is looked
+    up there next, as a field of the hash <namespace>:<group>, before the
+    loader runs. invalidate(group) drops every key of the group from
+    both tiers, for example every page of one league. Other processes
+    drop their memory entries when the TTL expires. A value loaded while
+    its group was invalidated is returned but not cached, so it cannot
+    outlive the invalidation.
+
+    Redis errors are logged and treated as misses, so the loader is the
+    fallback whenever the shared tier is unavailable.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl_seconds: float,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        encode: Callable[[Any], bytes | str] | None = None,
+        decode: Callable[[bytes], Any] | None = None
+    ):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._encode = encode
+        self._decode = decode
+        self._entries: OrderedDict[Tuple[Hashable, Hashable], Tuple[float, Any]] = OrderedDict()
+        self._groups: Dict[Hashable, Set[Hashable]] = {}
+        self._generations: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_load(self, group: Hashable, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Get a cached value or load and cache it
+
+        Parameters
+        ----------
+        group : Hashable
+            The group the value is invalidated with, such as a league id
+        key : Hashable
+            The key of the value within its group
+        loader : Callable[[], Awaitable[Any]]
+            Loads the value on a miss in both tiers
+
+        Returns
+        -------
+        Any
+            The cached or freshly loaded value
+        """
+
+        hit, value = self._get_local(group, key)
+        if hit:
+            return value
+
+        generation = self._generations.get(group, 0)
+
+        hit, value = await self._get_shared(group, key)
+        if not hit:
+            value = await loader()
+            if self._generations.get(group, 0) != generation:
+                return value
+
+            await self._set_shared(group, key, value)
+
+        if self._generations.get(group, 0) == generation:
+            self._set_local(group, key, value)
+
+        return value
+
+    async def get_many_or_load(
+        self,
+        groups: Iterable[Hashable],
+        key: Hashable,
+        loader: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+    ) -> Dict[Hashable, Any]:
+        """Get the value of one key in several groups, loading the misses at once
+
+        The entries are the same ones get_or_load reads and writes, so
+        values cached by either call are served to the other.
+
+        Parameters
+        ----------
+        groups : Iterable[Hashable]
+            The groups to read, such as league ids
+        key : Hashable
+            The key of the value within each group
+        loader : Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+            Loads the values of the groups missing from both tiers in one
+            call, returning them by group
+
+        Returns
+        -------
+        Dict[Hashable, Any]
+            The values by group, in the order the groups were given
+        """
+
+        groups = list(dict.fromkeys(groups))
+        values: Dict[Hashable, Any] = {}
+        missing: List[Hashable] = []
+        generations: Dict[Hashable, int] = {}
+
+        for group in groups:
+            hit, value = self._get_local(group, key)
+            if not hit:
+                generations[group] = self._generations.get(group, 0)
+                hit, value = await self._get_shared(group, key)
+                if hit and self._generations.get(group, 0) == generations[group]:
+                    self._set_local(group, key, value)
+
+            if hit:
+                values[group] = value
+            else:
+                missing.append(group)
+
+        if missing:
+            loaded = await loader(missing)
+
+            for group in missing:
+                value = loaded[group]
+                values[group] = value
+                if self._generations.get(group, 0) != generations[group]:
+                    continue
+
+                await self._set_shared(group, key, value)
+                if self._generations.get(group, 0) == generations[group]:
+                    self._set_local(group, key, value)
+
+        return {group: values[group] for group in groups}
+
+    async def invalidate(self, group: Hashable):
+        """Drop every cached value of a group from both tiers"""
+
+        # Loads already running for the group will not cache their result
+        self._generations[group] = self._generations.get(group, 0) + 1
+
+        for key in self._groups.pop(group, set()):
+            self._entries.pop((group, key), None)
+
+        client = self._shared_client()
+        if client is None:
+            return
+
+        try:
+            await client.delete(self._shared_name(group))
+        except Exception as e:
+            logger = logging.getLogger(__name__)
+            logger.warning(f"Could not invalidate {self._shared_name(group)} in Redis: {e}")
+
+    def clear(self):
+        """Drop every value held in memory"""
+
+        self._entries.clear()
+        self._groups.clear()
+
+    def _get_local(self, group: Hashable, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._entries.get((group, key))
+        if entry is None:
+            return False, None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._remove_local(group, key)
+            return False, None
+
+        self._entries.move_to_end((group, key))
+
+        return True, value
+
+    def _set_local(self, group: Hashable, key: Hashable, value: Any):
+        self._entries[(group, key)] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end((group, key))
+        self._groups.setdefault(group, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            (old_group, old_key), _ = self._entries.popitem(last=False)
+            self._discard_group_key(old_group, old_key)
+
+    def _remove_local(self, group: Hashable, key: Hashable):
+        self._entries.pop((group, key), None)
+        self._discard_group_key(group, key)
+
+    def _discard_group_key(self, group: Hashable, key: Hashable):
+        keys = self._groups.get(group)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._groups[group]
+
+    def _shared_client(self):
+        if self._encode is None or self._decode is None:
+            return None
+
+        return get_redis_client()
+
+    def _shared_name(self, group: Hashable) -> str:
+        return f"{self.namespace}:{group}"
+
+    async def _get_shared(self, group: Hashable, key: Hashable) -> Tuple[bool, Any]:
+        client = self._shared_client()
+        if client is None:
+            return False, None
+
+        try:
+            data = await client.hget(self._shared_name(group), str(key))
+            if data is None:
+                return False, None
+
+            return True, self._decode(data)
+
+        except Exception as e:
+            logger = logging.getLogger(__name__)
+            logger.warning(f"Could not read {self._shared_name(group)} from Redis: {e}")
+            return False, None
+
+    async def _set_shared(self, group: Hashable, key: Hashable, value: Any):
+        client = self._shared_client()
+        if client is None:
+            return
+
+        try:
+            name = self._shared_name(group)
+            await client.hset(name, str(key), self._encode(value))
+            # Only a hash without a TTL, one just created, gets its expiry,
+            # later writes must not push back the expiry of older fields
+            await client.expire(name, int(self.ttl_seconds), nx=True)
+
+        except Exception as e:
+            logger = logging.getLogger(__name__)
+            logger.warning(f"Could not write {self._shared_name(group)} to Redis: {e}")
@@ -1,17 +1,39 @@
 import logging
 import os
 import asyncpg
+from config import (
+    DB_POOL_ACQUIRE_TIMEOUT,
+    DB_POOL_MAX_INACTIVE_LIFETIME,
+    DB_POOL_MAX_QUERIES,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_MIN_SIZE
+)
+from contextlib import asynccontextmanager
+from core.migrations import apply_migrations
+
+# Process-wide connection pool, created in the FastAPI lifespan
+_pool: asyncpg.Pool | None = None
 
 
 async def initialize_database():
-    await create_database_if_not_exists()
-    await create_headlines_table_if_not_exists()
-    await create_created_default_picks_table_if_not_exists()
-    await create_created_leagues_table_if_not_exists()
-    await create_created_user_teams_table_if_not_exists()
-    await create_created_weeks_table_if_not_exists()
-    await create_created_picks_table_if_not_exists()
-    await create_created_pick_details_table_if_not_exists()
+    """Bring the schema up to date
+
+    Every pending migration in core/migrations is applied on a single
+    pooled connection inside one transaction.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    try:
+        async with acquire_connection() as conn:
+            applied = await apply_migrations(conn)
+
+        if applied:
+            logger.info(f"Applied database migrations: {applied}")
+
+    except Exception as e:
+        logger.error(f"An error occurred while migrating the database: {e}")
+        raise
 
 
 def get_db_config():
@@ -32,237 +54,97 @@ def get_db_config():
     }
 
 
-async def create_database_if_not_exists():
-    """Create database
-
-    If this database does not exist, then create it
-    """
-
-    conn = await asyncpg.connect(
-        host="localhost",
-        database="postgres",  # connect to default DB
-        user="postgres",
-        password=os.environ.get("MAIN_DB_PASSWORD"),
-        port=5432
-    )
-
-    command = "SELECT 1 FROM pg_database WHERE datname = 'display_db'"
-    exists = await conn.execute(command)
-
-    # If database does not exist, create it
-    if not exists:
-        await conn.execute("CREATE DATABASE display_db OWNER test")
-
-    await conn.close()
-
-
-async def create_created_default_picks_table_if_not_exists():
-    """Create the created_default_picks table"""
-
-    config = get_db_config()
-
-    try:
-        # Connect to the database
-        conn = await asyncpg.connect(**config)
-
-        command = """
-            CREATE TABLE IF NOT EXISTS created_default_picks (
-                created_default_pick_id SERIAL PRIMARY KEY,
-                game_id INT NOT NULL,
-                favorite_team_id VARCHAR(5) NOT NULL,
-                favorite_team_name VARCHAR(100) NOT NULL,
-                spread FLOAT NOT NULL,
-                week_id INT NOT NULL,
-                week_number INT NOT NULL,
-                event_date TIMESTAMPTZ NOT NULL);
-        """
-
-        await conn.execute(command)
-
-        await conn.close()
-
-    except Exception as e:
-        logger = logging.getLogger(__name__)
-        logger.error(f"An error occurred while connecting to the database: {e}")
-
-
-async def create_headlines_table_if_not_exists():
-    """Create the headlines table"""
-
-    config = get_db_config()
-
-    try:
-        # Connect to the database
-        conn = await asyncpg.connect(**config)
-
-        command = """
-            CREATE TABLE IF NOT EXISTS headlines (
-                headline_id SERIAL PRIMARY KEY,
-                heading VARCHAR(200) NOT NULL,
-                story VARCHAR(500) NOT NULL,
-                link VARCHAR(500) NOT NULL,
-                pub_date TIMESTAMPTZ NOT NULL,
-                league_id INT);
-        """
-
-        await conn.execute(command)
-
-        await conn.close()
-
-    except Exception as e:
-        logger = logging.getLogger(__name__)
-        logger.error(f"An error occurred while connecting to the database: {e}")
-
-
-async def create_created_weeks_table_if_not_exists() -> None:
-    """Create the created_weeks table"""
-
-    config = get_db_config()
-
-    try:
-        # Connect to the database
-        conn = await asyncpg.connect(**config)
-
-        command = """
-            CREATE TABLE IF NOT EXISTS created_weeks (
-                created_week_id SERIAL PRIMARY KEY,
-                week_id INT NOT NULL,
-                week_number INT NOT NULL,
-                start_date TIMESTAMPTZ NOT NULL,
-                end_date TIMESTAMPTZ NOT NULL,
-                deadline_date TIMESTAMPTZ NOT NULL,
-                season_id UUID NOT NULL,
-                event_date TIMESTAMPTZ NOT NULL);
-        """
-
-        await conn.execute(command)
+async def create_pool() -> asyncpg.Pool:
+    """Create the process-wide connection pool
 
-        await conn.close()
+    Connections are opened lazily up to the maximum size and recycled
+    once they have been idle for longer than the configured lifetime.
 
-    except Exception as e:
-        logger = logging.getLogger(__name__)
-        logger.error(f"An error occurred while connecting to the database: {e}")
+    Returns
+    -------
+    asyncpg.Pool
+        The pool shared by every repository module
+    """
 
+    global _pool
 
-async def create_created_leagues_table_if_not_exists():
-    """Create the created_leagues table"""
+    if _pool is None:
+        _pool = await asyncpg.create_pool(
+            **get_db_config(),
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+            max_queries=DB_POOL_MAX_QUERIES,
+            max_inactive_connection_lifetime=DB_POOL_MAX_INACTIVE_LIFETIME
+        )
 
-    config = get_db_config()
+    return _pool
 
-    try:
-        # Connect to the database
-        conn = await asyncpg.connect(**config)
 
-        command = """
-            CREATE TABLE IF NOT EXISTS created_leagues (
-                created_league_id SERIAL PRIMARY KEY,
-                league_id int,
-                name VARCHAR(50) NOT NULL,
-                url VARCHAR(500) NOT NULL,
-                sport_id int,
-                event_date TIMESTAMPTZ NOT NULL);
-        """
+async def close_pool():
+    """Close the process-wide connection pool"""
 
-        await conn.execute(command)
+    global _pool
 
-        await conn.close()
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
 
-    except Exception as e:
-        logger = logging.getLogger(__name__)
-        logger.error(f"An error occurred while connecting to the database: {e}")
 
+def get_pool() -> asyncpg.Pool:
+    """Get the process-wide connection pool
 
-async def create_created_user_teams_table_if_not_exists():
-    """Create the created_user_teams table"""
-
-    config = get_db_config()
+    Returns
+    -------
+    asyncpg.Pool
+        The pool created by create_pool
 
-    try:
-        # Connect to the database
-        conn = await asyncpg.connect(**config)
-
-        command = """
-            CREATE TABLE IF NOT EXISTS created_user_teams (
-                created_user_team_id SERIAL PRIMARY KEY,
-                user_team_id UUID NOT NULL,
-                name VARCHAR(100) NOT NULL,
-                starting_amount INT NOT NULL,
-                is_paid BOOLEAN NOT NULL DEFAULT FALSE,
-                payment_reference VARCHAR(50) NULL,
-                is_active BOOLEAN NOT NULL DEFAULT TRUE,
-                slogan VARCHAR(100) NULL,
-                email VARCHAR(100) NOT NULL,
-                season_id UUID NOT NULL,
-                user_id UUID NOT NULL,
-                event_date TIMESTAMPTZ NOT NULL);
-        """
-
-        await conn.execute(command)
-
-        await conn.close()
+    Raises
+    ------
+    RuntimeError
+        If the pool has not been created yet
+    """
 
-    except Exception as e:
-        logger = logging.getLogger(__name__)
-        logger.error(f"An error occurred while connecting to the database: {e}")
+    if _pool is None:
+        raise RuntimeError("Database pool has not been created.")
 
+    return _pool
 
-async def create_created_picks_table_if_not_exists():
-    """Create the created_picks table"""
 
-    config = get_db_config()
+@asynccontextmanager
+async def acquire_connection():
+    """Acquire a connection from the pool
 
-    try:
-        # Connect to the database
-        conn = await asyncpg.connect(**config)
+    The connection is released back to the pool when the block exits.
 
-        command = """
-            CREATE TABLE IF NOT EXISTS created_picks (
-                created_pick_id SERIAL PRIMARY KEY,
-                pick_id INT NOT NULL,
-                bet INT NOT NULL,
-                amount_won INT NOT NULL DEFAULT 0,
-                week_id INT NOT NULL,
-                user_team_id UUID NOT NULL,
-                parlay_size INT NOT NULL DEFAULT 1,
-                event_date TIMESTAMPTZ NOT NULL);
-        """
+    Yields
+    ------
+    asyncpg.Connection
+        A pooled connection
+    """
 
-        await conn.execute(command)
+    async with get_pool().acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT) as conn:
+        yield conn
 
-        await conn.close()
 
-    except Exception as e:
-        logger = logging.getLogger(__name__)
-        logger.error(f"An error occurred while creating created_picks table: {e}")
+async def create_database_if_not_exists():
+    """Create database
 
+    If this database does not exist, then create it
+    """
 
-async def create_created_pick_details_table_if_not_exists():
-    """Create the created_pick_details table"""
+    conn = await asyncpg.connect(
+        host="localhost",
+        database="postgres",  # connect to default DB
+        user="postgres",
+        password=os.environ.get("MAIN_DB_PASSWORD"),
+        port=5432
+    )
 
-    config = get_db_config()
+    command = "SELECT 1 FROM pg_database WHERE datname = 'display_db'"
+    exists = await conn.execute(command)
 
-    try:
-        # Connect to the database
-        conn = await asyncpg.connect(**config)
-
-        command = """
-            CREATE TABLE IF NOT EXISTS created_pick_details (
-                created_pick_detail_id SERIAL PRIMARY KEY,
-                pick_detail_id INT NOT NULL,
-                game_id INT NOT NULL,
-                spread DECIMAL(5,2) NOT NULL DEFAULT 0.0,
-                total DECIMAL(5,2) NOT NULL DEFAULT 0.0,
-                is_correct INT NOT NULL DEFAULT 0,
-                created_pick_id INT NOT NULL,
-                football_team_id VARCHAR(10) NOT NULL DEFAULT '',
-                event_date TIMESTAMPTZ NOT NULL,
-                FOREIGN KEY (created_pick_id) REFERENCES created_picks(created_pick_id) ON DELETE CASCADE);
-        """
-
-        await conn.execute(command)
-
-        await conn.close()
+    # If database does not exist, create it
+    if not exists:
+        await conn.execute("CREATE DATABASE display_db OWNER test")
 
-    except Exception as e:
-        logger = logging.getLogger(__name__)
-        logger.error(f"An error occurred while creating created_pick_details table: {e}")
+    await conn.close()
@@ -0,0 +1,110 @@
+import json
+from camel_converter import to_snake
+from typing import Any, Dict
+
+# orjson is optional, it parses message bodies several times faster
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+# Upper bound of cached key translations per table, so unexpected keys
+# from a misbehaving publisher cannot grow the cache without limit
+MAX_CACHED_KEYS = 1024
+
+
+def loads(data: bytes | str) -> Any:
+    """Parse a JSON document with the fastest decoder available
+
+    Parameters
+    ----------
+    data : bytes | str
+        The raw JSON document
+
+    Returns
+    -------
+    Any
+        The parsed document
+    """
+
+    if orjson is not None:
+        return orjson.loads(data)
+
+    return json.loads(data)
+
+
+def dumps(value: Any) -> bytes:
+    """Serialize a value to JSON bytes with the fastest encoder available
+
+    Parameters
+    ----------
+    value : Any
+        A value made of dicts, lists, strings, numbers, booleans and None
+
+    Returns
+    -------
+    bytes
+        The UTF-8 encoded JSON document
+    """
+
+    if orjson is not None:
+        return orjson.dumps(value)
+
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class SnakeCaseKeys:
+    """Convert camelCase keys to snake_case with a memoized lookup table.
+
+    Messages of one exchange share the same handful of keys, so after
+    the first message the conversion of a key like pickDetailId is a
+    single dict lookup. Nested dicts and lists are converted as well.
+    """
+
+    def __init__(self, max_keys: int = MAX_CACHED_KEYS):
+        self.max_keys = max_keys
+        self._table: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def key(self, key: Any) -> Any:
+        """Translate a single key, leaving non string keys unchanged"""
+
+        try:
+            return self._table[key]
+        except KeyError:
+            pass
+        except TypeError:
+            return key
+
+        if not isinstance(key, str):
+            return key
+
+        snake_key = to_snake(key)
+        if len(self._table) < self.max_keys:
+            self._table[key] = snake_key
+
+        return snake_key
+
+    def convert(self, value: Any) -> Any:
+        """Translate the keys of every dict in a decoded JSON value
+
+        Parameters
+        ----------
+        value : Any
+            A decoded JSON value
+
+        Returns
+        -------
+        Any
+            The value with every dict key in snake_case
+        """
+
+        if isinstance(value, dict):
+            return {self.key(key): self.convert(item) for key, item in value.items()}
+
+        if isinstance(value, list):
+            return [self.convert(item) for item in value]
+
+        return value
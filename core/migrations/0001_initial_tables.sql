@@ -0,0 +1,72 @@
+-- Baseline schema previously created table by table at startup
+CREATE TABLE IF NOT EXISTS headlines (
+    headline_id SERIAL PRIMARY KEY,
+    heading VARCHAR(200) NOT NULL,
+    story VARCHAR(500) NOT NULL,
+    link VARCHAR(500) NOT NULL,
+    pub_date TIMESTAMPTZ NOT NULL,
+    league_id INT);
+
+CREATE TABLE IF NOT EXISTS created_default_picks (
+    created_default_pick_id SERIAL PRIMARY KEY,
+    game_id INT NOT NULL,
+    favorite_team_id VARCHAR(5) NOT NULL,
+    favorite_team_name VARCHAR(100) NOT NULL,
+    spread FLOAT NOT NULL,
+    week_id INT NOT NULL,
+    week_number INT NOT NULL,
+    event_date TIMESTAMPTZ NOT NULL);
+
+CREATE TABLE IF NOT EXISTS created_leagues (
+    created_league_id SERIAL PRIMARY KEY,
+    league_id int,
+    name VARCHAR(50) NOT NULL,
+    url VARCHAR(500) NOT NULL,
+    sport_id int,
+    event_date TIMESTAMPTZ NOT NULL);
+
+CREATE TABLE IF NOT EXISTS created_user_teams (
+    created_user_team_id SERIAL PRIMARY KEY,
+    user_team_id UUID NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    starting_amount INT NOT NULL,
+    is_paid BOOLEAN NOT NULL DEFAULT FALSE,
+    payment_reference VARCHAR(50) NULL,
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    slogan VARCHAR(100) NULL,
+    email VARCHAR(100) NOT NULL,
+    season_id UUID NOT NULL,
+    user_id UUID NOT NULL,
+    event_date TIMESTAMPTZ NOT NULL);
+
+CREATE TABLE IF NOT EXISTS created_weeks (
+    created_week_id SERIAL PRIMARY KEY,
+    week_id INT NOT NULL,
+    week_number INT NOT NULL,
+    start_date TIMESTAMPTZ NOT NULL,
+    end_date TIMESTAMPTZ NOT NULL,
+    deadline_date TIMESTAMPTZ NOT NULL,
+    season_id UUID NOT NULL,
+    event_date TIMESTAMPTZ NOT NULL);
+
+CREATE TABLE IF NOT EXISTS created_picks (
+    created_pick_id SERIAL PRIMARY KEY,
+    pick_id INT NOT NULL,
+    bet INT NOT NULL,
+    amount_won INT NOT NULL DEFAULT 0,
+    week_id INT NOT NULL,
+    user_team_id UUID NOT NULL,
+    parlay_size INT NOT NULL DEFAULT 1,
+    event_date TIMESTAMPTZ NOT NULL);
+
+CREATE TABLE IF NOT EXISTS created_pick_details (
+    created_pick_detail_id SERIAL PRIMARY KEY,
+    pick_detail_id INT NOT NULL,
+    game_id INT NOT NULL,
+    spread DECIMAL(5,2) NOT NULL DEFAULT 0.0,
+    total DECIMAL(5,2) NOT NULL DEFAULT 0.0,
+    is_correct INT NOT NULL DEFAULT 0,
+    created_pick_id INT NOT NULL,
+    football_team_id VARCHAR(10) NOT NULL DEFAULT '',
+    event_date TIMESTAMPTZ NOT NULL,
+    FOREIGN KEY (created_pick_id) REFERENCES created_picks(created_pick_id) ON DELETE CASCADE);
@@ -0,0 +1,45 @@
+-- Indexes for the lookups done on every message and request
+
+-- get_picks_by_week
+CREATE INDEX IF NOT EXISTS ix_created_picks_week_id
+    ON created_picks (week_id);
+
+-- delete_pick, get_pick_by_id
+CREATE INDEX IF NOT EXISTS ix_created_picks_pick_id_user_team_id
+    ON created_picks (pick_id, user_team_id);
+
+-- get_pick_details_by_pick_id and the ON DELETE CASCADE from created_picks
+CREATE INDEX IF NOT EXISTS ix_created_pick_details_created_pick_id
+    ON created_pick_details (created_pick_id);
+
+-- get_all_headlines, delete_headlines_for_league
+CREATE INDEX IF NOT EXISTS ix_headlines_league_id_pub_date
+    ON headlines (league_id, pub_date);
+
+-- delete_league, get_leagues
+CREATE INDEX IF NOT EXISTS ix_created_leagues_sport_id_name
+    ON created_leagues (sport_id, name);
+
+-- get_league_by_id
+CREATE INDEX IF NOT EXISTS ix_created_leagues_league_id
+    ON created_leagues (league_id);
+
+-- delete_week
+CREATE INDEX IF NOT EXISTS ix_created_weeks_week_number_season_id
+    ON created_weeks (week_number, season_id);
+
+-- get_week
+CREATE INDEX IF NOT EXISTS ix_created_weeks_week_id
+    ON created_weeks (week_id);
+
+-- delete_user_team
+CREATE INDEX IF NOT EXISTS ix_created_user_teams_name_season_id
+    ON created_user_teams (name, season_id);
+
+-- get_user_team
+CREATE INDEX IF NOT EXISTS ix_created_user_teams_user_team_id
+    ON created_user_teams (user_team_id);
+
+-- get_default_pick, delete_default_pick
+CREATE INDEX IF NOT EXISTS ix_created_default_picks_week_id_game_id
+    ON created_default_picks (week_id, game_id);
@@ -0,0 +1,67 @@
+-- Unique natural keys so update events can be applied with ON CONFLICT
+
+-- Keep only the newest row for any key that was duplicated by the old
+-- delete-then-insert path before the unique indexes are created
+DELETE FROM created_picks older
+    USING created_picks newer
+    WHERE older.pick_id = newer.pick_id
+      AND older.user_team_id = newer.user_team_id
+      AND older.created_pick_id < newer.created_pick_id;
+
+DELETE FROM created_pick_details older
+    USING created_pick_details newer
+    WHERE older.created_pick_id = newer.created_pick_id
+      AND older.pick_detail_id = newer.pick_detail_id
+      AND older.created_pick_detail_id < newer.created_pick_detail_id;
+
+DELETE FROM created_weeks older
+    USING created_weeks newer
+    WHERE older.week_number = newer.week_number
+      AND older.season_id = newer.season_id
+      AND older.created_week_id < newer.created_week_id;
+
+DELETE FROM created_leagues older
+    USING created_leagues newer
+    WHERE older.sport_id = newer.sport_id
+      AND older.name = newer.name
+      AND older.created_league_id < newer.created_league_id;
+
+DELETE FROM created_user_teams older
+    USING created_user_teams newer
+    WHERE older.name = newer.name
+      AND older.season_id = newer.season_id
+      AND older.created_user_team_id < newer.created_user_team_id;
+
+DELETE FROM created_default_picks older
+    USING created_default_picks newer
+    WHERE older.week_id = newer.week_id
+      AND older.game_id = newer.game_id
+      AND older.created_default_pick_id < newer.created_default_pick_id;
+
+-- The unique indexes replace the plain lookup indexes from 0002
+DROP INDEX IF EXISTS ix_created_picks_pick_id_user_team_id;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_created_picks_pick_id_user_team_id
+    ON created_picks (pick_id, user_team_id);
+
+DROP INDEX IF EXISTS ix_created_pick_details_created_pick_id;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_created_pick_details_created_pick_id_pick_detail_id
+    ON created_pick_details (created_pick_id, pick_detail_id);
+
+DROP INDEX IF EXISTS ix_created_weeks_week_number_season_id;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_created_weeks_week_number_season_id
+    ON created_weeks (week_number, season_id);
+
+DROP INDEX IF EXISTS ix_created_leagues_sport_id_name;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_created_leagues_sport_id_name
+    ON created_leagues (sport_id, name);
+
+DROP INDEX IF EXISTS ix_created_user_teams_name_season_id;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_created_user_teams_name_season_id
+    ON created_user_teams (name, season_id);
+
+DROP INDEX IF EXISTS ix_created_default_picks_week_id_game_id;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_created_default_picks_week_id_game_id
+    ON created_default_picks (week_id, game_id);
+
+-- CreatedDefaultPick carries a bet that the table never stored
+ALTER TABLE created_default_picks ADD COLUMN IF NOT EXISTS bet INT NOT NULL DEFAULT 0;
@@ -0,0 +1,9 @@
+-- Keys of messages that were already applied, used to skip redeliveries
+CREATE TABLE IF NOT EXISTS processed_messages (
+    message_key VARCHAR(128) PRIMARY KEY,
+    exchange_name VARCHAR(100) NOT NULL,
+    processed_at TIMESTAMPTZ NOT NULL DEFAULT now());
+
+-- purge_expired_message_keys
+CREATE INDEX IF NOT EXISTS ix_processed_messages_processed_at
+    ON processed_messages (processed_at);
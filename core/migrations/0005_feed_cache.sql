@@ -0,0 +1,8 @@
+-- Validators of the last successful fetch of each RSS feed, used to send
+-- conditional requests and to skip refreshes when the feed is unchanged
+CREATE TABLE IF NOT EXISTS feed_cache (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    body_hash CHAR(64) NOT NULL,
+    fetched_at TIMESTAMPTZ NOT NULL DEFAULT now());
@@ -0,0 +1,22 @@
+-- Identify a headline by the hash of its normalized link so a refresh only
+-- writes the items that changed. The normalization must match
+-- normalize_link in features/headlines/mappings.py: surrounding whitespace,
+-- the fragment and trailing slashes are removed.
+ALTER TABLE headlines ADD COLUMN IF NOT EXISTS link_hash CHAR(64);
+
+UPDATE headlines
+SET link_hash = encode(sha256(convert_to(rtrim(split_part(btrim(link), '#', 1), '/'), 'UTF8')), 'hex')
+WHERE link_hash IS NULL;
+
+-- Keep the newest copy of headlines that were stored more than once
+DELETE FROM headlines older
+USING headlines newer
+WHERE older.league_id IS NOT DISTINCT FROM newer.league_id
+  AND older.link_hash = newer.link_hash
+  AND older.headline_id < newer.headline_id;
+
+ALTER TABLE headlines ALTER COLUMN link_hash SET NOT NULL;
+
+-- sync_headlines_for_league
+CREATE UNIQUE INDEX IF NOT EXISTS ux_headlines_league_id_link_hash
+    ON headlines (league_id, link_hash);
@@ -0,0 +1,10 @@
+-- Full-text search over headlines, headings weigh more than stories
+ALTER TABLE headlines ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(heading, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(story, '')), 'B')
+    ) STORED;
+
+-- search_headlines
+CREATE INDEX IF NOT EXISTS ix_headlines_search_vector
+    ON headlines USING GIN (search_vector);
@@ -0,0 +1,7 @@
+-- Newest first listings paged by keyset on (pub_date, link_hash), see
+-- get_all_headlines. The unique link_hash of a league breaks pub_date ties
+CREATE INDEX IF NOT EXISTS ix_headlines_league_id_pub_date_link_hash
+    ON headlines (league_id, pub_date DESC, link_hash DESC);
+
+-- Replaced by the index above, which also serves delete_headlines_for_league
+DROP INDEX IF EXISTS ix_headlines_league_id_pub_date;
@@ -0,0 +1,3 @@
+-- Link hashes of the last stored fetch of each feed, so an unchanged feed
+-- can still apply the age retention without deleting its own headlines
+ALTER TABLE feed_cache ADD COLUMN IF NOT EXISTS link_hashes CHAR(64)[] NOT NULL DEFAULT '{}';
@@ -0,0 +1,114 @@
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+MIGRATIONS_DIR = Path(__file__).parent
+
+# Matches files such as 0002_hot_path_indexes.sql
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+# Advisory lock key so two instances starting together apply migrations once
+MIGRATION_LOCK_ID = 70690001
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    sql: str
+
+
+def load_migrations(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """Load the migration files in version order
+
+    Parameters
+    ----------
+    directory : Path
+        Directory holding the numbered .sql migration files
+
+    Returns
+    -------
+    List[Migration]
+        The migrations sorted by version
+
+    Raises
+    ------
+    ValueError
+        If two files share the same version number
+    """
+
+    migrations: List[Migration] = []
+
+    for path in directory.iterdir():
+        match = MIGRATION_FILE_PATTERN.match(path.name)
+        if not match:
+            continue
+
+        migrations.append(Migration(
+            version=int(match.group(1)),
+            name=match.group(2),
+            sql=path.read_text()
+        ))
+
+    migrations.sort(key=lambda migration: migration.version)
+
+    versions = [migration.version for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions found in {directory}.")
+
+    return migrations
+
+
+async def apply_migrations(conn, migrations: List[Migration] | None = None) -> List[int]:
+    """Apply every pending migration in a single transaction
+
+    Parameters
+    ----------
+    conn : asyncpg.Connection
+        Connection used to apply the migrations
+    migrations : List[Migration] | None
+        Migrations to apply, defaults to the files in this package
+
+    Returns
+    -------
+    List[int]
+        The versions applied by this call
+    """
+
+    logger = logging.getLogger(__name__)
+
+    if migrations is None:
+        migrations = load_migrations()
+
+    applied: List[int] = []
+
+    async with conn.transaction():
+        await conn.execute("SELECT pg_advisory_xact_lock($1);", MIGRATION_LOCK_ID)
+
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT PRIMARY KEY,
+                name VARCHAR(100) NOT NULL,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now());
+        """)
+
+        rows = await conn.fetch("SELECT version FROM schema_migrations;")
+        current = {row["version"] for row in rows}
+
+        for migration in migrations:
+            if migration.version in current:
+                continue
+
+            logger.info(f"Applying migration {migration.version:04d}_{migration.name}")
+
+            await conn.execute(migration.sql)
+            await conn.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES ($1, $2);",
+                migration.version, migration.name
+            )
+
+            applied.append(migration.version)
+
+    return applied
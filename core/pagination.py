@@ -0,0 +1,54 @@
+import base64
+import json
+
+
+def encode_cursor(position: dict) -> str:
+    """Encode the keyset position of the last row of a page
+
+    Parameters
+    ----------
+    position : dict
+        The sort key values of the last row, JSON serializable
+
+    Returns
+    -------
+    str
+        An opaque, URL safe cursor for the next page
+    """
+
+    data = json.dumps(position, separators=(",", ":")).encode("utf-8")
+
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, *fields: str) -> dict:
+    """Decode a cursor made by encode_cursor
+
+    Parameters
+    ----------
+    cursor : str
+        The cursor sent back by the client
+    *fields : str
+        The keys the position must contain
+
+    Returns
+    -------
+    dict
+        The keyset position
+
+    Raises
+    ------
+    ValueError
+        If the cursor is malformed or misses one of the fields
+    """
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}") from e
+
+    if not isinstance(position, dict) or any(name not in position for name in fields):
+        raise ValueError("Invalid cursor: missing position fields")
+
+    return position
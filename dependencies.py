@@ -1,2 +1,15 @@
 # Shared dependencies (e.g., get_db, get_current_user)
+from core.database import acquire_connection
 
+
+async def get_db():
+    """Provide a pooled database connection to a route
+
+    Yields
+    ------
+    asyncpg.Connection
+        A connection that is released back to the pool after the request
+    """
+
+    async with acquire_connection() as conn:
+        yield conn
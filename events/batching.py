@@ -0,0 +1,63 @@
+import aio_pika
+import asyncio
+import logging
+from typing import Awaitable, Callable, List
+
+BatchHandler = Callable[[List[aio_pika.abc.AbstractIncomingMessage]], Awaitable[None]]
+
+
+class MessageBatcher:
+    """Collect messages from one exchange and hand them over in batches.
+
+    A batch is flushed as soon as it holds max_size messages, or
+    max_wait_ms after its first message arrived, whichever comes first.
+    Flushes run one at a time so batches are applied in arrival order.
+    """
+
+    def __init__(self, exchange_name: str, handler: BatchHandler, max_size: int, max_wait_ms: int):
+        self.exchange_name = exchange_name
+        self.max_size = max_size
+        self.max_wait_ms = max_wait_ms
+        self._handler = handler
+        self._messages: List[aio_pika.abc.AbstractIncomingMessage] = []
+        self._timer: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    async def add(self, message: aio_pika.abc.AbstractIncomingMessage):
+        """Add a message to the current batch
+
+        Parameters
+        ----------
+        message : AbstractIncomingMessage
+            The message received from RabbitMQ
+        """
+
+        self._messages.append(message)
+
+        if len(self._messages) >= self.max_size:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_after_timeout())
+
+    async def flush(self):
+        """Hand the current batch to the handler"""
+
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
+
+        if not self._messages:
+            return
+
+        messages, self._messages = self._messages, []
+
+        async with self._lock:
+            try:
+                await self._handler(messages)
+            except Exception as e:
+                logger = logging.getLogger(__name__)
+                logger.exception(f"[RabbitMQ:{self.exchange_name}] Batch handler failed: {e}")
+
+    async def _flush_after_timeout(self):
+        await asyncio.sleep(self.max_wait_ms / 1000)
+        await self.flush()
@@ -0,0 +1,96 @@
+import aio_pika
+import asyncio
+import logging
+from events.process_messages import decode_message
+from typing import Awaitable, Callable, List, Sequence
+
+MessageHandler = Callable[[aio_pika.abc.AbstractIncomingMessage, dict | None], Awaitable[None]]
+
+
+class PartitionedDispatcher:
+    """Process messages with the same key in order and different keys in parallel.
+
+    Every message is routed to one of `lanes` queues by the hash of its
+    partition key, and each lane is drained by a single worker. Two
+    updates to the same pick therefore never race each other, while
+    updates to different picks run side by side on separate pooled
+    connections.
+    """
+
+    def __init__(self, exchange_name: str, lanes: int, partition_key: Sequence[str], handler: MessageHandler):
+        self.exchange_name = exchange_name
+        self.lanes = max(lanes, 1)
+        self.partition_key = tuple(partition_key)
+        self._handler = handler
+        self._queues: List[asyncio.Queue] = [asyncio.Queue() for _ in range(self.lanes)]
+        self._workers: List[asyncio.Task] = []
+
+    def start(self):
+        """Start one worker per lane"""
+
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._drain(queue)) for queue in self._queues
+            ]
+
+    async def stop(self):
+        """Stop the lane workers"""
+
+        for worker in self._workers:
+            worker.cancel()
+
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def lane_for(self, data: dict | None) -> int:
+        """Pick the lane for a decoded message
+
+        Parameters
+        ----------
+        data : dict | None
+            The decoded message, None if it could not be decoded
+
+        Returns
+        -------
+        int
+            Index of the lane that owns the message's partition key
+        """
+
+        if data is None:
+            return 0
+
+        try:
+            key = tuple(data[field] for field in self.partition_key)
+        except (KeyError, TypeError):
+            return 0
+
+        return hash(key) % self.lanes
+
+    async def dispatch(self, message: aio_pika.abc.AbstractIncomingMessage):
+        """Queue a message on the lane that owns its partition key
+
+        Parameters
+        ----------
+        message : AbstractIncomingMessage
+            The message received from RabbitMQ
+        """
+
+        try:
+            data = decode_message(message, self.exchange_name)
+        except Exception:
+            # Let the handler report and settle the undecodable message
+            data = None
+
+        await self._queues[self.lane_for(data)].put((message, data))
+
+    async def _drain(self, queue: asyncio.Queue):
+        while True:
+            message, data = await queue.get()
+
+            try:
+                await self._handler(message, data)
+            except Exception as e:
+                logger = logging.getLogger(__name__)
+                logger.exception(f"[RabbitMQ:{self.exchange_name}] Lane handler failed: {e}")
+            finally:
+                queue.task_done()
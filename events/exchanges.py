@@ -0,0 +1,24 @@
+# Importing a feature's events module registers its exchange
+import features.default_picks.events  # noqa: F401
+import features.leagues.events  # noqa: F401
+import features.picks.events  # noqa: F401
+import features.user_teams.events  # noqa: F401
+import features.weeks.events  # noqa: F401
+from events.registry import ExchangeHandler, register_exchange
+from typing import List
+
+async def process_ranking_message(data: dict) -> bool:
+    """Rankings are not stored by this service yet, acknowledge them"""
+    return True
+
+async def process_ranking_messages(batch: List[dict]) -> bool:
+    """Rankings are not stored by this service yet, acknowledge them"""
+    return True
+
+ranking_exchange = register_exchange(ExchangeHandler(
+    exchange="ranking_exchange",
+    queue="ranking_for_displays",
+    process_message=process_ranking_message,
+    process_batch=process_ranking_messages,
+    settings={"batch_size": 1}
+))
@@ -0,0 +1,186 @@
+import aio_pika
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from config import (
+    IDEMPOTENCY_CACHE_SIZE,
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS,
+    IDEMPOTENCY_TTL_HOURS
+)
+from core.database import acquire_connection
+from datetime import timedelta
+from typing import Iterable, List, Set
+
+
+class RecentMessageKeys:
+    """Bounded in-memory LRU of message keys that were already applied.
+
+    It answers most redeliveries without a database round trip. A miss
+    says nothing, so the durable table is checked next.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._keys: OrderedDict[str, None] = OrderedDict()
+
+    def __contains__(self, key: str) -> bool:
+        if key in self._keys:
+            self._keys.move_to_end(key)
+            return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: str):
+        """Remember a key, evicting the least recently seen one when full"""
+
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+
+        if len(self._keys) > self.capacity:
+            self._keys.popitem(last=False)
+
+
+_recent_keys = RecentMessageKeys(IDEMPOTENCY_CACHE_SIZE)
+
+
+def message_key(message: aio_pika.abc.AbstractIncomingMessage, exchange_name: str) -> str:
+    """Build the deduplication key of a message
+
+    The AMQP message_id is used when the publisher set one, otherwise
+    a hash of the exchange name and body. Identical bodies on the same
+    exchange are therefore treated as the same event within the TTL.
+
+    Parameters
+    ----------
+    message : AbstractIncomingMessage
+        The message received from RabbitMQ
+    exchange_name : str
+        The exchange the message was consumed from
+
+    Returns
+    -------
+    str
+        The key used to recognise redeliveries of the message
+    """
+
+    if message.message_id:
+        return f"{exchange_name}:id:{message.message_id}"
+
+    digest = hashlib.sha256(message.body).hexdigest()
+
+    return f"{exchange_name}:sha256:{digest}"
+
+
+async def find_processed(keys: Iterable[str]) -> Set[str]:
+    """Find which keys belong to messages that were already applied
+
+    Parameters
+    ----------
+    keys : Iterable[str]
+        Keys built with message_key
+
+    Returns
+    -------
+    Set[str]
+        The keys that were processed within the TTL. If the durable
+        store cannot be reached only the in-memory hits are returned.
+    """
+
+    keys = list(keys)
+    processed = {key for key in keys if key in _recent_keys}
+    unknown = [key for key in keys if key not in processed]
+
+    if not unknown:
+        return processed
+
+    try:
+        async with acquire_connection() as conn:
+            rows = await conn.fetch(
+                """
+                    SELECT message_key FROM processed_messages
+                    WHERE message_key = ANY($1::varchar[])
+                      AND processed_at > now() - $2::interval;
+                """,
+                unknown,
+                timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+            )
+
+        for row in rows:
+            _recent_keys.add(row["message_key"])
+            processed.add(row["message_key"])
+
+    except Exception as e:
+        logger = logging.getLogger(__name__)
+        logger.warning(f"Could not read processed message keys: {e}")
+
+    return processed
+
+
+async def mark_processed(keys: List[str], exchange_name: str):
+    """Record that messages were applied
+
+    Parameters
+    ----------
+    keys : List[str]
+        Keys built with message_key
+    exchange_name : str
+        The exchange the messages were consumed from
+    """
+
+    if not keys:
+        return
+
+    for key in keys:
+        _recent_keys.add(key)
+
+    try:
+        async with acquire_connection() as conn:
+            await conn.executemany(
+                """
+                    INSERT INTO processed_messages (message_key, exchange_name)
+                    VALUES ($1, $2)
+                    ON CONFLICT (message_key) DO UPDATE SET processed_at = now();
+                """,
+                [(key, exchange_name) for key in keys]
+            )
+
+    except Exception as e:
+        logger = logging.getLogger(__name__)
+        logger.warning(f"Could not record processed message keys: {e}")
+
+
+async def purge_expired_message_keys() -> int:
+    """Delete message keys older than the TTL
+
+    Returns
+    -------
+    int
+        Number of keys deleted
+    """
+
+    async with acquire_connection() as conn:
+        result = await conn.execute(
+            "DELETE FROM processed_messages WHERE processed_at <= now() - $1::interval;",
+            timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+        )
+
+    return int(result.split()[1]) if result.startswith("DELETE") else 0
+
+
+async def run_message_key_purge():
+    """Purge expired message keys on a fixed interval until cancelled"""
+
+    logger = logging.getLogger(__name__)
+
+    while True:
+        try:
+            deleted = await purge_expired_message_keys()
+            if deleted:
+                logger.info(f"Purged {deleted} expired processed message keys")
+        except Exception as e:
+            logger.warning(f"Could not purge processed message keys: {e}")
+
+        await asyncio.sleep(IDEMPOTENCY_PURGE_INTERVAL_SECONDS)
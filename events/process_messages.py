@@ -1,47 +1,107 @@
 import aio_pika
-import json
 import logging
-from features.default_picks.services import process_default_pick_message
-from features.leagues.services import process_league_message
-from features.picks.services import process_pick_message
-from features.user_teams.services import process_user_team_message
-from features.weeks.services import process_week_message
-from camel_converter import dict_to_snake
-
-async def process_message(message: aio_pika.abc.AbstractIncomingMessage, exchange_name: str):
-    async with message.process():  # Auto-acknowledgment on success
-        """Process a RabbitMQ message based on the exchange name."""
-
-        raw_body = message.body.decode()
+from core.json_codec import SnakeCaseKeys, loads
+import events.exchanges  # noqa: F401 - registers every exchange handler
+from events.idempotency import find_processed, mark_processed, message_key
+from events.registry import get_exchange_handler
+from events.retry import RetryRouter
+from typing import Dict, List
+
+# One key translation table per exchange, every exchange has its own schema
+_key_tables: Dict[str, SnakeCaseKeys] = {}
+
+def decode_message(message: aio_pika.abc.AbstractIncomingMessage, exchange_name: str = "") -> dict:
+    """Decode a message body into a snake_case dictionary.
+
+    Parameters
+    ----------
+    message : AbstractIncomingMessage
+        The message received from RabbitMQ
+    exchange_name : str
+        Exchange the message came from, selects the cached key table
+
+    Returns
+    -------
+    dict
+        The JSON body with its keys converted to snake_case
+
+    Raises
+    ------
+    TypeError
+        If the body is not a JSON object
+    """
+
+    data = loads(message.body)
+    if not isinstance(data, dict):
+        raise TypeError(f"Expected a JSON object, got {type(data).__name__}")
+
+    key_table = _key_tables.get(exchange_name)
+    if key_table is None:
+        key_table = _key_tables.setdefault(exchange_name, SnakeCaseKeys())
+
+    return key_table.convert(data)
+
+async def process_message(
+    message: aio_pika.abc.AbstractIncomingMessage,
+    exchange_name: str,
+    data: dict | None = None,
+    retry_router: RetryRouter | None = None
+):
+    """Process a RabbitMQ message based on the exchange name.
+
+    data can be passed in when the body has already been decoded. A
+    message that fails is handed to retry_router for a delayed retry,
+    and one that cannot be decoded is quarantined straight away. If
+    that hand-over fails the message is requeued instead of acked.
+    """
+
+    async with message.process(requeue=True):  # Auto-acknowledgment on success
+        raw_body = message.body.decode(errors="replace")
         logger = logging.getLogger(__name__)
         logger.info(f"[RabbitMQ:{exchange_name}] Received: {raw_body}")
 
+        # Skip redeliveries of messages that were already applied
+        key = message_key(message, exchange_name)
+        if await find_processed([key]):
+            logger.info(f"[RabbitMQ:{exchange_name}] Skipped duplicate message {key}")
+            return
+
+        # Decode the message body and parse JSON
         try:
-            # Decode the message body and parse JSON
-            json_data = json.loads(raw_body)
-            snake_case_data = dict_to_snake(json_data)
+            snake_case_data = data if data is not None else decode_message(message, exchange_name)
+        except Exception as e:
+            logger.error(f"[RabbitMQ:{exchange_name}] Failed to decode message: {e}")
+            if retry_router:
+                await retry_router.quarantine(message, f"Undecodable message: {e}")
+            return
 
-            # Process the message based on the exchange name
+        # Process the message based on the exchange name
+        try:
             success = await update_message_status(snake_case_data, exchange_name)
+            error = "Process failed."
+        except Exception as e:
+            success = False
+            error = f"Failed to process message: {e}"
 
-            # Log the processed message ID or raise an error if the ID is not valid
-            if success:
-                logger.info("[RabbitMQ:{exchange_name}] Processed message successfully")
-            else:
-                logger.error(f"[RabbitMQ:{exchange_name}] Process failed.")
+        # Log the processed message or schedule another attempt
+        if success:
+            await mark_processed([key], exchange_name)
+            logger.info(f"[RabbitMQ:{exchange_name}] Processed message successfully")
+            return
 
-        except Exception as e:
-            logger.error(f"[RabbitMQ:{exchange_name}] Failed to process message: {e}")
+        logger.error(f"[RabbitMQ:{exchange_name}] {error}")
+        if retry_router:
+            await retry_router.retry(message, error)
 
-async def update_message_status(data, exchange_name: str) -> int:
+async def update_message_status(data, exchange_name: str) -> bool:
     """Update the status of a message based on the exchange name.
 
     Parameters
     ----------
-    data : tuple or dict
+    data : dict
         Data that will be used to update the status of the message
     exchange_name : str
-        Exchange name that will be used to determine the type of message
+        Exchange name used to look up the registered handler
 
     Returns
     -------
@@ -49,29 +109,230 @@ async def update_message_status(data, exchange_name: str) -> int:
         Returns True if the message was processed successfully, False otherwise
     """
 
-    if exchange_name == "league_exchange":
-        result = await process_league_message(data)
-        return result
+    handler = get_exchange_handler(exchange_name)
+    if handler is None:
+        logger = logging.getLogger(__name__)
+        logger.error(f"[RabbitMQ:{exchange_name}] No handler is registered for this exchange.")
+        return False
+
+    return await handler.process_message(data)
+
+
+async def process_message_batch(
+    messages: List[aio_pika.abc.AbstractIncomingMessage],
+    exchange_name: str,
+    retry_router: RetryRouter | None = None
+):
+    """Process a batch of RabbitMQ messages from one exchange.
+
+    The batch is written in a single transaction and then acknowledged
+    as a whole. If it failed, its messages are applied again one at a
+    time, and only those that also fail on their own are handed to
+    retry_router for a delayed retry, see apply_messages_one_by_one.
+    Messages that cannot be decoded are quarantined on their own, and
+    messages that were already applied are acknowledged without being
+    written again.
+
+    Parameters
+    ----------
+    messages : List[AbstractIncomingMessage]
+        Messages in the order they were received
+    exchange_name : str
+        Exchange name that will be used to determine the type of message
+    retry_router : RetryRouter | None
+        Where failed messages are sent, see events/retry.py
+    """
+
+    logger = logging.getLogger(__name__)
+
+    decoded = []
+
+    for message in messages:
+        try:
+            decoded.append((message, decode_message(message, exchange_name)))
+        except Exception as e:
+            logger.error(f"[RabbitMQ:{exchange_name}] Rejected undecodable message: {e}")
+            if retry_router:
+                await settle_failed_message(message, f"Undecodable message: {e}", retry_router, quarantine=True)
+            else:
+                await message.reject(requeue=False)
+
+    # Acknowledge redeliveries of messages that were already applied
+    keys = [message_key(message, exchange_name) for message, _ in decoded]
+    processed = await find_processed(keys)
+
+    if processed:
+        pending = []
+        for (message, data), key in zip(decoded, keys):
+            if key in processed:
+                await message.ack()
+            else:
+                pending.append((message, data))
+
+        logger.info(f"[RabbitMQ:{exchange_name}] Skipped {len(decoded) - len(pending)} duplicate messages")
+        keys = [key for key in keys if key not in processed]
+        decoded = pending
+
+    if not decoded:
+        return
+
+    try:
+        success = await update_message_batch_status([data for _, data in decoded], exchange_name)
+        error = "Process failed."
+    except Exception as e:
+        logger.error(f"[RabbitMQ:{exchange_name}] Failed to process batch: {e}")
+        success = False
+        error = f"Failed to process batch: {e}"
 
-    elif exchange_name == "default_pick_exchange":
-        result = await process_default_pick_message(data)
-        return result
+    if success:
+        await mark_processed(keys, exchange_name)
 
-    elif exchange_name == "pick_exchange":
-        result = await process_pick_message(data)
-        return result
+        for message, _ in decoded:
+            await message.ack()
 
-    elif exchange_name == "ranking_exchange":
-        # Handle ranking exchange logic
-        return -1
+        logger.info(f"[RabbitMQ:{exchange_name}] Processed batch of {len(decoded)} messages successfully")
+        return
+
+    if len(decoded) == 1:
+        message, _ = decoded[0]
+        logger.error(f"[RabbitMQ:{exchange_name}] {error}")
+        await settle_failed_message(message, error, retry_router)
+        return
+
+    # One bad message must not take the valid ones of its batch down with it
+    logger.warning(f"[RabbitMQ:{exchange_name}] Batch of {len(decoded)} messages failed, applying them one at a time: {error}")
+    await apply_messages_one_by_one(decoded, keys, exchange_name, retry_router)
+
+
+async def apply_messages_one_by_one(
+    decoded: List[tuple],
+    keys: List[str],
+    exchange_name: str,
+    retry_router: RetryRouter | None = None
+):
+    """Apply the messages of a failed batch one at a time.
+
+    Messages that succeed on their own are recorded and acknowledged,
+    the others are settled with settle_failed_message. Messages are
+    applied in the order they were received.
+
+    Parameters
+    ----------
+    decoded : List[tuple]
+        (message, data) of every message of the batch, still unacknowledged
+    keys : List[str]
+        The deduplication key of each message, see message_key
+    exchange_name : str
+        Exchange name that will be used to determine the type of message
+    retry_router : RetryRouter | None
+        Where failed messages are sent, see events/retry.py
+    """
+
+    logger = logging.getLogger(__name__)
+
+    applied = []
+    failed = 0
+
+    for (message, data), key in zip(decoded, keys):
+        try:
+            success = await update_message_status(data, exchange_name)
+            error = "Process failed."
+        except Exception as e:
+            success = False
+            error = f"Failed to process message: {e}"
+
+        if success:
+            applied.append((message, key))
+            continue
+
+        failed += 1
+        logger.error(f"[RabbitMQ:{exchange_name}] {error}")
+        await settle_failed_message(message, error, retry_router)
+
+    if applied:
+        await mark_processed([key for _, key in applied], exchange_name)
+
+        for message, _ in applied:
+            await message.ack()
+
+    logger.info(f"[RabbitMQ:{exchange_name}] Applied {len(applied)} messages one at a time, {failed} failed")
+
+
+async def settle_failed_message(
+    message: aio_pika.abc.AbstractIncomingMessage,
+    error: str,
+    retry_router: RetryRouter | None,
+    quarantine: bool = False
+):
+    """Hand a failed message to the retry queues and acknowledge it.
+
+    Without a router the message is rejected, requeueing it would
+    redeliver a message that keeps failing forever and block the
+    exchange. When the router could not publish it the message is
+    requeued instead, so a broker failure never loses it.
+
+    Parameters
+    ----------
+    message : AbstractIncomingMessage
+        The failed message, still unacknowledged
+    error : str
+        Why processing failed
+    retry_router : RetryRouter | None
+        Where failed messages are sent
+    quarantine : bool
+        Skip the retries and move the message to the dead-letter queue
+    """
+
+    if retry_router is None:
+        logger = logging.getLogger(__name__)
+        logger.error(f"Rejected failed message without a retry router: {error}")
+        await message.reject(requeue=False)
+        return
+
+    try:
+        if quarantine:
+            await retry_router.quarantine(message, error)
+        else:
+            await retry_router.retry(message, error)
+    except Exception as e:
+        logger = logging.getLogger(__name__)
+        logger.error(f"[RabbitMQ:{retry_router.exchange_name}] Could not reroute failed message, requeueing: {e}")
+        await message.nack(requeue=True)
+        return
+
+    await message.ack()
+
+
+async def update_message_batch_status(batch: List[dict], exchange_name: str) -> bool:
+    """Update the status of a batch of messages based on the exchange name.
+
+    Exchanges registered without a batch handler have their messages
+    applied one at a time, stopping at the first failure.
+
+    Parameters
+    ----------
+    batch : List[dict]
+        Decoded messages in the order they were received
+    exchange_name : str
+        Exchange name used to look up the registered handler
+
+    Returns
+    -------
+    bool
+        Returns True if the batch was processed successfully, False otherwise
+    """
+
+    handler = get_exchange_handler(exchange_name)
+    if handler is None:
+        logger = logging.getLogger(__name__)
+        logger.error(f"[RabbitMQ:{exchange_name}] No handler is registered for this exchange.")
+        return False
 
-    elif exchange_name == "user_team_exchange":
-        result = await process_user_team_message(data)
-        return result
+    if handler.process_batch is not None:
+        return await handler.process_batch(batch)
 
-    elif exchange_name == "week_exchange":
-        result = await process_week_message(data)
-        return result
-    
-    return False
+    for data in batch:
+        if not await handler.process_message(data):
+            return False
 
+    return True
@@ -0,0 +1,73 @@
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Sequence
+
+MessageHandler = Callable[[dict], Awaitable[Any]]
+BatchHandler = Callable[[List[dict]], Awaitable[bool]]
+
+
+@dataclass
+class ExchangeHandler:
+    """Everything the consumer needs to know about one exchange.
+
+    Feature packages declare one of these in their events module and
+    register it, so adding an exchange never touches the consumer.
+    settings overrides DEFAULT_BINDING_SETTINGS in rabbitmq_handler.py,
+    for example the batch size or concurrency of this exchange.
+    """
+
+    exchange: str
+    queue: str
+    process_message: MessageHandler
+    process_batch: BatchHandler | None = None
+    partition_key: Sequence[str] | None = None
+    settings: Dict[str, Any] = field(default_factory=dict)
+
+    def binding(self) -> dict:
+        """The exchange/queue binding with this handler's own settings"""
+
+        binding = {"exchange": self.exchange, "queue": self.queue, **self.settings}
+        if self.partition_key:
+            binding["partition_key"] = tuple(self.partition_key)
+
+        return binding
+
+
+_handlers: Dict[str, ExchangeHandler] = {}
+
+
+def register_exchange(handler: ExchangeHandler) -> ExchangeHandler:
+    """Register the handler of an exchange
+
+    Parameters
+    ----------
+    handler : ExchangeHandler
+        The handler to register
+
+    Returns
+    -------
+    ExchangeHandler
+        The registered handler
+
+    Raises
+    ------
+    ValueError
+        If another handler is already registered for the exchange
+    """
+
+    existing = _handlers.get(handler.exchange)
+    if existing is not None and existing is not handler:
+        raise ValueError(f"A handler is already registered for exchange '{handler.exchange}'.")
+
+    _handlers[handler.exchange] = handler
+
+    return handler
+
+
+def get_exchange_handler(exchange_name: str) -> ExchangeHandler | None:
+    """Find the handler registered for an exchange"""
+    return _handlers.get(exchange_name)
+
+
+def get_exchange_handlers() -> List[ExchangeHandler]:
+    """Every registered handler, ordered by exchange name"""
+    return [_handlers[name] for name in sorted(_handlers)]
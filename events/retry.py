@@ -0,0 +1,189 @@
+import aio_pika
+import logging
+from typing import Dict
+
+# Header counting how many times a message has already been attempted
+ATTEMPTS_HEADER = "x-attempts"
+ERROR_HEADER = "x-last-error"
+
+
+def retry_queue_name(queue_name: str, delay_ms: int) -> str:
+    """Name of the delay queue holding messages for delay_ms before their next attempt
+
+    The delay is part of the name because it is fixed by the queue's
+    x-message-ttl argument, which a broker refuses to change on an
+    existing queue. Changing the backoff settings declares new queues
+    instead of failing the binding.
+    """
+    return f"{queue_name}.retry.{delay_ms}"
+
+
+def dead_letter_exchange_name(exchange_name: str) -> str:
+    """Name of the exchange poison messages are quarantined through"""
+    return f"{exchange_name}.dlx"
+
+
+def dead_letter_queue_name(queue_name: str) -> str:
+    """Name of the queue holding quarantined poison messages"""
+    return f"{queue_name}.dlq"
+
+
+def retry_delay_ms(attempt: int, base_delay_ms: int, max_delay_ms: int) -> int:
+    """Exponential backoff before the given retry attempt
+
+    Parameters
+    ----------
+    attempt : int
+        The retry attempt, starting at 1
+    base_delay_ms : int
+        Delay before the first retry
+    max_delay_ms : int
+        Upper bound of the delay
+
+    Returns
+    -------
+    int
+        The delay in milliseconds
+    """
+
+    return min(base_delay_ms * 2 ** (attempt - 1), max_delay_ms)
+
+
+def get_attempts(message: aio_pika.abc.AbstractIncomingMessage) -> int:
+    """Number of times a message was attempted before this delivery"""
+
+    headers = message.headers or {}
+
+    try:
+        return int(headers.get(ATTEMPTS_HEADER, 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+class RetryRouter:
+    """Send failed messages of one binding to a delayed retry or to quarantine.
+
+    Every retry delay has its own queue whose message TTL grows
+    exponentially with the attempt. When the TTL expires the broker dead-letters the
+    message through the default exchange straight back onto the
+    binding's queue, so only this consumer sees it again. Once
+    max_attempts is reached, or when a message can never succeed, it is
+    published to the binding's dead-letter exchange and kept in its
+    dead-letter queue for inspection.
+
+    The copy is always published before the original is acknowledged,
+    so a broker failure leaves the original to be redelivered.
+    """
+
+    def __init__(
+        self,
+        channel: aio_pika.abc.AbstractChannel,
+        exchange_name: str,
+        queue_name: str,
+        max_attempts: int,
+        base_delay_ms: int,
+        max_delay_ms: int
+    ):
+        self.exchange_name = exchange_name
+        self.queue_name = queue_name
+        self.max_attempts = max(max_attempts, 1)
+        self.base_delay_ms = base_delay_ms
+        self.max_delay_ms = max_delay_ms
+        self._channel = channel
+        self._dead_letter_exchange: aio_pika.abc.AbstractExchange | None = None
+
+    async def declare(self):
+        """Declare the retry queues, the dead-letter exchange and its queue"""
+
+        delays = dict.fromkeys(
+            retry_delay_ms(attempt, self.base_delay_ms, self.max_delay_ms) for attempt in range(1, self.max_attempts)
+        )
+
+        for delay_ms in delays:
+            await self._channel.declare_queue(
+                retry_queue_name(self.queue_name, delay_ms),
+                durable=True,
+                arguments={
+                    "x-message-ttl": delay_ms,
+                    "x-dead-letter-exchange": "",
+                    "x-dead-letter-routing-key": self.queue_name
+                }
+            )
+
+        self._dead_letter_exchange = await self._channel.declare_exchange(
+            dead_letter_exchange_name(self.exchange_name), aio_pika.ExchangeType.FANOUT, durable=True
+        )
+        dead_letter_queue = await self._channel.declare_queue(dead_letter_queue_name(self.queue_name), durable=True)
+        await dead_letter_queue.bind(self._dead_letter_exchange)
+
+    async def retry(self, message: aio_pika.abc.AbstractIncomingMessage, error: str):
+        """Schedule another attempt of a failed message, or quarantine it
+
+        Parameters
+        ----------
+        message : AbstractIncomingMessage
+            The message that failed, still unacknowledged
+        error : str
+            Why processing failed
+        """
+
+        attempt = get_attempts(message) + 1
+
+        if attempt >= self.max_attempts:
+            await self.quarantine(message, f"Gave up after {attempt} attempts: {error}")
+            return
+
+        await self._channel.default_exchange.publish(
+            self._copy(message, attempt, error),
+            routing_key=retry_queue_name(
+                self.queue_name, retry_delay_ms(attempt, self.base_delay_ms, self.max_delay_ms)
+            )
+        )
+
+        logger = logging.getLogger(__name__)
+        logger.warning(
+            f"[RabbitMQ:{self.exchange_name}] Retrying message in "
+            f"{retry_delay_ms(attempt, self.base_delay_ms, self.max_delay_ms)} ms "
+            f"(attempt {attempt + 1} of {self.max_attempts}): {error}"
+        )
+
+    async def quarantine(self, message: aio_pika.abc.AbstractIncomingMessage, error: str):
+        """Move a poison message to the dead-letter queue
+
+        Parameters
+        ----------
+        message : AbstractIncomingMessage
+            The message to quarantine, still unacknowledged
+        error : str
+            Why the message is being quarantined
+        """
+
+        await self._dead_letter_exchange.publish(
+            self._copy(message, get_attempts(message) + 1, error),
+            routing_key=self.queue_name
+        )
+
+        logger = logging.getLogger(__name__)
+        logger.error(f"[RabbitMQ:{self.exchange_name}] Quarantined message in '{dead_letter_queue_name(self.queue_name)}': {error}")
+
+    def _copy(self, message: aio_pika.abc.AbstractIncomingMessage, attempts: int, error: str) -> aio_pika.Message:
+        headers: Dict = dict(message.headers or {})
+        headers[ATTEMPTS_HEADER] = attempts
+        headers[ERROR_HEADER] = error[:1000]
+
+        # user_id is left out, RabbitMQ refuses it unless it names our own connection user
+        return aio_pika.Message(
+            body=message.body,
+            headers=headers,
+            content_type=message.content_type,
+            content_encoding=message.content_encoding,
+            delivery_mode=message.delivery_mode or aio_pika.DeliveryMode.PERSISTENT,
+            priority=message.priority,
+            correlation_id=message.correlation_id,
+            reply_to=message.reply_to,
+            expiration=message.expiration,
+            message_id=message.message_id,
+            timestamp=message.timestamp,
+            type=message.type,
+            app_id=message.app_id
+        )
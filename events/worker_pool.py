@@ -0,0 +1,46 @@
+import asyncio
+from typing import Any, Awaitable, Callable
+
+
+class WorkerPool:
+    """Bound how many message handlers of one exchange run at once.
+
+    aio_pika starts a task for every delivered message, so without a
+    bound the number of handlers in flight is only limited by the
+    channel prefetch. The pool lets at most `concurrency` of them run
+    and queues the rest in arrival order.
+    """
+
+    def __init__(self, name: str, concurrency: int):
+        self.name = name
+        self.concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._active = 0
+
+    @property
+    def active(self) -> int:
+        """Number of handlers currently running"""
+        return self._active
+
+    async def run(self, handler: Callable[..., Awaitable[Any]], *args) -> Any:
+        """Run a handler once a worker slot is free
+
+        Parameters
+        ----------
+        handler : Callable[..., Awaitable[Any]]
+            The coroutine function to run
+        *args
+            Arguments passed to the handler
+
+        Returns
+        -------
+        Any
+            Whatever the handler returned
+        """
+
+        async with self._semaphore:
+            self._active += 1
+            try:
+                return await handler(*args)
+            finally:
+                self._active -= 1
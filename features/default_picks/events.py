@@ -0,0 +1,10 @@
+from events.registry import ExchangeHandler, register_exchange
+from features.default_picks.services import process_default_pick_message, process_default_pick_messages
+
+default_pick_exchange = register_exchange(ExchangeHandler(
+    exchange="default_pick_exchange",
+    queue="default_pick_for_displays",
+    process_message=process_default_pick_message,
+    process_batch=process_default_pick_messages,
+    partition_key=("game_id", "week_id")
+))
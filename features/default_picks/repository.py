@@ -1,56 +1,69 @@
-import asyncpg
 import logging
-from core.database import get_db_config
+from core.database import acquire_connection
+from datetime import datetime
 from features.default_picks.schemas import CreatedDefaultPick
-
-async def add_created_default_pick(week: CreatedDefaultPick):
-    """Add a default pick to the created_default_picks table
+from typing import List
+
+UPSERT_DEFAULT_PICK_QUERY = """
+    INSERT INTO created_default_picks (
+        game_id, bet, favorite_team_id,
+        favorite_team_name, spread, week_id,
+        week_number, event_date
+    ) VALUES (
+        $1, $2, $3, $4, $5, $6, $7, $8
+    )
+    ON CONFLICT (week_id, game_id) DO UPDATE SET
+        bet = EXCLUDED.bet,
+        favorite_team_id = EXCLUDED.favorite_team_id,
+        favorite_team_name = EXCLUDED.favorite_team_name,
+        spread = EXCLUDED.spread,
+        week_number = EXCLUDED.week_number,
+        event_date = EXCLUDED.event_date
+    WHERE created_default_picks.event_date <= EXCLUDED.event_date
+    RETURNING created_default_pick_id;
+"""
+
+async def upsert_created_default_pick(default_pick: CreatedDefaultPick):
+    """Add or update a default pick in the created_default_picks table
+
+    The default pick is matched on (week_id, game_id) so an update
+    event replaces the existing row in a single statement. An event
+    older than the stored row, such as a retried one, is ignored.
 
     Returns
     -------
     new_id: int
-        Returns an integer value. If the value is 0
-        or less then the operation failed
+        Returns the id of the row, 0 if the event was older than the row
+
+    Raises
+    ------
+    Exception
+        If the row could not be written
     """
     
     logger = logging.getLogger(__name__)
 
     try:
-        config = get_db_config()
-    
-        conn = await asyncpg.connect(**config)
-
-        query = """
-            INSERT INTO created_default_picks (
-                game_id, bet, favorite_team_id,
-                favorite_team_name, spread, week_id,
-                week_number, event_date
-            ) VALUES (
-                $1, $2, $3, $4, $5, $6, $7, $8
+        async with acquire_connection() as conn:
+            row = await conn.fetchrow(
+                UPSERT_DEFAULT_PICK_QUERY,
+                default_pick.game_id,
+                default_pick.bet,
+                default_pick.favorite_team_id,
+                default_pick.favorite_team_name,
+                default_pick.spread,
+                default_pick.week_id,
+                default_pick.week_number,
+                default_pick.event_date
             )
-            RETURNING created_default_pick_id;
-        """
-
-        row = await conn.fetchrow(
-            query,
-            week.week_id,
-            week.week_number,
-            week.start_date,
-            week.end_date,
-            week.deadline_date,
-            week.season_id,
-            week.event_date
-        )
-
-        await conn.close()
 
         return row["created_default_pick_id"] if row else 0
 
     except Exception as e:
-        logger.exception(f"Error inserting default pick: {e}")
-        return 0
+        logger.exception(f"Error upserting default pick: {e}")
+        raise
 
-async def delete_default_pick(game_id: int, week_id: int):
+async def delete_default_pick(game_id: int, week_id: int, event_date: datetime):
     """Delete a default pick from the created_default_picks table
 
     Parameters
@@ -60,21 +73,21 @@ async def delete_default_pick(game_id: int, week_id: int):
     week_id : int
         The id of the week associated with the default pick to be deleted
 
+    event_date : datetime
+        When the delete happened, a row written by a newer event is kept
+
     Returns
     -------
     bool
-        True if the deletion was successful, False otherwise
+        True if the default pick was deleted, False if there was no such default pick
+        or it was written by a newer event
     """
     
-    config = get_db_config()
-    
-    conn = await asyncpg.connect(**config)
-
-    result = await conn.execute(
-        "DELETE FROM created_default_picks WHERE game_id = $1 AND week_id = $2;", game_id, week_id
-    )
-
-    await conn.close()
+    async with acquire_connection() as conn:
+        result = await conn.execute(
+            "DELETE FROM created_default_picks WHERE game_id = $1 AND week_id = $2 AND event_date <= $3;",
+            game_id, week_id, event_date
+        )
 
     return result.startswith("DELETE") and result.split()[1] != "0"
 
@@ -95,20 +108,61 @@ async def get_default_pick(week_id: int):
     logger = logging.getLogger(__name__)
 
     try:
-        config = get_db_config()
-
-        conn = await asyncpg.connect(**config)
-
-        # Read the week by week_id
-        result = await conn.execute(
-            "SELECT * FROM created_default_picks WHERE week_id = $1;", week_id,
-        )
-        
-        conn.close()
+        async with acquire_connection() as conn:
+            # Read the week by week_id
+            result = await conn.fetch(
+                "SELECT * FROM created_default_picks WHERE week_id = $1;", week_id,
+            )
 
         return result if result else None
 
     except Exception as e:
         logger.exception(f"An error occurred while reading default pick for week with id {week_id}: {e}")
         return False
- 
+
+async def apply_created_default_pick_batch(default_picks: List[CreatedDefaultPick], deleted_keys: List[tuple]) -> bool:
+    """Apply a batch of default pick changes in a single transaction
+
+    Parameters
+    ----------
+    default_picks : List[CreatedDefaultPick]
+        CreatedDefaultPick objects to add or update
+    deleted_keys : List[tuple]
+        (game_id, week_id, event_date) of the rows to delete, a row
+        written by a newer event is kept
+
+    Returns
+    -------
+    bool
+        True once the whole batch was written
+
+    Raises
+    ------
+    Exception
+        If the batch could not be written, nothing of it is kept
+    """
+
+    logger = logging.getLogger(__name__)
+
+    try:
+        async with acquire_connection() as conn:
+            async with conn.transaction():
+                if deleted_keys:
+                    await conn.executemany(
+                        "DELETE FROM created_default_picks WHERE game_id = $1 AND week_id = $2 AND event_date <= $3;",
+                        deleted_keys
+                    )
+
+                if default_picks:
+                    await conn.executemany(
+                        UPSERT_DEFAULT_PICK_QUERY,
+                        [(default_pick.game_id, default_pick.bet, default_pick.favorite_team_id,
+                          default_pick.favorite_team_name, default_pick.spread, default_pick.week_id,
+                          default_pick.week_number, default_pick.event_date) for default_pick in default_picks]
+                    )
+
+        return True
+
+    except Exception as e:
+        logger.exception(f"Error applying default pick batch: {e}")
+        raise
@@ -1,6 +1,14 @@
+import logging
+from core.batch_helpers import latest_by_key
+from core.date_helpers import format_date
 from core.enums import CreatedStatus
 from features.default_picks.mappings import map_to_created_default_pick
-from features.default_picks.repository import add_created_default_pick, delete_default_pick
+from features.default_picks.repository import (
+    apply_created_default_pick_batch,
+    delete_default_pick,
+    upsert_created_default_pick
+)
+from typing import List
 
 async def process_default_pick_message(data):
     """Process a default pick message and delete the default pick if necessary.
@@ -16,22 +24,59 @@ async def process_default_pick_message(data):
         Returns a CreatedWeek object if the week is created successfully, or None if the week is deleted.
     """
 
-    # Remove any entries like this one
-    await delete_default_pick(data["game_id"], data["week_id"])
+    logger = logging.getLogger(__name__)
 
     try:
         if data["status"] == CreatedStatus.DELETE:
-            # If the status is DELETE, return that processing is complete
+            # Remove the default pick, processing is then complete
+            await delete_default_pick(data["game_id"], data["week_id"], format_date(data["event_date"]))
             return True
         
         default_pick = map_to_created_default_pick(data)
 
-        # Add the new message to the created_default_picks table
-        result = await add_created_default_pick(default_pick)
+        # Add or replace the default pick in the created_default_picks table
+        result = await upsert_created_default_pick(default_pick)
 
-        return True if result > 0 else False
+        # Nothing was written when a newer event was already applied
+        if result <= 0:
+            logger.info(f"Ignored default pick event older than the stored default pick")
+
+        return True
 
     except Exception as e:
-        print(f"Error adding default pick: {e}")
+        logger.exception(f"Error adding default pick: {e}")
         return False
 
+async def process_default_pick_messages(batch: List[dict]) -> bool:
+    """Process a batch of default pick messages in a single transaction.
+
+    Only the last message for each (game_id, week_id) is applied.
+
+    Parameters
+    ----------
+    batch : List[dict]
+        Default pick messages in the order they were received
+
+    Returns
+    -------
+    bool
+        Returns True if the whole batch is processed successfully, False otherwise.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    try:
+        default_picks = []
+        deleted_keys = []
+
+        for data in latest_by_key(batch, ("game_id", "week_id")):
+            if data["status"] == CreatedStatus.DELETE:
+                deleted_keys.append((data["game_id"], data["week_id"], format_date(data["event_date"])))
+            else:
+                default_picks.append(map_to_created_default_pick(data))
+
+        return await apply_created_default_pick_batch(default_picks, deleted_keys)
+
+    except Exception as e:
+        logger.exception(f"Error processing default pick batch: {e}")
+        return False
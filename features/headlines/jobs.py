@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import random
+import uuid
+from collections import OrderedDict
+from config import (
+    HEADLINES_MAX_TRACKED_JOBS,
+    HEADLINES_REFRESH_CONCURRENCY,
+    HEADLINES_REFRESH_INTERVAL_SECONDS,
+    HEADLINES_REFRESH_JITTER_SECONDS
+)
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from fastapi import HTTPException
+from features.headlines.services import create_headlines_for_sport
+from features.leagues.repository import get_sport_ids
+from typing import Dict, Set
+
+
+@dataclass
+class RefreshJob:
+    job_id: str
+    sport_id: int
+    status: str = "queued"
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    error: str | None = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+
+# Recent jobs by id, oldest first, bounded by HEADLINES_MAX_TRACKED_JOBS
+_jobs: OrderedDict[str, RefreshJob] = OrderedDict()
+
+# The job of each sport that is queued or running
+_active: Dict[int, RefreshJob] = {}
+
+# Keep the tasks referenced so they are not garbage collected
+_tasks: Set[asyncio.Task] = set()
+
+_semaphore: asyncio.Semaphore | None = None
+
+
+def submit_refresh(sport_id: int) -> RefreshJob:
+    """Queue a headline refresh of a sport in the background
+
+    A sport is refreshed by at most one job at a time, so submitting
+    it again while a job is queued or running returns that job. At
+    most HEADLINES_REFRESH_CONCURRENCY jobs run at once.
+
+    Parameters
+    ----------
+    sport_id : int
+        The sport whose leagues are refreshed
+
+    Returns
+    -------
+    RefreshJob
+        The job that refreshes the sport
+    """
+
+    active = _active.get(sport_id)
+    if active is not None:
+        return active
+
+    job = RefreshJob(job_id=str(uuid.uuid4()), sport_id=sport_id)
+    _track(job)
+    _active[sport_id] = job
+
+    task = asyncio.create_task(_run(job))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+    return job
+
+
+def get_job(job_id: str) -> RefreshJob | None:
+    """Find a recent refresh job by its id"""
+    return _jobs.get(job_id)
+
+
+async def run_headline_scheduler():
+    """Refresh every sport on a fixed interval until cancelled
+
+    Each round submits a refresh for every sport with leagues, each
+    after a random delay of up to HEADLINES_REFRESH_JITTER_SECONDS so
+    the feeds are not all requested at the same moment.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    if HEADLINES_REFRESH_INTERVAL_SECONDS <= 0:
+        logger.info("Scheduled headline refresh is turned off")
+        return
+
+    while True:
+        try:
+            sport_ids = await get_sport_ids()
+            await asyncio.gather(*(_submit_after_jitter(sport_id) for sport_id in sport_ids))
+        except Exception as e:
+            logger.exception(f"Scheduled headline refresh failed: {e}")
+
+        await asyncio.sleep(HEADLINES_REFRESH_INTERVAL_SECONDS)
+
+
+async def cancel_refresh_jobs():
+    """Cancel the jobs still queued or running, used at shutdown"""
+
+    tasks = list(_tasks)
+    for task in tasks:
+        task.cancel()
+
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _submit_after_jitter(sport_id: int):
+    await asyncio.sleep(random.uniform(0, HEADLINES_REFRESH_JITTER_SECONDS))
+    submit_refresh(sport_id)
+
+
+async def _run(job: RefreshJob):
+    global _semaphore
+
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(HEADLINES_REFRESH_CONCURRENCY)
+
+    logger = logging.getLogger(__name__)
+
+    try:
+        async with _semaphore:
+            job.status = "running"
+            job.started_at = datetime.now(timezone.utc)
+
+            await create_headlines_for_sport(job.sport_id)
+
+        job.status = "succeeded"
+
+    except HTTPException as e:
+        job.status = "failed"
+        job.error = str(e.detail)
+
+    except Exception as e:
+        logger.exception(f"Headline refresh of sport {job.sport_id} failed: {e}")
+        job.status = "failed"
+        job.error = str(e)
+
+    finally:
+        if not job.done:
+            job.status = "failed"
+            job.error = "Cancelled"
+
+        job.finished_at = datetime.now(timezone.utc)
+        _active.pop(job.sport_id, None)
+
+        if job.error:
+            logger.warning(f"Headline refresh of sport {job.sport_id} failed: {job.error}")
+
+
+def _track(job: RefreshJob):
+    _jobs[job.job_id] = job
+
+    # Forget the oldest finished jobs once the limit is reached
+    while len(_jobs) > HEADLINES_MAX_TRACKED_JOBS:
+        oldest_id = next((job_id for job_id, old in _jobs.items() if old.done), None)
+        if oldest_id is None:
+            break
+        del _jobs[oldest_id]
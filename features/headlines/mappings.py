@@ -1,7 +1,19 @@
+import hashlib
+import json
+import logging
+from core.json_codec import dumps
+from core.pagination import encode_cursor
+from datetime import datetime
+from features.headlines import models
 from features.headlines.models import Headline
 from features.headlines.schemas import HeadlineDto
 from typing import List
 
+# Column sizes of the headlines table, see core/migrations/0001_initial_tables.sql
+HEADING_MAX_LENGTH = 200
+STORY_MAX_LENGTH = 500
+LINK_MAX_LENGTH = 500
+
 def map_headline_to_dtos(headlines: List[Headline]):
     """Map headlines to DTOs
     Function to map the headlines to the DTOs for sending back to the caller.
@@ -28,3 +40,212 @@ def map_headline_to_dtos(headlines: List[Headline]):
 
     return headline_dto_list
 
+
+
+def normalize_link(link: str) -> str:
+    """Normalize a headline link so the same story always maps to one key
+
+    Surrounding whitespace, the fragment and trailing slashes are
+    removed. Migration 0006 applies the same rules in SQL.
+    """
+
+    return link.strip().split("#", 1)[0].rstrip("/")
+
+
+def hash_link(link: str) -> str:
+    """sha256 of the normalized link, the identity of a headline in a league"""
+
+    return hashlib.sha256(normalize_link(link).encode("utf-8")).hexdigest()
+
+
+def map_items_to_headline_records(items: List[dict], league_id: int) -> List[tuple]:
+    """Map RSS items to rows of the headlines table
+    Function to map the items of a feed to records that can be written
+    to the headlines table. Items without a title, a description, a link
+    or a valid publication date are skipped, as are links too long for
+    the table, and only the first item of each link is kept. A title or
+    description too long for the table is truncated, so a single bad
+    item cannot fail the write of its whole league.
+
+    Parameters
+    ----------
+    items : List[dict]
+        The items parsed from the RSS feed
+    league_id : int
+        The league the feed belongs to
+
+    Returns
+    -------
+    List[tuple]
+        (heading, story, link, pub_date, league_id, link_hash) for each valid item
+    """
+
+    logger = logging.getLogger(__name__)
+
+    records: List[tuple] = []
+    seen = set()
+
+    for item in items:
+        link = item.get("link")
+        if not link:
+            logger.warning(f"Skipped headline {item.get('title')!r} without a link")
+            continue
+
+        if len(link) > LINK_MAX_LENGTH:
+            logger.warning(f"Skipped headline {item.get('title')!r} with a link over {LINK_MAX_LENGTH} characters")
+            continue
+
+        heading = item.get("title")
+        story = item.get("description")
+        if not heading or not story:
+            logger.warning(f"Skipped headline {link!r} without a title or description")
+            continue
+
+        if len(heading) > HEADING_MAX_LENGTH or len(story) > STORY_MAX_LENGTH:
+            logger.warning(f"Truncated the title or description of headline {link!r}")
+            heading = heading[:HEADING_MAX_LENGTH]
+            story = story[:STORY_MAX_LENGTH]
+
+        link_hash = hash_link(link)
+        if link_hash in seen:
+            continue
+
+        try:
+            pub_date = datetime.strptime(item.get("pubDate"), '%a, %d %b %Y %H:%M:%S %z')
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Skipped headline {item.get('link')!r} with an invalid date: {e}")
+            continue
+
+        seen.add(link_hash)
+        records.append((heading, story, link, pub_date, league_id, link_hash))
+
+    return records
+
+
+def map_headlines_to_json(headlines: List[models.HeadlineDto]) -> str:
+    """Serialize headlines read from the database for the shared cache
+
+    Parameters
+    ----------
+    headlines : List[HeadlineDto]
+        The headlines returned by get_all_headlines
+
+    Returns
+    -------
+    str
+        A JSON array with one object per headline
+    """
+
+    return json.dumps([map_headline_to_dict(headline) for headline in headlines])
+
+
+def map_headline_to_dict(headline: models.HeadlineDto) -> dict:
+    """Map a headline to the JSON object the API returns for it"""
+
+    return {
+        "heading": headline.heading,
+        "story": headline.story,
+        "link": headline.link,
+        "pub_date": headline.pub_date.isoformat(),
+        "league_id": headline.league_id
+    }
+
+
+def map_headlines_to_response(headlines: List[models.HeadlineDto], next_cursor: str | None = None) -> bytes:
+    """Render the complete GET /headlines/{league_id} response body
+
+    The body matches what FastAPI returns for
+    {"headlines": headlines, "next_cursor": next_cursor}, so it can be
+    cached and sent as is.
+
+    Parameters
+    ----------
+    headlines : List[HeadlineDto]
+        The headlines returned by get_all_headlines
+    next_cursor : str | None
+        The cursor of the next page, see map_headlines_to_next_cursor
+
+    Returns
+    -------
+    bytes
+        The JSON response body
+    """
+
+    return dumps({
+        "headlines": [map_headline_to_dict(headline) for headline in headlines],
+        "next_cursor": next_cursor
+    })
+
+
+def map_headlines_to_next_cursor(headlines: List[models.HeadlineDto], limit: int) -> str | None:
+    """Build the cursor of the page following a page of headlines
+
+    Parameters
+    ----------
+    headlines : List[HeadlineDto]
+        The headlines of the page, newest first
+    limit : int
+        The page size the headlines were read with
+
+    Returns
+    -------
+    str | None
+        The keyset position of the last headline, None when the page is
+        not full and therefore the last one
+    """
+
+    if not headlines or len(headlines) < limit:
+        return None
+
+    last = headlines[-1]
+
+    return encode_cursor({"pub_date": last.pub_date.isoformat(), "link_hash": hash_link(last.link)})
+
+
+def map_pages_to_response(pages: dict) -> bytes:
+    """Render the GET /headlines response body from league pages
+
+    The pages rendered by map_headlines_to_response are embedded as is,
+    so they are not decoded and encoded again.
+
+    Parameters
+    ----------
+    pages : dict
+        The response body of each league, None for leagues without headlines
+
+    Returns
+    -------
+    bytes
+        The JSON response body, {"leagues": {"<league_id>": page}}
+    """
+
+    empty = map_headlines_to_response([])
+    parts = [b'"%d":%s' % (league_id, page or empty) for league_id, page in pages.items()]
+
+    return b'{"leagues":{' + b",".join(parts) + b"}}"
+
+
+def map_json_to_headlines(data: bytes | str) -> List[models.HeadlineDto]:
+    """Rebuild headlines stored with map_headlines_to_json
+
+    Parameters
+    ----------
+    data : bytes | str
+        The JSON array read from the shared cache
+
+    Returns
+    -------
+    List[HeadlineDto]
+        The headlines in their original order
+    """
+
+    return [
+        models.HeadlineDto(
+            heading=item["heading"],
+            story=item["story"],
+            link=item["link"],
+            pub_date=datetime.fromisoformat(item["pub_date"]),
+            league_id=item["league_id"]
+        )
+        for item in json.loads(data)
+    ]
@@ -1,9 +1,12 @@
-import asyncpg
 import logging
-from core.database import get_db_config
-from datetime import datetime
+from core.database import acquire_connection
+from datetime import datetime, timedelta
 from fastapi import HTTPException
+from features.headlines.mappings import hash_link
 from features.headlines.models import HeadlineDto
+from typing import Dict, List
+
+HEADLINE_COLUMNS = ["heading", "story", "link", "pub_date", "league_id", "link_hash"]
 
 async def add_headline(headline, league_id: int):
     """Add new headline
@@ -19,34 +22,30 @@ async def add_headline(headline, league_id: int):
     
     logger = logging.getLogger(__name__)
 
-    config = get_db_config()
-
     try:
-        conn = await asyncpg.connect(**config)
-
         # Parse the publication date from the headline
         pub_date = datetime.strptime(headline.get("pubDate"), '%a, %d %b %Y %H:%M:%S %z')
 
         query = """
             INSERT INTO headlines (
-                heading, story, link, pub_date, league_id
+                heading, story, link, pub_date, league_id, link_hash
             )
             VALUES (
-                $1, $2, $3, $4, $5
+                $1, $2, $3, $4, $5, $6
             )
             RETURNING headline_id;
         """
 
-        row = await conn.fetchrow(
-            query,
-            headline.get("title"),
-            headline.get("description"),
-            headline.get("link"),
-            pub_date,
-            league_id
-        )
-
-        await conn.close()
+        async with acquire_connection() as conn:
+            row = await conn.fetchrow(
+                query,
+                headline.get("title"),
+                headline.get("description"),
+                headline.get("link"),
+                pub_date,
+                league_id,
+                hash_link(headline.get("link"))
+            )
 
         return row["headline_id"] if row else 0
 
@@ -70,21 +69,169 @@ async def delete_headlines_for_league(league_id: int):
         Returns True if the deletion was successful, False otherwise
     """
 
-    config = get_db_config()
+    async with acquire_connection() as conn:
+        result = await conn.execute(
+            "DELETE FROM headlines WHERE league_id = $1;", league_id
+        )
+
+    return result.startswith("DELETE") and result.split()[1] != "0"
+
+
+async def sync_headlines_for_league(league_id: int, records: List[tuple], delete_missing: bool = True) -> dict | None:
+    """Bring a league's headlines in line with its feed in a single transaction
+
+    Headlines are matched on (league_id, link_hash). New items are
+    inserted, items whose content changed are updated, unchanged items
+    are not written at all and items that dropped out of the feed are
+    deleted. Readers see either the old or the new set, never a mix.
+
+    Parameters
+    ----------
+    league_id: int
+        The ID of the league whose headlines are synchronized
+    records: List[tuple]
+        The headlines of the feed, see map_items_to_headline_records
+    delete_missing: bool
+        Delete the headlines that dropped out of the feed, otherwise they
+        are kept until delete_expired_headlines removes them
+
+    Returns
+    -------
+    dict | None
+        The number of headlines inserted, updated and deleted, None if
+        the synchronization failed
+    """
 
-    conn = await asyncpg.connect(**config)
+    logger = logging.getLogger(__name__)
 
-    result = await conn.execute(
-        "DELETE FROM headlines WHERE league_id = $1;", league_id
+    headings, stories, links, pub_dates, _, link_hashes = (
+        [list(column) for column in zip(*records)] if records else [[] for _ in HEADLINE_COLUMNS]
     )
 
-    await conn.close()
+    try:
+        async with acquire_connection() as conn:
+            async with conn.transaction():
+                rows = await conn.fetch(
+                    """
+                        INSERT INTO headlines (heading, story, link, pub_date, league_id, link_hash)
+                        SELECT heading, story, link, pub_date, $1, link_hash
+                        FROM unnest($2::varchar[], $3::varchar[], $4::varchar[], $5::timestamptz[], $6::char(64)[])
+                            AS incoming (heading, story, link, pub_date, link_hash)
+                        ON CONFLICT (league_id, link_hash) DO UPDATE SET
+                            heading = EXCLUDED.heading,
+                            story = EXCLUDED.story,
+                            link = EXCLUDED.link,
+                            pub_date = EXCLUDED.pub_date
+                        WHERE (headlines.heading, headlines.story, headlines.link, headlines.pub_date)
+                            IS DISTINCT FROM (EXCLUDED.heading, EXCLUDED.story, EXCLUDED.link, EXCLUDED.pub_date)
+                        RETURNING (xmax = 0) AS inserted;
+                    """,
+                    league_id, headings, stories, links, pub_dates, link_hashes
+                )
 
-    return result.startswith("DELETE") and result.split()[1] != "0"
+                result = "DELETE 0"
+                if delete_missing:
+                    result = await conn.execute(
+                        "DELETE FROM headlines WHERE league_id = $1 AND link_hash <> ALL($2::char(64)[]);",
+                        league_id, link_hashes
+                    )
+
+        inserted = sum(1 for row in rows if row["inserted"])
+
+        return {
+            "inserted": inserted,
+            "updated": len(rows) - inserted,
+            "deleted": int(result.split()[1]) if result.startswith("DELETE") else 0
+        }
+
+    except Exception as e:
+        logger.exception(f"Error synchronizing headlines for league {league_id}: {e}")
+        return None
+
+
+async def delete_expired_headlines(
+    league_id: int,
+    max_items: int,
+    max_age: timedelta | None,
+    batch_size: int,
+    keep_link_hashes: List[str] | None = None
+) -> int | None:
+    """Delete the headlines of a league that are past its retention
+
+    A league keeps its newest max_items headlines, and none published
+    more than max_age ago unless they are still in its feed. Rows are found through the
+    (league_id, pub_date, link_hash) index and deleted by primary key,
+    batch_size at a time, each batch in its own short transaction, so
+    only the deleted rows are ever locked.
 
+    Parameters
+    ----------
+    league_id: int
+        The ID of the league to apply the retention to
+    max_items: int
+        Number of newest headlines to keep, 0 keeps them all
+    max_age: timedelta | None
+        Age past which headlines are deleted, None keeps them all
+    batch_size: int
+        Maximum number of rows deleted by one statement
+    keep_link_hashes: List[str] | None
+        Link hashes of the headlines in the current feed, never deleted
+        for their age
+
+    Returns
+    -------
+    int | None
+        Number of headlines deleted, None if the deletion failed
+    """
+
+    logger = logging.getLogger(__name__)
+
+    statements = []
+
+    if max_items > 0:
+        statements.append(("""
+            DELETE FROM headlines WHERE headline_id IN (
+                SELECT headline_id FROM headlines
+                WHERE league_id = $1
+                ORDER BY pub_date DESC, link_hash DESC
+                OFFSET $2 LIMIT $3);
+        """, (max_items,)))
+
+    if max_age is not None:
+        statements.append(("""
+            DELETE FROM headlines WHERE headline_id IN (
+                SELECT headline_id FROM headlines
+                WHERE league_id = $1 AND pub_date < now() - $2::interval
+                  AND link_hash <> ALL($4::char(64)[])
+                ORDER BY pub_date LIMIT $3);
+        """, (max_age, keep_link_hashes or [])))
+
+    deleted = 0
+
+    try:
+        async with acquire_connection() as conn:
+            for sql, (limit, *args) in statements:
+                while True:
+                    result = await conn.execute(sql, league_id, limit, batch_size, *args)
+                    count = int(result.split()[1]) if result.startswith("DELETE") else 0
+                    deleted += count
 
-async def get_all_headlines(league_id: int, limit: int):
-    """Get all headlines for a league returning no more than the limit set
+                    if count < batch_size:
+                        break
+
+        return deleted
+
+    except Exception as e:
+        logger.exception(f"Error deleting expired headlines for league {league_id}: {e}")
+        return None
+
+
+async def get_all_headlines(league_id: int, limit: int, after: tuple | None = None):
+    """Get the newest headlines for a league returning no more than the limit set
+
+    Headlines are ordered by (pub_date, link_hash) descending and paged
+    by keyset, so later pages are read from the index where the previous
+    page ended instead of skipping rows with OFFSET.
 
     Parameters
     ----------
@@ -92,6 +239,8 @@ async def get_all_headlines(league_id: int, limit: int):
         Only retrieve headlines for this league
     limit : int
         Limit the number of lines extracted
+    after : tuple | None
+        (pub_date, link_hash) of the last headline of the previous page
 
     Returns
     -------
@@ -99,24 +248,198 @@ async def get_all_headlines(league_id: int, limit: int):
         Return a list of headlines for that league
     """
     
-    config = get_db_config()
-
     try:
-        conn = await asyncpg.connect(**config)
+        if after is None:
+            query = """
+                SELECT heading, story, link, pub_date, league_id
+                FROM headlines
+                WHERE league_id = $1
+                ORDER BY pub_date DESC, link_hash DESC LIMIT $2
+            """
+            params = (league_id, limit)
+        else:
+            query = """
+                SELECT heading, story, link, pub_date, league_id
+                FROM headlines
+                WHERE league_id = $1
+                  AND (pub_date, link_hash) < ($3::timestamptz, $4::char(64))
+                ORDER BY pub_date DESC, link_hash DESC LIMIT $2
+            """
+            params = (league_id, limit, *after)
+
+        async with acquire_connection() as conn:
+            rows = await conn.fetch(query, *params)
+
+        return [HeadlineDto(*item) for item in rows] if rows else []
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred while retrieving headlines: {e}.")
+
+
+async def get_headlines_for_leagues(league_ids: List[int], limit: int) -> Dict[int, List[HeadlineDto]]:
+    """Get the headlines of several leagues in one query
 
+    Each league is read with the same ordering and limit as the first
+    page of get_all_headlines, through a LATERAL join that walks the
+    (league_id, pub_date, link_hash) index once per league.
+
+    Parameters
+    ----------
+    league_ids : List[int]
+        The leagues to retrieve headlines for
+    limit : int
+        Limit the number of headlines extracted per league
+
+    Returns
+    -------
+    Dict[int, List[HeadlineDto]]
+        The headlines by league, an empty list for leagues without any
+    """
+
+    try:
         query = """
-            SELECT heading, story, link, pub_date, league_id
-            FROM headlines
-            WHERE league_id = $1
-            ORDER BY pub_date LIMIT $2
+            SELECT h.heading, h.story, h.link, h.pub_date, h.league_id
+            FROM unnest($1::int[]) AS l(league_id)
+            CROSS JOIN LATERAL (
+                SELECT heading, story, link, pub_date, league_id
+                FROM headlines
+                WHERE league_id = l.league_id
+                ORDER BY pub_date DESC, link_hash DESC LIMIT $2
+            ) h
         """
 
-        rows = await conn.fetch(query, league_id, limit)
+        async with acquire_connection() as conn:
+            rows = await conn.fetch(query, league_ids, limit)
 
-        await conn.close()
+        headlines: Dict[int, List[HeadlineDto]] = {league_id: [] for league_id in league_ids}
+        for row in rows:
+            headlines[row["league_id"]].append(HeadlineDto(*row))
 
-        return [HeadlineDto(*item) for item in rows] if rows else []
+        return headlines
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred while retrieving headlines: {e}.")
-    
+
+
+async def get_feed_cache(url: str) -> dict | None:
+    """Get the validators stored for a feed
+
+    Parameters
+    ----------
+    url : str
+        The URL of the feed
+
+    Returns
+    -------
+    dict | None
+        The etag, last_modified, body_hash and link_hashes of the last
+        stored fetch, None if the feed was never stored or the cache cannot be read
+    """
+
+    logger = logging.getLogger(__name__)
+
+    try:
+        async with acquire_connection() as conn:
+            row = await conn.fetchrow(
+                "SELECT etag, last_modified, body_hash, link_hashes FROM feed_cache WHERE url = $1;", url
+            )
+
+        return dict(row) if row else None
+
+    except Exception as e:
+        logger.warning(f"Could not read the feed cache for {url}: {e}")
+        return None
+
+
+async def save_feed_cache(
+    url: str,
+    etag: str | None,
+    last_modified: str | None,
+    body_hash: str,
+    link_hashes: List[str]
+):
+    """Store the validators of a feed after its headlines were stored
+
+    Parameters
+    ----------
+    url : str
+        The URL of the feed
+    etag : str | None
+        The ETag header of the response
+    last_modified : str | None
+        The Last-Modified header of the response
+    body_hash : str
+        The sha256 of the response body
+    link_hashes : List[str]
+        The link hashes of the headlines in the feed
+    """
+
+    logger = logging.getLogger(__name__)
+
+    try:
+        async with acquire_connection() as conn:
+            await conn.execute(
+                """
+                    INSERT INTO feed_cache (url, etag, last_modified, body_hash, link_hashes)
+                    VALUES ($1, $2, $3, $4, $5::char(64)[])
+                    ON CONFLICT (url) DO UPDATE SET
+                        etag = EXCLUDED.etag,
+                        last_modified = EXCLUDED.last_modified,
+                        body_hash = EXCLUDED.body_hash,
+                        link_hashes = EXCLUDED.link_hashes,
+                        fetched_at = now();
+                """,
+                url, etag, last_modified, body_hash, link_hashes
+            )
+
+    except Exception as e:
+        logger.warning(f"Could not save the feed cache for {url}: {e}")
+
+
+async def search_headlines(query: str, league_id: int | None, limit: int, after: tuple | None = None):
+    """Search headlines by full text, best matches first
+
+    Uses the search_vector column and its GIN index. Results are ordered
+    by (rank, headline_id) descending and paged by keyset, so a page is
+    read straight from where the previous one ended.
+
+    Parameters
+    ----------
+    query : str
+        Search terms in web search syntax, such as: trade -rumor "free agent"
+    league_id : int | None
+        Only search the headlines of this league
+    limit : int
+        Maximum number of headlines returned
+    after : tuple | None
+        (rank, headline_id) of the last headline of the previous page
+
+    Returns
+    -------
+    List[Record]
+        headline_id, heading, story, link, pub_date, league_id and rank
+        of each match
+    """
+
+    try:
+        sql = """
+            SELECT headline_id, heading, story, link, pub_date, league_id, rank
+            FROM (
+                SELECT h.headline_id, h.heading, h.story, h.link, h.pub_date, h.league_id,
+                       ts_rank(h.search_vector, q) AS rank
+                FROM headlines h, websearch_to_tsquery('english', $1) q
+                WHERE h.search_vector @@ q
+                  AND ($2::int IS NULL OR h.league_id = $2)
+            ) matches
+            WHERE $3::real IS NULL OR (rank, headline_id) < ($3::real, $4::int)
+            ORDER BY rank DESC, headline_id DESC
+            LIMIT $5;
+        """
+
+        after_rank, after_id = after if after else (None, None)
+
+        async with acquire_connection() as conn:
+            return await conn.fetch(sql, query, league_id, after_rank, after_id, limit)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred while searching headlines: {e}.")
@@ -1,15 +1,30 @@
-from fastapi import APIRouter, HTTPException
+from config import (
+    HEADLINES_MAX_LEAGUES,
+    HEADLINES_MAX_PAGE_SIZE,
+    HEADLINES_PAGE_SIZE,
+    HEADLINES_RAW_RESPONSES
+)
+from fastapi import APIRouter, HTTPException, Query, Response
+from features.headlines.jobs import get_job, submit_refresh
+from features.headlines.mappings import map_headlines_to_next_cursor
 from features.headlines.services import (
-    create_headlines_for_sport, 
-    get_headlines_by_league
+    get_headlines_by_league,
+    get_headlines_by_leagues,
+    get_headlines_page,
+    get_headlines_pages,
+    search_headlines_page
 )
 
 router = APIRouter(prefix="/headlines", tags=["Headlines"])
 
-@router.post("/{sport_id:int}")
+@router.post("/{sport_id:int}", status_code=202)
 async def create_headlines(sport_id: int):
     """Create headlines for a sport
 
+    The refresh runs in the background, poll GET /headlines/jobs/{job_id}
+    for its outcome. If the sport is already being refreshed the job of
+    that refresh is returned.
+
     Parameters
     ----------
     sport_id : int
@@ -18,42 +33,183 @@ async def create_headlines(sport_id: int):
 
     Returns
     -------
-    OK: Status code 200
-        A successful message will be sent
+    Accepted: Status code 202
+        The job id and status of the refresh
+    """
+    
+    job = submit_refresh(sport_id)
+    
+    return {"job_id": job.job_id, "status": job.status}
+
+
+@router.get("/jobs/{job_id}")
+async def get_refresh_job(job_id: str):
+    """Get the status of a headline refresh
+
+    Parameters
+    ----------
+    job_id : str
+        The id returned by POST /headlines/{sport_id}
+
+    Returns
+    -------
+    RefreshJob
+        The sport, status, timestamps and error of the refresh
 
     Raises
     ------
-    HTTPException: Status code 405 (Conflict)
-        The message will state that the write did not work correctly
+    HTTPException: Status code 404 (Not Found)
+        The job is unknown or was forgotten
     """
-    
-    await create_headlines_for_sport(sport_id)
-    
-    return {"headlines": "successful"} 
+
+    job = get_job(job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Refresh job not found.")
+
+    return job
+
+
+@router.get("")
+async def list_headlines_for_leagues(
+    league_ids: str = Query(min_length=1),
+    limit: int = Query(HEADLINES_PAGE_SIZE, ge=1, le=HEADLINES_MAX_PAGE_SIZE)
+):
+    """List the headlines of several leagues
+
+    Serves pages such as the front page that show many leagues at once
+    with one request and one database query instead of one per league.
+
+    Parameters
+    ----------
+    league_ids : str
+        Comma separated league ids, such as 1,2,3
+    limit : int
+        Number of headlines per league
+
+    Returns
+    -------
+    dict
+        The headlines of each league keyed by league id, leagues without
+        headlines have an empty list
+
+    Raises
+    ------
+    HTTPException: Status code 400 (Bad Request)
+        The league ids are not integers or there are too many of them
+    """
+
+    try:
+        ids = list(dict.fromkeys(int(league_id) for league_id in league_ids.split(",")))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="league_ids must be comma separated integers.")
+
+    if len(ids) > HEADLINES_MAX_LEAGUES:
+        raise HTTPException(status_code=400, detail=f"No more than {HEADLINES_MAX_LEAGUES} leagues can be requested at once.")
+
+    if HEADLINES_RAW_RESPONSES:
+        return Response(content=await get_headlines_pages(ids, limit), media_type="application/json")
+
+    headlines = await get_headlines_by_leagues(ids, limit)
+
+    return {
+        "leagues": {
+            league_id: {"headlines": rows, "next_cursor": map_headlines_to_next_cursor(rows, limit)}
+            for league_id, rows in headlines.items()
+        }
+    }
+
+
+@router.get("/search")
+async def search_headlines(
+    q: str = Query(min_length=1, max_length=200),
+    league_id: int | None = None,
+    limit: int = Query(HEADLINES_PAGE_SIZE, ge=1, le=HEADLINES_MAX_PAGE_SIZE),
+    cursor: str | None = None
+):
+    """Search headlines by full text
+
+    Matches on heading and story, best matches first.
+
+    Parameters
+    ----------
+    q : str
+        Search terms, quoted phrases and -excluded words are supported
+    league_id : int | None
+        Only search the headlines of this league
+    limit : int
+        Number of headlines per page
+    cursor : str | None
+        next_cursor of the previous page, omit it for the first page
+
+    Returns
+    -------
+    dict
+        The matching headlines and the next_cursor, None on the last page
+
+    Raises
+    ------
+    HTTPException: Status code 400 (Bad Request)
+        The cursor is malformed
+    """
+
+    return await search_headlines_page(q, league_id, limit, cursor)
 
 
 @router.get("/{league_id:int}")
-async def list_headlines(league_id: int):
+async def list_headlines(
+    league_id: int,
+    limit: int = Query(HEADLINES_PAGE_SIZE, ge=1, le=HEADLINES_MAX_PAGE_SIZE),
+    cursor: str | None = None
+):
     """List all headlines for a league
-    Function to list all headlines for a league. The league id is passed
-    in the URL and the function will extract all headlines for that league
+    Function to list the newest headlines for a league. The league id is passed
+    in the URL and the function will extract the headlines for that league,
+    one page at a time.
 
     Parameters
     ----------
     league_id : int
         Id for the league to be used to extract all headlines
         for that league. The league id is passed in the URL.
+    limit : int
+        Number of headlines per page
+    cursor : str | None
+        next_cursor of the previous page, omit it for the first page
 
         Returns
     -------
     List[Headline]
         List of the headlines for that league. The list is a list of
-        tuples starting with a string and followed by the Headline class.
+        tuples starting with a string and followed by the Headline class,
+        and the next_cursor, None on the last page.
+        With HEADLINES_RAW_RESPONSES the same JSON is sent as bytes
+        rendered once per refresh.
+
+    Raises
+    ------
+    HTTPException: Status code 400 (Bad Request)
+        The cursor is malformed
+    HTTPException: Status code 404 (Not Found)
+        The league has no headlines
     """
 
-    headlines_dto = await get_headlines_by_league(league_id, 10)
+    if cursor:
+        headlines_dto = await get_headlines_by_league(league_id, limit, cursor)
+
+        return {"headlines": headlines_dto, "next_cursor": map_headlines_to_next_cursor(headlines_dto, limit)}
+
+    if HEADLINES_RAW_RESPONSES:
+        page = await get_headlines_page(league_id, limit)
+
+        if page is None:
+            raise HTTPException(status_code=404, detail="No headlines found for this league.")
+
+        return Response(content=page, media_type="application/json")
+
+    headlines_dto = await get_headlines_by_league(league_id, limit)
 
     if not headlines_dto:
         raise HTTPException(status_code=404, detail="No headlines found for this league.")
     
-    return {"headlines": headlines_dto}
+    return {"headlines": headlines_dto, "next_cursor": map_headlines_to_next_cursor(headlines_dto, limit)}
@@ -1,17 +1,68 @@
-from api.external_routing import fetch_external_data
+import asyncio
+import logging
+from api.external_routing import FeedResponse, fetch_feed
+from config import (
+    HEADLINES_CACHE_TTL_SECONDS,
+    HEADLINES_FETCH_CONCURRENCY,
+    HEADLINES_KEEP_HISTORY,
+    HEADLINES_PAGE_SIZE,
+    HEADLINES_RETENTION_BATCH_SIZE,
+    HEADLINES_RETENTION_MAX_AGE_DAYS,
+    HEADLINES_RETENTION_MAX_ITEMS
+)
+from core.cache import ReadThroughCache
+from core.pagination import decode_cursor, encode_cursor
+from datetime import datetime, timedelta
 from fastapi import HTTPException
 from features.headlines.repository import (
-    add_headline, 
+    delete_expired_headlines,
     get_all_headlines, 
-    delete_headlines_for_league
+    get_feed_cache,
+    get_headlines_for_leagues,
+    search_headlines,
+    sync_headlines_for_league,
+    save_feed_cache
+)
+from features.headlines.models import HeadlineDto
+from features.headlines.mappings import (
+    map_headlines_to_json,
+    map_headlines_to_next_cursor,
+    map_headlines_to_response,
+    map_items_to_headline_records,
+    map_json_to_headlines,
+    map_pages_to_response
 )
 from features.leagues.repository import get_leagues
+from typing import Dict, List
+
+# Headlines only change when a league is refreshed, so reads are served
+# from this cache and each league is invalidated after its refresh
+headline_cache = ReadThroughCache(
+    "headlines",
+    HEADLINES_CACHE_TTL_SECONDS,
+    encode=map_headlines_to_json,
+    decode=map_json_to_headlines
+)
+
+# Complete response bodies of GET /headlines/{league_id}, rendered once per
+# refresh. Leagues without headlines are cached as None
+headline_page_cache = ReadThroughCache(
+    "headline_pages",
+    HEADLINES_CACHE_TTL_SECONDS,
+    encode=lambda page: page or b"",
+    decode=lambda data: data or None
+)
 
 async def create_headlines_for_sport(sport_id: int):
     """Request to get and create new headlines
 
     This function accesses a sports headlines feed, parses the data
     and stores the result in a database, removing the old content.
+    The feeds of all leagues are fetched concurrently, at most
+    HEADLINES_FETCH_CONCURRENCY at a time, and each league is stored
+    as soon as its own feed arrives. If a league fails the others are
+    still refreshed and the first error is raised afterwards. Leagues
+    whose feed did not change since the last refresh are left as is.
 
     Parameters
     ----------
@@ -30,56 +81,337 @@ async def create_headlines_for_sport(sport_id: int):
     if not leagues:
         raise HTTPException(status_code=404, detail=f"No leagues found for sport {sport_id}.")
 
-    for league in leagues:
-        headlines_list = await import_headlines(league["url"])
+    semaphore = asyncio.Semaphore(HEADLINES_FETCH_CONCURRENCY)
+
+    results = await asyncio.gather(
+        *(refresh_league_headlines(league, semaphore) for league in leagues),
+        return_exceptions=True
+    )
+
+    errors = [result for result in results if isinstance(result, Exception)]
+
+    if errors:
+        logger = logging.getLogger(__name__)
+        for league, result in zip(leagues, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to refresh headlines for league {league['league_id']}: {result}")
+
+        raise errors[0]
+
+
+async def refresh_league_headlines(league: dict, semaphore: asyncio.Semaphore):
+    """Fetch the feed of one league and replace its stored headlines
+
+    Parameters
+    ----------
+    league : dict
+        The league with its league_id and feed url
+    semaphore : asyncio.Semaphore
+        Bounds how many feeds are fetched at the same time
+    """
+
+    cached = await get_feed_cache(league["url"])
+
+    async with semaphore:
+        feed = await import_headlines(league["url"], cached)
+
+    logger = logging.getLogger(__name__)
+
+    # Nothing changed, keep the stored headlines but still let old ones expire
+    if feed.not_modified:
+        expired = await expire_league_headlines(league["league_id"], cached.get("link_hashes") or [])
+        logger.info(f"Headlines for league {league['league_id']} are unchanged, {expired} expired")
+
+        if expired:
+            await invalidate_league_headlines(league["league_id"])
+
+        # Servers that rotate their validators would otherwise get stale
+        # ones back and answer every refresh with the full body
+        if (feed.etag, feed.last_modified) != (cached.get("etag"), cached.get("last_modified")):
+            await save_feed_cache(
+                league["url"], feed.etag, feed.last_modified, feed.body_hash, cached.get("link_hashes") or []
+            )
+        return
+
+    headlines_list = feed.items
+
+    if not headlines_list:
+        raise HTTPException(status_code=404, detail=f"No headlines found for league {league['league_id']}.")
+
+    # Write only the headlines that changed, in one transaction
+    records = map_items_to_headline_records(headlines_list, league["league_id"])
+    changes = await sync_headlines_for_league(league["league_id"], records, not HEADLINES_KEEP_HISTORY)
+
+    if changes is None:
+        raise HTTPException(status_code=500, detail="Failed to add headline to database.")
+
+    link_hashes = [record[-1] for record in records]
+    changes["expired"] = await expire_league_headlines(league["league_id"], link_hashes)
+
+    logger.info(f"Synchronized headlines for league {league['league_id']}: {changes}")
+
+    if any(changes.values()):
+        await invalidate_league_headlines(league["league_id"])
 
-        if not headlines_list:
-            raise HTTPException(status_code=404, detail=f"No headlines found for league {league['league_id']}.")
-        
-        # Clear existing headlines for the league
-        await delete_headlines_for_league(league["league_id"])
+    # Remember the feed only once its headlines are stored
+    await save_feed_cache(league["url"], feed.etag, feed.last_modified, feed.body_hash, link_hashes)
 
-        for headline_list in headlines_list:
-            row = await add_headline(headline_list, league["league_id"])
-            if row is None:
-                raise HTTPException(status_code=500, detail="Failed to add headline to database.")
 
+async def expire_league_headlines(league_id: int, link_hashes: List[str]) -> int:
+    """Delete the headlines of a league that are past its retention
 
-async def get_headlines_by_league(league_id: int, limit: int = 10):
+    Headlines still in the feed are never deleted for their age. A
+    failure is logged by the repository and retried on the next refresh.
+
+    Parameters
+    ----------
+    league_id : int
+        The league to apply the retention to
+    link_hashes : List[str]
+        The link hashes of the headlines in the league's current feed
+
+    Returns
+    -------
+    int
+        Number of headlines deleted, 0 if the deletion failed
+    """
+
+    max_age = timedelta(days=HEADLINES_RETENTION_MAX_AGE_DAYS) if HEADLINES_RETENTION_MAX_AGE_DAYS > 0 else None
+    expired = await delete_expired_headlines(
+        league_id, HEADLINES_RETENTION_MAX_ITEMS, max_age, HEADLINES_RETENTION_BATCH_SIZE, link_hashes
+    )
+
+    return expired or 0
+
+
+async def invalidate_league_headlines(league_id: int):
+    """Drop the cached headlines of a league and render its page again
+
+    Parameters
+    ----------
+    league_id : int
+        The league whose stored headlines changed
+    """
+
+    await headline_cache.invalidate(league_id)
+    await headline_page_cache.invalidate(league_id)
+
+    # Render the page now so the next read is served from memory
+    try:
+        await get_headlines_page(league_id)
+    except Exception as e:
+        logger = logging.getLogger(__name__)
+        logger.warning(f"Could not render the headlines page of league {league_id}: {e}")
+
+
+async def get_headlines_by_league(league_id: int, limit: int = 10, cursor: str | None = None):
     """Get all headlines
 
-    Function to extract all headlines in the database for a league and send back
-    to caller.
+    Function to extract the newest headlines in the database for a league
+    and send back to caller. The first page is served from headline_cache
+    until the league is refreshed, later pages are read from the database.
+
+    Parameters
+    ----------
+    league_id : int
+        The league to read the headlines of
+    limit : int
+        The number of headlines in the page
+    cursor : str | None
+        The next_cursor of the previous page, None for the first page
 
     Returns
     -------
     Headlines: List[tuple, Headlines]
         Tuple starting with string and followed by the Headline class.
+
+    Raises
+    ------
+    HTTPException: Status code 400 (Bad Request)
+        The cursor is malformed
     """
 
-    headlines = await get_all_headlines(league_id, limit)
+    if cursor:
+        try:
+            position = decode_cursor(cursor, "pub_date", "link_hash")
+            after = (datetime.fromisoformat(position["pub_date"]), str(position["link_hash"]))
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return await get_all_headlines(league_id, limit, after)
+
+    headlines = await headline_cache.get_or_load(
+        league_id, limit, lambda: get_all_headlines(league_id, limit)
+    )
 
     return headlines
 
 
-async def import_headlines(url: str):
+async def get_headlines_page(league_id: int, limit: int = HEADLINES_PAGE_SIZE) -> bytes | None:
+    """Get the rendered JSON response of a league's headlines
+
+    The body is rendered on the first read after a refresh and then
+    served from headline_page_cache as is.
+
+    Parameters
+    ----------
+    league_id : int
+        The league to read the headlines of
+    limit : int
+        The number of headlines in the page
+
+    Returns
+    -------
+    bytes | None
+        The response body, None if the league has no headlines
+    """
+
+    return await headline_page_cache.get_or_load(
+        league_id, limit, lambda: render_headlines_page(league_id, limit)
+    )
+
+
+async def get_headlines_by_leagues(league_ids: List[int], limit: int = HEADLINES_PAGE_SIZE) -> Dict[int, List[HeadlineDto]]:
+    """Get the headlines of several leagues
+
+    Leagues are served from headline_cache, the same entries
+    get_headlines_by_league uses, and the leagues missing from it are
+    read together in one query.
+
+    Parameters
+    ----------
+    league_ids : List[int]
+        The leagues to read the headlines of
+    limit : int
+        The number of headlines per league
+
+    Returns
+    -------
+    Dict[int, List[HeadlineDto]]
+        The headlines by league
+    """
+
+    return await headline_cache.get_many_or_load(
+        league_ids, limit, lambda missing: get_headlines_for_leagues(missing, limit)
+    )
+
+
+async def get_headlines_pages(league_ids: List[int], limit: int = HEADLINES_PAGE_SIZE) -> bytes:
+    """Get the rendered JSON response of several leagues' headlines
+
+    Each league's page is taken from headline_page_cache, shared with
+    get_headlines_page, and the leagues missing from it are read
+    together in one query.
+
+    Parameters
+    ----------
+    league_ids : List[int]
+        The leagues to read the headlines of
+    limit : int
+        The number of headlines per league
+
+    Returns
+    -------
+    bytes
+        The response body
+    """
+
+    async def render_pages(missing: List[int]) -> Dict[int, bytes | None]:
+        headlines = await get_headlines_for_leagues(missing, limit)
+
+        return {
+            league_id: map_headlines_to_response(rows, map_headlines_to_next_cursor(rows, limit)) if rows else None
+            for league_id, rows in headlines.items()
+        }
+
+    pages = await headline_page_cache.get_many_or_load(league_ids, limit, render_pages)
+
+    return map_pages_to_response(pages)
+
+
+async def render_headlines_page(league_id: int, limit: int) -> bytes | None:
+    """Read a league's headlines and render them as a response body"""
+
+    headlines = await get_all_headlines(league_id, limit)
+
+    if not headlines:
+        return None
+
+    return map_headlines_to_response(headlines, map_headlines_to_next_cursor(headlines, limit))
+
+
+async def search_headlines_page(query: str, league_id: int | None, limit: int, cursor: str | None = None) -> dict:
+    """Search headlines and return one page of ranked results
+
+    Parameters
+    ----------
+    query : str
+        The search terms
+    league_id : int | None
+        Only search the headlines of this league
+    limit : int
+        The number of headlines in the page
+    cursor : str | None
+        The next_cursor of the previous page
+
+    Returns
+    -------
+    dict
+        The headlines of the page and the next_cursor, None on the last page
+
+    Raises
+    ------
+    HTTPException: Status code 400 (Bad Request)
+        The cursor is malformed
+    """
+
+    after = None
+
+    if cursor:
+        try:
+            position = decode_cursor(cursor, "rank", "id")
+            after = (float(position["rank"]), int(position["id"]))
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    # Read one extra row to know whether another page follows
+    rows = await search_headlines(query, league_id, limit + 1, after)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor({"rank": last["rank"], "id": last["headline_id"]})
+
+    headlines = [
+        HeadlineDto(row["heading"], row["story"], row["link"], row["pub_date"], row["league_id"])
+        for row in rows
+    ]
+
+    return {"headlines": headlines, "next_cursor": next_cursor}
+
+
+async def import_headlines(url: str, cached: dict | None = None) -> FeedResponse:
     """Import the sport headlines from a RSS feed
 
     Parameters
     ----------
     url: str
         The URL of the RSS feed to import headlines from
+    cached: dict | None
+        The validators stored for the feed by the previous refresh
 
     Returns
     -------
-    headlines: List[tuple, Headlines]
-    Tuple starting with string and followed by the Headline class.
+    FeedResponse
+        The headlines of the feed, or not_modified when the feed did
+        not change since the previous refresh.
 
     """
 
     # call url and get headline data
-    headlines_list = await fetch_external_data(url)
+    feed = await fetch_feed(url, cached)
 
-    # return list of headlines to be written
-    return headlines_list
+    # return the headlines to be written
+    return feed
 
@@ -0,0 +1,10 @@
+from events.registry import ExchangeHandler, register_exchange
+from features.leagues.services import process_league_message, process_league_messages
+
+league_exchange = register_exchange(ExchangeHandler(
+    exchange="league_exchange",
+    queue="league_for_displays",
+    process_message=process_league_message,
+    process_batch=process_league_messages,
+    partition_key=("sport_id", "name")
+))
@@ -1,50 +1,61 @@
-import asyncpg
 import logging
-from core.database import get_db_config
+from core.database import acquire_connection
+from datetime import datetime
 from features.leagues.schemas import CreatedLeague
+from typing import List
 
-async def add_created_league(league: CreatedLeague):
-    """Add a league to the created_leagues table
+UPSERT_LEAGUE_QUERY = """
+    INSERT INTO created_leagues (
+        league_id, name, url, sport_id, event_date
+    ) VALUES (
+        $1, $2, $3, $4, $5
+    )
+    ON CONFLICT (sport_id, name) DO UPDATE SET
+        league_id = EXCLUDED.league_id,
+        url = EXCLUDED.url,
+        event_date = EXCLUDED.event_date
+    WHERE created_leagues.event_date <= EXCLUDED.event_date
+    RETURNING created_league_id;
+"""
+
+async def upsert_created_league(league: CreatedLeague):
+    """Add or update a league in the created_leagues table
+
+    The league is matched on (sport_id, name) so an update
+    event replaces the existing row in a single statement. An event
+    older than the stored row, such as a retried one, is ignored.
 
     Returns
     -------
     row: int
-        Returns an integer value. If the value is 0
-        or less then the operation failed
+        Returns the id of the row, 0 if the event was older than the row
+
+    Raises
+    ------
+    Exception
+        If the row could not be written
     """
     
     logger = logging.getLogger(__name__)
 
     try:
-        config = get_db_config()
-    
-        conn = await asyncpg.connect(**config)
-
-        query = """
-        INSERT INTO created_leagues (league_id, name, url, sport_id, event_date
-        ) VALUES (
-            $1, $2, $3, $4, $5
-        ) RETURNING created_league_id;
-    """
-
-        row = await conn.fetchrow(
-        query,
-        league.league_id,
-        league.name,
-        league.url,
-        league.sport_id,
-        league.event_date
-    )
-
-        await conn.close()
+        async with acquire_connection() as conn:
+            row = await conn.fetchrow(
+                UPSERT_LEAGUE_QUERY,
+                league.league_id,
+                league.name,
+                league.url,
+                league.sport_id,
+                league.event_date
+            )
 
         return row["created_league_id"] if row else 0
 
     except Exception as e:
         logger.exception(f"An error occurred while adding new league {league.name}: {e}")
-        return False
+        raise
 
-async def delete_league(sport_id: int, name: str):
+async def delete_league(sport_id: int, name: str, event_date: datetime):
     """Delete a league from the created_leagues table
 
     Parameters
@@ -54,21 +65,21 @@ async def delete_league(sport_id: int, name: str):
     name : str
         THe name of the league
 
+    event_date : datetime
+        When the delete happened, a row written by a newer event is kept
+
     Returns
     -------
     bool
-        Returns True if the deletion was successful, False otherwise
+        True if the league was deleted, False if there was no such league
+        or it was written by a newer event
     """
     
-    config = get_db_config()
-    
-    conn = await asyncpg.connect(**config)
-
-    result = await conn.execute(
-        "DELETE FROM created_leagues WHERE sport_id = $1 AND name = $2;", sport_id, name
-    )
-
-    await conn.close()
+    async with acquire_connection() as conn:
+        result = await conn.execute(
+            "DELETE FROM created_leagues WHERE sport_id = $1 AND name = $2 AND event_date <= $3;",
+            sport_id, name, event_date
+        )
 
     return result.startswith("DELETE") and result.split()[1] != "0"
 
@@ -89,16 +100,11 @@ async def get_leagues(sport_id: int):
     logger = logging.getLogger(__name__)
     
     try:
-        config = get_db_config()
-
-        conn = await asyncpg.connect(**config)
-
-        # Read the league ids by sport_id
-        result = await conn.fetch(
-            "SELECT league_id, url FROM created_leagues WHERE sport_id = $1;", sport_id,
-        )
-        
-        await conn.close()
+        async with acquire_connection() as conn:
+            # Read the league ids by sport_id
+            result = await conn.fetch(
+                "SELECT league_id, url FROM created_leagues WHERE sport_id = $1;", sport_id,
+            )
 
         return result if result else None
 
@@ -106,6 +112,29 @@ async def get_leagues(sport_id: int):
         logger.exception(f"An error occurred while reading leagues in sport {sport_id}: {e}")
         return False
 
+async def get_sport_ids() -> List[int]:
+    """Get the id of every sport that has leagues
+
+    Returns
+    -------
+    List[int]
+        The sport ids in ascending order, empty if they cannot be read
+    """
+
+    logger = logging.getLogger(__name__)
+
+    try:
+        async with acquire_connection() as conn:
+            result = await conn.fetch(
+                "SELECT DISTINCT sport_id FROM created_leagues ORDER BY sport_id;"
+            )
+
+        return [row["sport_id"] for row in result]
+
+    except Exception as e:
+        logger.exception(f"An error occurred while reading the sports with leagues: {e}")
+        return []
+
 async def get_league_by_id(league_id: int):
     """Read a league by its id
 
@@ -121,18 +150,13 @@ async def get_league_by_id(league_id: int):
     """
 
     try:
-        config = get_db_config()
-
-        conn = await asyncpg.connect(**config)
-
         query = """
             SELECT league_id, url FROM created_leagues WHERE league_id = $1;
         """
 
-        # Obtain the league information
-        result = await conn.fetchone(query, league_id)
-
-        await conn.close()
+        async with acquire_connection() as conn:
+            # Obtain the league information
+            result = await conn.fetchrow(query, league_id)
 
         return result if result else None
 
@@ -140,3 +164,48 @@ async def get_league_by_id(league_id: int):
         print(f"An error occurred while reading league {league_id}: {e}")
         return None
 
+async def apply_created_league_batch(leagues: List[CreatedLeague], deleted_keys: List[tuple]) -> bool:
+    """Apply a batch of league changes in a single transaction
+
+    Parameters
+    ----------
+    leagues : List[CreatedLeague]
+        CreatedLeague objects to add or update
+    deleted_keys : List[tuple]
+        (sport_id, name, event_date) of the rows to delete, a row
+        written by a newer event is kept
+
+    Returns
+    -------
+    bool
+        True once the whole batch was written
+
+    Raises
+    ------
+    Exception
+        If the batch could not be written, nothing of it is kept
+    """
+
+    logger = logging.getLogger(__name__)
+
+    try:
+        async with acquire_connection() as conn:
+            async with conn.transaction():
+                if deleted_keys:
+                    await conn.executemany(
+                        "DELETE FROM created_leagues WHERE sport_id = $1 AND name = $2 AND event_date <= $3;",
+                        deleted_keys
+                    )
+
+                if leagues:
+                    await conn.executemany(
+                        UPSERT_LEAGUE_QUERY,
+                        [(league.league_id, league.name, league.url,
+                          league.sport_id, league.event_date) for league in leagues]
+                    )
+
+        return True
+
+    except Exception as e:
+        logger.exception(f"Error applying league batch: {e}")
+        raise
@@ -1,9 +1,14 @@
+import logging
+from core.batch_helpers import latest_by_key
+from core.date_helpers import format_date
 from core.enums import CreatedStatus
 from features.leagues.mappings import map_to_created_league
 from features.leagues.repository import (
+    apply_created_league_batch,
     delete_league,
-    add_created_league
+    upsert_created_league
 )
+from typing import List
 
 async def process_league_message(data):
     """Process a league message and delete the league if necessary.
@@ -19,23 +24,59 @@ async def process_league_message(data):
         Returns a CreatedLeague object if the league is created successfully, or None if the league is deleted.
     """
 
-    # Remove any entries like this one
-    await delete_league(data["sport_id"], data["name"])
-    
+    logger = logging.getLogger(__name__)
+
     try:
         if data["status"] == CreatedStatus.DELETE:
-            # If the status is DELETE, return that processing is complete
+            # Remove the league, processing is then complete
+            await delete_league(data["sport_id"], data["name"], format_date(data["event_date"]))
             return True
-        
+
         league = map_to_created_league(data)
 
-        # Add the new message to the created_leagues table
-        result = await add_created_league(league)
+        # Add or replace the league in the created_leagues table
+        result = await upsert_created_league(league)
 
-        return True if result > 0 else False
+        # Nothing was written when a newer event was already applied
+        if result <= 0:
+            logger.info(f"Ignored league event older than the stored league")
 
-    except Exception as e:
-        print(f"Error adding league: {e}")
         return True
-            
-    
+
+    except Exception as e:
+        logger.exception(f"Error adding league: {e}")
+        return False
+
+async def process_league_messages(batch: List[dict]) -> bool:
+    """Process a batch of league messages in a single transaction.
+
+    Only the last message for each (sport_id, name) is applied.
+
+    Parameters
+    ----------
+    batch : List[dict]
+        League messages in the order they were received
+
+    Returns
+    -------
+    bool
+        Returns True if the whole batch is processed successfully, False otherwise.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    try:
+        leagues = []
+        deleted_keys = []
+
+        for data in latest_by_key(batch, ("sport_id", "name")):
+            if data["status"] == CreatedStatus.DELETE:
+                deleted_keys.append((data["sport_id"], data["name"], format_date(data["event_date"])))
+            else:
+                leagues.append(map_to_created_league(data))
+
+        return await apply_created_league_batch(leagues, deleted_keys)
+
+    except Exception as e:
+        logger.exception(f"Error processing league batch: {e}")
+        return False
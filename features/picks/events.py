@@ -0,0 +1,10 @@
+from events.registry import ExchangeHandler, register_exchange
+from features.picks.services import process_pick_message, process_pick_messages
+
+pick_exchange = register_exchange(ExchangeHandler(
+    exchange="pick_exchange",
+    queue="pick_for_displays",
+    process_message=process_pick_message,
+    process_batch=process_pick_messages,
+    partition_key=("pick_id", "user_team_id")
+))
@@ -3,7 +3,7 @@ from features.picks.schemas import (
     CreatedPick,
     CreatedPickDetail
 )
-from typing import List
+from typing import List, Mapping, Sequence
 
 def map_to_created_pick(pick_data: dict) -> CreatedPick:
     """Map a pick dictionary to a CreatedPick object.
@@ -76,3 +76,55 @@ def map_to_created_pick_details(pick_details_data: List[dict], created_pick_id:
         created_pick_details.append(created_pick_detail)
     
     return created_pick_details
+
+def map_to_week_picks(rows: Sequence[Mapping]) -> List[dict]:
+    """Group joined pick and detail rows into picks with nested details.
+    
+    The rows must hold the rows of each pick next to each other, as
+    returned by get_week_picks_with_details, so a single pass is enough.
+    
+    Parameters
+    ----------
+    rows : Sequence[Mapping]
+        One row per pick detail, with NULL detail columns for picks
+        without details.
+    
+    Returns
+    -------
+    List[dict]
+        The picks in row order, each with a list of its pick_details.
+    """
+    
+    week_picks = []
+    current = None
+    
+    for row in rows:
+        if current is None or current["created_pick_id"] != row["created_pick_id"]:
+            current = {
+                "created_pick_id": row["created_pick_id"],
+                "pick_id": row["pick_id"],
+                "bet": row["bet"],
+                "amount_won": row["amount_won"],
+                "week_id": row["week_id"],
+                "user_team_id": row["user_team_id"],
+                "parlay_size": row["parlay_size"],
+                "event_date": row["event_date"],
+                "pick_details": []
+            }
+            week_picks.append(current)
+        
+        # Picks without details come back with NULL detail columns
+        if row["created_pick_detail_id"] is None:
+            continue
+        
+        current["pick_details"].append({
+            "created_pick_detail_id": row["created_pick_detail_id"],
+            "pick_detail_id": row["pick_detail_id"],
+            "game_id": row["game_id"],
+            "spread": row["spread"],
+            "total": row["total"],
+            "is_correct": row["is_correct"],
+            "football_team_id": row["football_team_id"]
+        })
+    
+    return week_picks
@@ -1,104 +1,106 @@
-import asyncpg
-from core.database import get_db_config
+import logging
+from asyncpg import Record
+from core.database import acquire_connection
+from datetime import datetime
+from fastapi import HTTPException
 from features.picks.schemas import CreatedPick, CreatedPickDetail
-from typing import List
+from typing import List, Tuple
 
-async def add_created_pick(pick: CreatedPick) -> int:
-    """Add a pick to the created_picks table
+PICK_DETAIL_COLUMNS = [
+    "pick_detail_id", "game_id", "spread", "total",
+    "is_correct", "created_pick_id", "football_team_id", "event_date"
+]
+
+async def save_created_pick(pick: CreatedPick, pick_details: List[CreatedPickDetail]) -> int:
+    """Add or update a pick and replace its details in a single transaction
+    
+    The pick is matched on (pick_id, user_team_id) and any details of an
+    existing pick are cleared in the same statement. The new details are
+    then written with one COPY against the returned id, so a parlay is
+    either stored whole or not at all. An event older than the stored
+    pick, such as a retried one, is ignored together with its details.
     
     Parameters
     ----------
     pick : CreatedPick
         The pick object to be added to the database
+    pick_details : List[CreatedPickDetail]
+        The details of the pick, their created_pick_id is filled in here
     
     Returns
     -------
     int
-        Returns the created_pick_id if successful, 0 if failed
-    """
-    
-    config = get_db_config()
-    
-    try:
-        conn = await asyncpg.connect(**config)
-        
-        query = """
-            INSERT INTO created_picks (
-                pick_id, bet, amount_won, week_id, 
-                user_team_id, parlay_size, event_date
-            ) VALUES (
-                $1, $2, $3, $4, $5, $6, $7
-            ) RETURNING created_pick_id;
-        """
-        
-        row = await conn.fetchrow(
-            query,
-            pick.pick_id,
-            pick.bet,
-            pick.amount_won,
-            pick.week_id,
-            pick.user_team_id,
-            pick.parlay_size,
-            pick.event_date
-        )
-        
-        await conn.close()
-        
-        return row["created_pick_id"] if row else 0
-        
-    except Exception as e:
-        print(f"Error inserting pick: {e}")
-        return 0
+        Returns the created_pick_id, 0 if the event was older than the pick
 
-async def add_created_pick_detail(pick_detail: CreatedPickDetail) -> int:
-    """Add a pick detail to the created_pick_details table
-    
-    Parameters
-    ----------
-    pick_detail : CreatedPickDetail
-        The pick detail object to be added to the database
-    
-    Returns
-    -------
-    int
-        Returns the created_pick_detail_id if successful, 0 if failed
+    Raises
+    ------
+    Exception
+        If the pick or its details could not be written, nothing is kept
     """
     
-    config = get_db_config()
-    
+    logger = logging.getLogger(__name__)
+
     try:
-        conn = await asyncpg.connect(**config)
-        
         query = """
-            INSERT INTO created_pick_details (
-                pick_detail_id, game_id, spread, total, 
-                is_correct, created_pick_id, football_team_id, event_date
-            ) VALUES (
-                $1, $2, $3, $4, $5, $6, $7, $8
-            ) RETURNING created_pick_detail_id;
+            WITH upserted AS (
+                INSERT INTO created_picks (
+                    pick_id, bet, amount_won, week_id, 
+                    user_team_id, parlay_size, event_date
+                ) VALUES (
+                    $1, $2, $3, $4, $5, $6, $7
+                )
+                ON CONFLICT (pick_id, user_team_id) DO UPDATE SET
+                    bet = EXCLUDED.bet,
+                    amount_won = EXCLUDED.amount_won,
+                    week_id = EXCLUDED.week_id,
+                    parlay_size = EXCLUDED.parlay_size,
+                    event_date = EXCLUDED.event_date
+                WHERE created_picks.event_date <= EXCLUDED.event_date
+                RETURNING created_pick_id
+            ), cleared AS (
+                DELETE FROM created_pick_details
+                USING upserted
+                WHERE created_pick_details.created_pick_id = upserted.created_pick_id
+            )
+            SELECT created_pick_id FROM upserted;
         """
         
-        row = await conn.fetchrow(
-            query,
-            pick_detail.pick_detail_id,
-            pick_detail.game_id,
-            pick_detail.spread,
-            pick_detail.total,
-            pick_detail.is_correct,
-            pick_detail.created_pick_id,
-            pick_detail.football_team_id,
-            pick_detail.event_date
-        )
+        async with acquire_connection() as conn:
+            async with conn.transaction():
+                row = await conn.fetchrow(
+                    query,
+                    pick.pick_id,
+                    pick.bet,
+                    pick.amount_won,
+                    pick.week_id,
+                    pick.user_team_id,
+                    pick.parlay_size,
+                    pick.event_date
+                )
+                
+                if not row:
+                    return 0
+                
+                created_pick_id = row["created_pick_id"]
+                
+                if pick_details:
+                    await conn.copy_records_to_table(
+                        "created_pick_details",
+                        records=[(
+                            detail.pick_detail_id, detail.game_id, detail.spread, detail.total,
+                            detail.is_correct, created_pick_id, detail.football_team_id,
+                            detail.event_date
+                        ) for detail in pick_details],
+                        columns=PICK_DETAIL_COLUMNS
+                    )
         
-        await conn.close()
-        
-        return row["created_pick_detail_id"] if row else 0
+        return created_pick_id
         
     except Exception as e:
-        print(f"Error inserting pick detail: {e}")
-        return 0
+        logger.exception(f"Error saving pick {pick.pick_id}: {e}")
+        raise
 
-async def delete_pick(pick_id: int, user_team_id: str) -> bool:
+async def delete_pick(pick_id: int, user_team_id: str, event_date: datetime) -> bool:
     """Delete a pick and its details from the created_picks and created_pick_details tables
     
     Parameters
@@ -107,43 +109,48 @@ async def delete_pick(pick_id: int, user_team_id: str) -> bool:
         The id of the pick to be deleted
     user_team_id : str
         The user team id associated with the pick
+    event_date : datetime
+        When the delete happened, a pick written by a newer event is kept
     
     Returns
     -------
     bool
-        True if the deletion was successful, False otherwise
+        True if the pick was deleted, False if there was no such pick
+        or it was written by a newer event
+
+    Raises
+    ------
+    Exception
+        If the pick could not be deleted
     """
     
-    config = get_db_config()
-    
+    logger = logging.getLogger(__name__)
+
     try:
-        conn = await asyncpg.connect(**config)
-        
-        # Start a transaction to ensure both deletes succeed or fail together
-        async with conn.transaction():
-            # First delete pick details
-            detail_result = await conn.execute(
-                """DELETE FROM created_pick_details 
-                   WHERE created_pick_id IN (
-                       SELECT created_pick_id FROM created_picks 
-                       WHERE pick_id = $1 AND user_team_id = $2
-                   );""", 
-                pick_id, user_team_id
-            )
+        async with acquire_connection() as conn:
+            # Start a transaction to ensure both deletes succeed or fail together
+            async with conn.transaction():
+                # First delete pick details
+                detail_result = await conn.execute(
+                    """DELETE FROM created_pick_details 
+                       WHERE created_pick_id IN (
+                           SELECT created_pick_id FROM created_picks 
+                           WHERE pick_id = $1 AND user_team_id = $2 AND event_date <= $3
+                       );""", 
+                    pick_id, user_team_id, event_date
+                )
             
-            # Then delete the pick
-            pick_result = await conn.execute(
-                "DELETE FROM created_picks WHERE pick_id = $1 AND user_team_id = $2;", 
-                pick_id, user_team_id
-            )
-        
-        await conn.close()
+                # Then delete the pick
+                pick_result = await conn.execute(
+                    "DELETE FROM created_picks WHERE pick_id = $1 AND user_team_id = $2 AND event_date <= $3;", 
+                    pick_id, user_team_id, event_date
+                )
         
         return pick_result.startswith("DELETE") and pick_result.split()[1] != "0"
         
     except Exception as e:
-        print(f"Error deleting pick: {e}")
-        return False
+        logger.exception(f"Error deleting pick {pick_id}: {e}")
+        raise
 
 async def get_picks_by_week(week_id: int) -> List[dict] | None:
     """Get all picks for a specific week
@@ -159,11 +166,7 @@ async def get_picks_by_week(week_id: int) -> List[dict] | None:
         Returns a list of pick records if found, None otherwise
     """
     
-    config = get_db_config()
-    
     try:
-        conn = await asyncpg.connect(**config)
-        
         query = """
             SELECT created_pick_id, pick_id, bet, amount_won, 
                    week_id, user_team_id, parlay_size, event_date
@@ -172,9 +175,8 @@ async def get_picks_by_week(week_id: int) -> List[dict] | None:
             ORDER BY event_date DESC;
         """
         
-        result = await conn.fetch(query, week_id)
-        
-        await conn.close()
+        async with acquire_connection() as conn:
+            result = await conn.fetch(query, week_id)
         
         return [dict(row) for row in result] if result else None
         
@@ -196,11 +198,7 @@ async def get_pick_by_id(pick_id: int) -> dict | None:
         Returns the pick record if found, None otherwise
     """
     
-    config = get_db_config()
-    
     try:
-        conn = await asyncpg.connect(**config)
-        
         query = """
             SELECT created_pick_id, pick_id, bet, amount_won, 
                    week_id, user_team_id, parlay_size, event_date
@@ -208,9 +206,8 @@ async def get_pick_by_id(pick_id: int) -> dict | None:
             WHERE pick_id = $1;
         """
         
-        result = await conn.fetchrow(query, pick_id)
-        
-        await conn.close()
+        async with acquire_connection() as conn:
+            result = await conn.fetchrow(query, pick_id)
         
         return dict(result) if result else None
         
@@ -232,11 +229,7 @@ async def get_pick_details_by_pick_id(created_pick_id: int) -> List[dict] | None
         Returns a list of pick detail records if found, None otherwise
     """
     
-    config = get_db_config()
-    
     try:
-        conn = await asyncpg.connect(**config)
-        
         query = """
             SELECT created_pick_detail_id, pick_detail_id, game_id, 
                    spread, total, is_correct, created_pick_id, 
@@ -246,12 +239,166 @@ async def get_pick_details_by_pick_id(created_pick_id: int) -> List[dict] | None
             ORDER BY pick_detail_id;
         """
         
-        result = await conn.fetch(query, created_pick_id)
-        
-        await conn.close()
+        async with acquire_connection() as conn:
+            result = await conn.fetch(query, created_pick_id)
         
         return [dict(row) for row in result] if result else None
         
     except Exception as e:
         print(f"An error occurred while reading pick details for pick {created_pick_id}: {e}")
         return None
+
+async def get_week_picks_with_details(week_id: int) -> List[Record]:
+    """Get all picks of a week together with their details in one query
+    
+    Each row holds a pick and one of its details, or NULL detail columns
+    for a pick without details. Rows of the same pick are adjacent so
+    they can be grouped in a single pass, see map_to_week_picks.
+    
+    Parameters
+    ----------
+    week_id : int
+        The week id to retrieve picks for
+    
+    Returns
+    -------
+    List[Record]
+        The joined rows, empty if the week has no picks
+
+    Raises
+    ------
+    HTTPException: Status code 500 (Internal Server Error)
+        The picks could not be read
+    """
+    
+    try:
+        query = """
+            SELECT p.created_pick_id, p.pick_id, p.bet, p.amount_won,
+                   p.week_id, p.user_team_id::text AS user_team_id,
+                   p.parlay_size, p.event_date,
+                   d.created_pick_detail_id, d.pick_detail_id, d.game_id,
+                   d.spread::float8 AS spread, d.total::float8 AS total,
+                   d.is_correct, d.football_team_id
+            FROM created_picks p
+            LEFT JOIN created_pick_details d ON d.created_pick_id = p.created_pick_id
+            WHERE p.week_id = $1
+            ORDER BY p.event_date DESC, p.created_pick_id, d.pick_detail_id;
+        """
+        
+        async with acquire_connection() as conn:
+            result = await conn.fetch(query, week_id)
+        
+        return result if result else []
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred while retrieving picks: {e}.")
+
+async def apply_created_pick_batch(picks: List[Tuple[CreatedPick, List[CreatedPickDetail]]], deleted_keys: List[tuple]) -> bool:
+    """Apply a batch of pick changes in a single transaction
+    
+    Picks are upserted with executemany, their ids are read back with one
+    query and all of their details are replaced with a single COPY.
+    Picks older than the stored row are skipped with their details.
+    
+    Parameters
+    ----------
+    picks : List[Tuple[CreatedPick, List[CreatedPickDetail]]]
+        Each pick to add or update with the details that belong to it
+    deleted_keys : List[tuple]
+        (pick_id, user_team_id, event_date) of the picks to delete, a row
+        written by a newer event is kept
+    
+    Returns
+    -------
+    bool
+        True once the whole batch was written
+
+    Raises
+    ------
+    Exception
+        If the batch could not be written, nothing of it is kept
+    """
+    
+    logger = logging.getLogger(__name__)
+
+    try:
+        async with acquire_connection() as conn:
+            async with conn.transaction():
+                if deleted_keys:
+                    # Pick details are removed by ON DELETE CASCADE
+                    await conn.executemany(
+                        "DELETE FROM created_picks WHERE pick_id = $1 AND user_team_id = $2 AND event_date <= $3;",
+                        deleted_keys
+                    )
+                
+                if not picks:
+                    return True
+                
+                await conn.executemany(
+                    """
+                        INSERT INTO created_picks (
+                            pick_id, bet, amount_won, week_id, 
+                            user_team_id, parlay_size, event_date
+                        ) VALUES (
+                            $1, $2, $3, $4, $5, $6, $7
+                        )
+                        ON CONFLICT (pick_id, user_team_id) DO UPDATE SET
+                            bet = EXCLUDED.bet,
+                            amount_won = EXCLUDED.amount_won,
+                            week_id = EXCLUDED.week_id,
+                            parlay_size = EXCLUDED.parlay_size,
+                            event_date = EXCLUDED.event_date
+                        WHERE created_picks.event_date <= EXCLUDED.event_date;
+                    """,
+                    [(pick.pick_id, pick.bet, pick.amount_won, pick.week_id,
+                      pick.user_team_id, pick.parlay_size, pick.event_date) for pick, _ in picks]
+                )
+                
+                rows = await conn.fetch(
+                    """
+                        SELECT created_pick_id, pick_id, user_team_id::text AS user_team_id, event_date
+                        FROM created_picks
+                        WHERE (pick_id, user_team_id) IN (
+                            SELECT * FROM unnest($1::int[], $2::uuid[])
+                        );
+                    """,
+                    [pick.pick_id for pick, _ in picks],
+                    [pick.user_team_id for pick, _ in picks]
+                )
+                
+                stored = {(row["pick_id"], row["user_team_id"]): row for row in rows}
+                
+                # A pick whose row holds a newer event was not written, its
+                # details are left as they are
+                written = []
+                for pick, pick_details in picks:
+                    row = stored[(pick.pick_id, str(pick.user_team_id).lower())]
+                    if row["event_date"] == pick.event_date:
+                        written.append((row["created_pick_id"], pick_details))
+                
+                await conn.execute(
+                    "DELETE FROM created_pick_details WHERE created_pick_id = ANY($1::int[]);",
+                    [created_pick_id for created_pick_id, _ in written]
+                )
+                
+                records = []
+                for created_pick_id, pick_details in written:
+                    for detail in pick_details:
+                        records.append((
+                            detail.pick_detail_id, detail.game_id, detail.spread, detail.total,
+                            detail.is_correct, created_pick_id, detail.football_team_id,
+                            detail.event_date
+                        ))
+                
+                if records:
+                    await conn.copy_records_to_table(
+                        "created_pick_details",
+                        records=records,
+                        columns=PICK_DETAIL_COLUMNS
+                    )
+        
+        return True
+        
+    except Exception as e:
+        logger.exception(f"Error applying pick batch: {e}")
+        raise
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, HTTPException
+from features.picks.services import get_week_picks
+
+router = APIRouter(prefix="/picks", tags=["Picks"])
+
+@router.get("/week/{week_id:int}")
+async def list_week_picks(week_id: int):
+    """List all picks for a week
+
+    All picks of the week and their details are read with one query.
+
+    Parameters
+    ----------
+    week_id : int
+        Id of the week the picks belong to. The week id is passed in the URL.
+
+    Returns
+    -------
+    dict
+        {"picks": [...]} with the picks of the week, newest first, each
+        with its pick details
+
+    Raises
+    ------
+    HTTPException: Status code 404 (Not Found)
+        No picks were found for the week
+    HTTPException: Status code 500 (Internal Server Error)
+        The picks could not be read
+    """
+
+    picks = await get_week_picks(week_id)
+
+    if not picks:
+        raise HTTPException(status_code=404, detail="No picks found for this week.")
+
+    return {"picks": picks}
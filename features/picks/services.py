@@ -1,7 +1,15 @@
 import logging
+from core.batch_helpers import latest_by_key
+from core.date_helpers import format_date
 from core.enums import CreatedStatus
-from features.picks.mappings import map_to_created_pick, map_to_created_pick_details
-from features.picks.repository import add_created_pick, add_created_pick_detail, delete_pick
+from features.picks.mappings import map_to_created_pick, map_to_created_pick_details, map_to_week_picks
+from features.picks.repository import (
+    apply_created_pick_batch,
+    delete_pick,
+    get_week_picks_with_details,
+    save_created_pick
+)
+from typing import List
 
 async def process_pick_message(data: dict) -> bool:
     """Process a pick message and delete the pick if necessary.
@@ -20,43 +28,89 @@ async def process_pick_message(data: dict) -> bool:
     logger = logging.getLogger(__name__)
 
     try:
-        # Remove any entries like this one (delete-first pattern)
-        await delete_pick(data["pick_id"], data["user_team_id"])
-
         if data["status"] == CreatedStatus.DELETE:
-            # If the status is DELETE, return that processing is complete
+            # Remove the pick and its details, processing is then complete
+            await delete_pick(data["pick_id"], data["user_team_id"], format_date(data["event_date"]))
             return True
 
-        # Map the pick data to a CreatedPick object
+        # Map the pick data and its details, the created_pick_id of the
+        # details is filled in once the pick has been written
         pick = map_to_created_pick(data)
+        pick_details = map_to_created_pick_details(
+            data.get("pick_details", []),
+            0,
+            data["event_date"]
+        )
 
-        # Add the new pick to the created_picks table
-        created_pick_id = await add_created_pick(pick)
+        # Add or replace the pick and all of its details in one transaction
+        created_pick_id = await save_created_pick(pick, pick_details)
 
+        # Nothing was written when a newer event was already applied
         if created_pick_id <= 0:
-            logger.error(f"Failed to create pick with id {data['pick_id']}")
-            return False
+            logger.info(f"Ignored pick event older than the stored pick {data['pick_id']}")
+
+        return True
+
+    except Exception as e:
+        logger.exception(f"Error processing pick message: {e}")
+        return False
+
+async def process_pick_messages(batch: List[dict]) -> bool:
+    """Process a batch of pick messages in a single transaction.
+
+    Only the last message for each (pick_id, user_team_id) is applied.
 
-        # Process pick details if they exist
-        pick_details_data = data.get("pick_details", [])
-        if pick_details_data:
-            # Map and add each pick detail
+    Parameters
+    ----------
+    batch : List[dict]
+        Pick messages in the order they were received
+
+    Returns
+    -------
+    bool
+        Returns True if the whole batch is processed successfully, False otherwise.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    try:
+        picks = []
+        deleted_keys = []
+
+        for data in latest_by_key(batch, ("pick_id", "user_team_id")):
+            if data["status"] == CreatedStatus.DELETE:
+                deleted_keys.append((data["pick_id"], data["user_team_id"], format_date(data["event_date"])))
+                continue
+
+            # The created_pick_id is filled in once the pick has been written
             pick_details = map_to_created_pick_details(
-                pick_details_data,
-                created_pick_id,
+                data.get("pick_details", []),
+                0,
                 data["event_date"]
             )
+            picks.append((map_to_created_pick(data), pick_details))
 
-            # Add all pick details
-            for pick_detail in pick_details:
-                detail_result = await add_created_pick_detail(pick_detail)
-                if detail_result <= 0:
-                    logger.error(f"Failed to create pick detail with id {pick_detail.pick_detail_id}")
-                    # Note: In a production system, you might want to rollback the pick creation
-                    # or implement a more sophisticated error handling strategy
-
-        return True
+        return await apply_created_pick_batch(picks, deleted_keys)
 
     except Exception as e:
-        logger.exception(f"Error processing pick message: {e}")
+        logger.exception(f"Error processing pick batch: {e}")
         return False
+
+async def get_week_picks(week_id: int) -> List[dict]:
+    """Get every pick of a week with its details.
+
+    Parameters
+    ----------
+    week_id : int
+        The week to read the picks for
+
+    Returns
+    -------
+    List[dict]
+        The picks ordered by event date, newest first, each with its
+        pick_details. Empty if the week has no picks.
+    """
+
+    rows = await get_week_picks_with_details(week_id)
+
+    return map_to_week_picks(rows) if rows else []
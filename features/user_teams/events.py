@@ -0,0 +1,10 @@
+from events.registry import ExchangeHandler, register_exchange
+from features.user_teams.services import process_user_team_message, process_user_team_messages
+
+user_team_exchange = register_exchange(ExchangeHandler(
+    exchange="user_team_exchange",
+    queue="user_team_for_displays",
+    process_message=process_user_team_message,
+    process_batch=process_user_team_messages,
+    partition_key=("name", "season_id")
+))
@@ -1,56 +1,74 @@
-import asyncpg
-from core.database import get_db_config
+import logging
+from core.database import acquire_connection
+from datetime import datetime
 from features.user_teams.schemas import CreatedUserTeam
-
-async def add_created_user_team(user_team: CreatedUserTeam):
-    """Add a user team to the created_user_teams table
+from typing import List
+
+UPSERT_USER_TEAM_QUERY = """
+    INSERT INTO created_user_teams (
+        user_team_id, name, starting_amount, is_paid, payment_reference,
+        is_active, slogan, email, season_id, user_id, event_date
+    ) VALUES (
+        $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11
+    )
+    ON CONFLICT (name, season_id) DO UPDATE SET
+        user_team_id = EXCLUDED.user_team_id,
+        starting_amount = EXCLUDED.starting_amount,
+        is_paid = EXCLUDED.is_paid,
+        payment_reference = EXCLUDED.payment_reference,
+        is_active = EXCLUDED.is_active,
+        slogan = EXCLUDED.slogan,
+        email = EXCLUDED.email,
+        user_id = EXCLUDED.user_id,
+        event_date = EXCLUDED.event_date
+    WHERE created_user_teams.event_date <= EXCLUDED.event_date
+    RETURNING created_user_team_id;
+"""
+
+async def upsert_created_user_team(user_team: CreatedUserTeam):
+    """Add or update a user team in the created_user_teams table
+
+    The user team is matched on (name, season_id) so an update
+    event replaces the existing row in a single statement. An event
+    older than the stored row, such as a retried one, is ignored.
 
     Returns
     -------
     new_id: int
-        Returns an integer value. If the value is 0
-        or less then the operation failed
+        Returns the id of the row, 0 if the event was older than the row
+
+    Raises
+    ------
+    Exception
+        If the row could not be written
     """
     
-    config = get_db_config()
-    
+    logger = logging.getLogger(__name__)
+
     try:
-        conn = await asyncpg.connect(**config)
-
-        query = """
-            INSERT INTO created_user_teams (
-                user_team_id, name, starting_amount, is_paid, payment_reference,
-                is_active, slogan, email, season_id, user_id, event_date
-            ) VALUES (
-                $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11
+        async with acquire_connection() as conn:
+            row = await conn.fetchrow(
+                UPSERT_USER_TEAM_QUERY,
+                str(user_team.user_team_id),
+                user_team.name,
+                user_team.starting_amount,
+                user_team.is_paid,
+                user_team.payment_reference,
+                user_team.is_active,
+                user_team.slogan,
+                user_team.email,
+                str(user_team.season_id),
+                str(user_team.user_id),
+                user_team.event_date
             )
-            RETURNING created_user_team_id;
-        """
-
-        row = await conn.fetchrow(
-            query,
-            str(user_team.user_team_id),
-            user_team.name,
-            user_team.starting_amount,
-            user_team.is_paid,
-            user_team.payment_reference,
-            user_team.is_active,
-            user_team.slogan,
-            user_team.email,
-            str(user_team.season_id),
-            str(user_team.user_id),
-            user_team.event_date
-        )
-
-        await conn.close()
 
         return row["created_user_team_id"] if row else 0
 
     except Exception as e:
-        print(f"Error inserting user team: {e}")
-        return 0  
+        logger.exception(f"Error upserting user team: {e}")
+        raise
 
-async def delete_user_team(name: str, season_id: str):
+async def delete_user_team(name: str, season_id: str, event_date: datetime):
     """Delete a user team from the created_user_teams table
 
     Parameters
@@ -60,21 +78,21 @@ async def delete_user_team(name: str, season_id: str):
     season_id : string
         The id of the season to which the user team belongs
 
+    event_date : datetime
+        When the delete happened, a row written by a newer event is kept
+
     Returns
     -------
     bool
-        True if the deletion was successful, False otherwise
+        True if the user team was deleted, False if there was no such user team
+        or it was written by a newer event
     """
     
-    config = get_db_config()
-    
-    conn = await asyncpg.connect(**config)
-
-    result = await conn.execute(
-        "DELETE FROM created_user_teams WHERE name = $1 AND season_id = $2;", name, season_id
-    )
-
-    await conn.close()
+    async with acquire_connection() as conn:
+        result = await conn.execute(
+            "DELETE FROM created_user_teams WHERE name = $1 AND season_id = $2 AND event_date <= $3;",
+            name, season_id, event_date
+        )
 
     return result.startswith("DELETE") and result.split()[1] != "0"
       
@@ -92,22 +110,64 @@ async def get_user_team(user_team_id: str):
         Returns a CreatedUserTeam object if found, None otherwise
     """
     
-    config = get_db_config()
-
     try:
-        conn = await asyncpg.connect(**config)
-
-        # Read the user team by user_team_id
-        result = await conn.execute(
-            "SELECT * FROM created_user_teams WHERE user_team_id = $1;", 
-user_team_id,
-        )
-        
-        conn.close()
+        async with acquire_connection() as conn:
+            # Read the user team by user_team_id
+            result = await conn.fetchrow(
+                "SELECT * FROM created_user_teams WHERE user_team_id = $1;",
+                user_team_id,
+            )
 
         return result if result else None
 
     except Exception as e:
             print(f"An error occurred while reading user team {user_team_id}: {e}")
             return False
- 
+
+async def apply_created_user_team_batch(user_teams: List[CreatedUserTeam], deleted_keys: List[tuple]) -> bool:
+    """Apply a batch of user team changes in a single transaction
+
+    Parameters
+    ----------
+    user_teams : List[CreatedUserTeam]
+        CreatedUserTeam objects to add or update
+    deleted_keys : List[tuple]
+        (name, season_id, event_date) of the rows to delete, a row
+        written by a newer event is kept
+
+    Returns
+    -------
+    bool
+        True once the whole batch was written
+
+    Raises
+    ------
+    Exception
+        If the batch could not be written, nothing of it is kept
+    """
+
+    logger = logging.getLogger(__name__)
+
+    try:
+        async with acquire_connection() as conn:
+            async with conn.transaction():
+                if deleted_keys:
+                    await conn.executemany(
+                        "DELETE FROM created_user_teams WHERE name = $1 AND season_id = $2 AND event_date <= $3;",
+                        deleted_keys
+                    )
+
+                if user_teams:
+                    await conn.executemany(
+                        UPSERT_USER_TEAM_QUERY,
+                        [(str(user_team.user_team_id), user_team.name, user_team.starting_amount,
+                          user_team.is_paid, user_team.payment_reference, user_team.is_active,
+                          user_team.slogan, user_team.email, str(user_team.season_id),
+                          str(user_team.user_id), user_team.event_date) for user_team in user_teams]
+                    )
+
+        return True
+
+    except Exception as e:
+        logger.exception(f"Error applying user team batch: {e}")
+        raise
@@ -1,6 +1,14 @@
+import logging
+from core.batch_helpers import latest_by_key
+from core.date_helpers import format_date
 from core.enums import CreatedStatus
 from features.user_teams.mappings import map_to_created_user_team
-from features.user_teams.repository import add_created_user_team, delete_user_team
+from features.user_teams.repository import (
+    apply_created_user_team_batch,
+    delete_user_team,
+    upsert_created_user_team
+)
+from typing import List
 
 async def process_user_team_message(data):
     """Process a user team message and delete the user team if necessary.
@@ -16,23 +24,59 @@ async def process_user_team_message(data):
         Returns a CreatedUserTeam object if the user team is created successfully, or None if the user team is deleted.
     """
 
-    # Remove any entries like this one
-    await delete_user_team(data["name"], data["season_id"])
+    logger = logging.getLogger(__name__)
 
     try:
         if data["status"] == CreatedStatus.DELETE:
-            # If the status is DELETE, return that processing is complete
+            # Remove the user team, processing is then complete
+            await delete_user_team(data["name"], data["season_id"], format_date(data["event_date"]))
             return True
         
         user_team = map_to_created_user_team(data)
 
-        # Add the new message to the created_user_teams table
-        result = await add_created_user_team(user_team)
+        # Add or replace the user team in the created_user_teams table
+        result = await upsert_created_user_team(user_team)
 
-        return True if result > 0 else False
+        # Nothing was written when a newer event was already applied
+        if result <= 0:
+            logger.info(f"Ignored user team event older than the stored user team")
+
+        return True
 
     except Exception as e:
-        print(f"Error adding user team: {e}")
+        logger.exception(f"Error adding user team: {e}")
         return False
 
+async def process_user_team_messages(batch: List[dict]) -> bool:
+    """Process a batch of user team messages in a single transaction.
+
+    Only the last message for each (name, season_id) is applied.
+
+    Parameters
+    ----------
+    batch : List[dict]
+        User team messages in the order they were received
+
+    Returns
+    -------
+    bool
+        Returns True if the whole batch is processed successfully, False otherwise.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    try:
+        user_teams = []
+        deleted_keys = []
+
+        for data in latest_by_key(batch, ("name", "season_id")):
+            if data["status"] == CreatedStatus.DELETE:
+                deleted_keys.append((data["name"], data["season_id"], format_date(data["event_date"])))
+            else:
+                user_teams.append(map_to_created_user_team(data))
+
+        return await apply_created_user_team_batch(user_teams, deleted_keys)
 
+    except Exception as e:
+        logger.exception(f"Error processing user team batch: {e}")
+        return False
@@ -0,0 +1,10 @@
+from events.registry import ExchangeHandler, register_exchange
+from features.weeks.services import process_week_message, process_week_messages
+
+week_exchange = register_exchange(ExchangeHandler(
+    exchange="week_exchange",
+    queue="week_for_displays",
+    process_message=process_week_message,
+    process_batch=process_week_messages,
+    partition_key=("week_number", "season_id")
+))
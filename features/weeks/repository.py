@@ -1,52 +1,66 @@
-import asyncpg
-from core.database import get_db_config
+import logging
+from core.database import acquire_connection
+from datetime import datetime
 from features.weeks.schemas import CreatedWeek
-
-async def add_created_week(week: CreatedWeek):
-    """Add a week to the created_weeks table
+from typing import List
+
+UPSERT_WEEK_QUERY = """
+    INSERT INTO created_weeks (
+        week_id, week_number, start_date, end_date, deadline_date,
+        season_id, event_date
+    ) VALUES (
+        $1, $2, $3, $4, $5, $6, $7
+    )
+    ON CONFLICT (week_number, season_id) DO UPDATE SET
+        week_id = EXCLUDED.week_id,
+        start_date = EXCLUDED.start_date,
+        end_date = EXCLUDED.end_date,
+        deadline_date = EXCLUDED.deadline_date,
+        event_date = EXCLUDED.event_date
+    WHERE created_weeks.event_date <= EXCLUDED.event_date
+    RETURNING created_week_id;
+"""
+
+async def upsert_created_week(week: CreatedWeek):
+    """Add or update a week in the created_weeks table
+
+    The week is matched on (week_number, season_id) so an update
+    event replaces the existing row in a single statement. An event
+    older than the stored row, such as a retried one, is ignored.
 
     Returns
     -------
     new_id: int
-        Returns an integer value. If the value is 0
-        or less then the operation failed
+        Returns the id of the row, 0 if the event was older than the row
+
+    Raises
+    ------
+    Exception
+        If the row could not be written
     """
     
-    config = get_db_config()
-    
+    logger = logging.getLogger(__name__)
+
     try:
-        conn = await asyncpg.connect(**config)
-
-        query = """
-            INSERT INTO created_weeks (
-                week_id, week_number, start_date, end_date, deadline_date,
-                season_id, event_date
-            ) VALUES (
-                $1, $2, $3, $4, $5, $6, $7
+        async with acquire_connection() as conn:
+            row = await conn.fetchrow(
+                UPSERT_WEEK_QUERY,
+                week.week_id,
+                week.week_number,
+                week.start_date,
+                week.end_date,
+                week.deadline_date,
+                week.season_id,
+                week.event_date
             )
-            RETURNING created_week_id;
-        """
-
-        row = await conn.fetchrow(
-            query,
-            week.week_id,
-            week.week_number,
-            week.start_date,
-            week.end_date,
-            week.deadline_date,
-            week.season_id,
-            week.event_date
-        )
-
-        await conn.close()
 
         return row["created_week_id"] if row else 0
 
     except Exception as e:
-        print(f"Error inserting week: {e}")
-        return 0  
+        logger.exception(f"Error upserting week: {e}")
+        raise
 
-async def delete_week(week_number: int, season_id: str):
+async def delete_week(week_number: int, season_id: str, event_date: datetime):
     """Delete a week from the created_weeks table
 
     Parameters
@@ -56,21 +70,21 @@ async def delete_week(week_number: int, season_id: str):
     season_id : str
         The id of the season to which the week belongs
 
+    event_date : datetime
+        When the delete happened, a row written by a newer event is kept
+
     Returns
     -------
     bool
-        True if the deletion was successful, False otherwise
+        True if the week was deleted, False if there was no such week
+        or it was written by a newer event
     """
     
-    config = get_db_config()
-    
-    conn = await asyncpg.connect(**config)
-
-    result = await conn.execute(
-        "DELETE FROM created_weeks WHERE week_number = $1 AND season_id = $2;", week_number, season_id
-    )
-
-    await conn.close()
+    async with acquire_connection() as conn:
+        result = await conn.execute(
+            "DELETE FROM created_weeks WHERE week_number = $1 AND season_id = $2 AND event_date <= $3;",
+            week_number, season_id, event_date
+        )
 
     return result.startswith("DELETE") and result.split()[1] != "0"
       
@@ -88,22 +102,62 @@ async def get_week(week_id: str):
         Returns a CreatedWeek object if found, None otherwise
     """
     
-    config = get_db_config()
-
     try:
-        conn = await asyncpg.connect(**config)
-
-        # Read the week by week_id
-        result = await conn.execute(
-            "SELECT * FROM created_weeks WHERE week_id = $1;", 
-            week_id,
-        )
-        
-        conn.close()
+        async with acquire_connection() as conn:
+            # Read the week by week_id
+            result = await conn.fetchrow(
+                "SELECT * FROM created_weeks WHERE week_id = $1;",
+                week_id,
+            )
 
         return result if result else None
 
     except Exception as e:
             print(f"An error occurred while reading week {week_id}: {e}")
             return False
- 
+
+async def apply_created_week_batch(weeks: List[CreatedWeek], deleted_keys: List[tuple]) -> bool:
+    """Apply a batch of week changes in a single transaction
+
+    Parameters
+    ----------
+    weeks : List[CreatedWeek]
+        CreatedWeek objects to add or update
+    deleted_keys : List[tuple]
+        (week_number, season_id, event_date) of the rows to delete, a row
+        written by a newer event is kept
+
+    Returns
+    -------
+    bool
+        True once the whole batch was written
+
+    Raises
+    ------
+    Exception
+        If the batch could not be written, nothing of it is kept
+    """
+
+    logger = logging.getLogger(__name__)
+
+    try:
+        async with acquire_connection() as conn:
+            async with conn.transaction():
+                if deleted_keys:
+                    await conn.executemany(
+                        "DELETE FROM created_weeks WHERE week_number = $1 AND season_id = $2 AND event_date <= $3;",
+                        deleted_keys
+                    )
+
+                if weeks:
+                    await conn.executemany(
+                        UPSERT_WEEK_QUERY,
+                        [(week.week_id, week.week_number, week.start_date, week.end_date,
+                          week.deadline_date, week.season_id, week.event_date) for week in weeks]
+                    )
+
+        return True
+
+    except Exception as e:
+        logger.exception(f"Error applying week batch: {e}")
+        raise
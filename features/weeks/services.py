@@ -1,7 +1,14 @@
 import logging
+from core.batch_helpers import latest_by_key
+from core.date_helpers import format_date
 from core.enums import CreatedStatus
 from features.weeks.mappings import map_to_created_week
-from features.weeks.repository import add_created_week, delete_week
+from features.weeks.repository import (
+    apply_created_week_batch,
+    delete_week,
+    upsert_created_week
+)
+from typing import List
 
 async def process_week_message(data):
     """Process a week message and delete the week if necessary.
@@ -17,25 +24,59 @@ async def process_week_message(data):
         Returns a CreatedWeek object if the week is created successfully, or None if the week is deleted.
     """
 
-    # Remove any entries like this one
-    await delete_week(data["week_number"], data["season_id"])
-
     logger = logging.getLogger(__name__)
 
     try:
         if data["status"] == CreatedStatus.DELETE:
-            # If the status is DELETE, return that processing is complete
+            # Remove the week, processing is then complete
+            await delete_week(data["week_number"], data["season_id"], format_date(data["event_date"]))
             return True
         
         week = map_to_created_week(data)
 
-        # Add the new message to the created_weeks table
-        result = await add_created_week(week)
+        # Add or replace the week in the created_weeks table
+        result = await upsert_created_week(week)
+
+        # Nothing was written when a newer event was already applied
+        if result <= 0:
+            logger.info(f"Ignored week event older than the stored week")
 
-        return True if result > 0 else False
+        return True
 
     except Exception as e:
         logger.exception(f"Error adding week: {e}")
         return False
 
+async def process_week_messages(batch: List[dict]) -> bool:
+    """Process a batch of week messages in a single transaction.
+
+    Only the last message for each (week_number, season_id) is applied.
+
+    Parameters
+    ----------
+    batch : List[dict]
+        Week messages in the order they were received
+
+    Returns
+    -------
+    bool
+        Returns True if the whole batch is processed successfully, False otherwise.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    try:
+        weeks = []
+        deleted_keys = []
 
+        for data in latest_by_key(batch, ("week_number", "season_id")):
+            if data["status"] == CreatedStatus.DELETE:
+                deleted_keys.append((data["week_number"], data["season_id"], format_date(data["event_date"])))
+            else:
+                weeks.append(map_to_created_week(data))
+
+        return await apply_created_week_batch(weeks, deleted_keys)
+
+    except Exception as e:
+        logger.exception(f"Error processing week batch: {e}")
+        return False
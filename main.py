@@ -5,17 +5,45 @@ import seqlog
 import yaml
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from api.external_routing import (
+    close_http_client,
+    close_parse_executor,
+    create_http_client,
+    create_parse_executor
+)
 from api.router import api_router
-from core.database import initialize_database
+from core.cache import close_redis_client, create_redis_client
+from core.database import (
+    close_pool,
+    create_database_if_not_exists,
+    create_pool,
+    initialize_database
+)
 from events.rabbitmq_handler import rabbitmq_listener
+from features.headlines.jobs import cancel_refresh_jobs, run_headline_scheduler
 from features.headlines.routes import router as list_headlines
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
+    await create_database_if_not_exists()
+    _app.state.db_pool = await create_pool()
     await initialize_database()
+    create_http_client()
+    create_parse_executor()
+    create_redis_client()
     # Save the task to prevent premature garbage collection
     _app.state.rabbitmq_task = asyncio.create_task(rabbitmq_listener())
+    _app.state.headline_scheduler_task = asyncio.create_task(run_headline_scheduler())
     yield
+    # Stop consuming before the pool the message handlers write to is closed
+    _app.state.rabbitmq_task.cancel()
+    await asyncio.gather(_app.state.rabbitmq_task, return_exceptions=True)
+    _app.state.headline_scheduler_task.cancel()
+    await cancel_refresh_jobs()
+    await close_http_client()
+    close_parse_executor()
+    await close_redis_client()
+    await close_pool()
 
 # Configure logging to send to Seq
 # log_to_seq(
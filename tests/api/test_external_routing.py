@@ -0,0 +1,268 @@
+import asyncio
+import httpx
+import pytest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from fastapi import HTTPException
+from api import external_routing
+from api.external_routing import (
+    RssItemParser,
+    create_parse_executor,
+    fetch_external_data,
+    fetch_feed,
+    get_http_client,
+    iter_rss_items,
+    parse_items_from_rss
+)
+
+RSS_FEED = """<?xml version="1.0"?>
+<rss><channel>
+    <item><title>Headline 1</title><link>https://example.com/1</link></item>
+    <item><title>Headline 2</title><link>https://example.com/2</link></item>
+</channel></rss>"""
+
+@pytest.fixture
+def http_client(mocker):
+    """Install a shared client whose requests are answered by a handler"""
+
+    def _install(handler):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        mocker.patch.object(external_routing, "_client", client)
+        return client
+
+    return _install
+
+def test_get_http_client_requires_lifespan(mocker):
+    """Test the client must be created before it is used"""
+    # Arrange
+    mocker.patch.object(external_routing, "_client", None)
+
+    # Act & Assert
+    with pytest.raises(RuntimeError):
+        get_http_client()
+
+@pytest.mark.asyncio
+async def test_fetch_external_data_uses_shared_client(http_client):
+    """Test feeds are fetched with the shared client and parsed"""
+    # Arrange
+    http_client(lambda request: httpx.Response(200, text=RSS_FEED))
+
+    # Act
+    items = await fetch_external_data("https://example.com/rss")
+
+    # Assert
+    assert [item["title"] for item in items] == ["Headline 1", "Headline 2"]
+
+@pytest.mark.asyncio
+async def test_fetch_external_data_timeout(http_client):
+    """Test a slow feed is reported as a gateway timeout"""
+    # Arrange
+    def handler(request):
+        raise httpx.ReadTimeout("Timed out", request=request)
+
+    http_client(handler)
+
+    # Act & Assert
+    with pytest.raises(HTTPException) as exc_info:
+        await fetch_external_data("https://example.com/rss", timeout=0.1)
+
+    assert exc_info.value.status_code == 504
+
+@pytest.mark.asyncio
+async def test_fetch_feed_deadline_covers_the_whole_feed(http_client):
+    """Test a body trickling in under the per-phase timeout still hits the feed deadline"""
+    # Arrange
+    async def trickle():
+        for line in RSS_FEED.splitlines():
+            await asyncio.sleep(0.03)
+            yield line.encode()
+
+    http_client(lambda request: httpx.Response(200, content=trickle()))
+
+    # Act & Assert
+    with pytest.raises(HTTPException) as exc_info:
+        await fetch_feed("https://example.com/rss", timeout=0.1)
+
+    assert exc_info.value.status_code == 504
+
+@pytest.mark.asyncio
+async def test_fetch_external_data_error_status(http_client):
+    """Test an error response keeps its status code"""
+    # Arrange
+    http_client(lambda request: httpx.Response(503))
+
+    # Act & Assert
+    with pytest.raises(HTTPException) as exc_info:
+        await fetch_external_data("https://example.com/rss")
+
+    assert exc_info.value.status_code == 503
+
+@pytest.mark.asyncio
+async def test_fetch_feed_sends_validators_and_handles_not_modified(http_client):
+    """Test the stored validators are sent and a 304 skips the parse"""
+    # Arrange
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(304)
+
+    http_client(handler)
+    cached = {"etag": '"v1"', "last_modified": "Mon, 01 Jan 2024 12:00:00 GMT", "body_hash": "hash"}
+
+    # Act
+    feed = await fetch_feed("https://example.com/rss", cached)
+
+    # Assert
+    assert requests[0].headers["If-None-Match"] == '"v1"'
+    assert requests[0].headers["If-Modified-Since"] == "Mon, 01 Jan 2024 12:00:00 GMT"
+    assert feed.not_modified
+    assert feed.items is None
+    assert feed.body_hash == "hash"
+
+@pytest.mark.asyncio
+async def test_fetch_feed_reports_unchanged_body_hash(http_client):
+    """Test a feed without validators is not modified when its body is unchanged"""
+    # Arrange
+    http_client(lambda request: httpx.Response(200, text=RSS_FEED, headers={"ETag": '"v2"'}))
+    first = await fetch_feed("https://example.com/rss")
+
+    # Act
+    second = await fetch_feed("https://example.com/rss", {"etag": None, "last_modified": None, "body_hash": first.body_hash})
+
+    # Assert
+    assert len(first.items) == 2
+    assert second.not_modified
+    assert second.items is None
+    assert second.etag == '"v2"'
+
+def test_rss_item_parser_handles_any_chunk_size():
+    """Test items are returned as they complete whatever the chunk boundaries"""
+    # Arrange
+    with open("features/headlines/headlines.xml", "rb") as file:
+        document = file.read()
+    expected = parse_items_from_rss(document.decode())
+
+    for chunk_size in (1, 7, 4096):
+        parser = RssItemParser()
+        items = []
+
+        # Act
+        for start in range(0, len(document), chunk_size):
+            items.extend(parser.feed(document[start:start + chunk_size]))
+        items.extend(parser.close())
+
+        # Assert
+        assert items == expected
+
+def test_rss_item_parser_drops_completed_items():
+    """Test completed items are removed from the tree so memory stays flat"""
+    # Arrange
+    parser = RssItemParser()
+
+    # Act
+    items = parser.feed(RSS_FEED.encode())
+
+    # Assert
+    assert len(items) == 2
+    assert len(parser._channel) == 0
+
+@pytest.mark.asyncio
+async def test_iter_rss_items_yields_items_from_chunks():
+    """Test items are yielded from a streamed body"""
+    # Arrange
+    async def chunks():
+        for start in range(0, len(RSS_FEED), 16):
+            yield RSS_FEED[start:start + 16].encode()
+
+    # Act
+    items = [item async for item in iter_rss_items(chunks())]
+
+    # Assert
+    assert [item["link"] for item in items] == ["https://example.com/1", "https://example.com/2"]
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """Thread pool that records how many calls were handed to it"""
+
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.calls = 0
+
+    def submit(self, fn, *args, **kwargs):
+        self.calls += 1
+        return super().submit(fn, *args, **kwargs)
+
+def headlines_chunks(chunk_size=4096):
+    """Stream the sample feed in fixed size chunks"""
+    with open("features/headlines/headlines.xml", "rb") as file:
+        document = file.read()
+
+    async def chunks():
+        for start in range(0, len(document), chunk_size):
+            yield document[start:start + chunk_size]
+
+    return document, chunks()
+
+@pytest.mark.asyncio
+async def test_iter_rss_items_parses_large_feeds_in_executor():
+    """Test the part of a feed past the inline size is parsed in the pool"""
+    # Arrange
+    document, chunks = headlines_chunks()
+    executor = CountingExecutor()
+
+    # Act
+    items = [item async for item in iter_rss_items(chunks, executor, inline_max_bytes=8192)]
+    executor.shutdown()
+
+    # Assert
+    chunk_count = -(-len(document) // 4096)
+    assert items == parse_items_from_rss(document.decode())
+    assert executor.calls == chunk_count - 2 + 1  # Chunks past the first two, then close
+
+@pytest.mark.asyncio
+async def test_iter_rss_items_keeps_small_feeds_inline():
+    """Test feeds under the inline size never reach the pool"""
+    # Arrange
+    document, chunks = headlines_chunks()
+    executor = CountingExecutor()
+
+    # Act
+    items = [item async for item in iter_rss_items(chunks, executor, inline_max_bytes=len(document))]
+    executor.shutdown()
+
+    # Assert
+    assert len(items) == 30
+    assert executor.calls == 0
+
+@pytest.mark.asyncio
+async def test_iter_rss_items_parses_whole_feed_in_process_pool():
+    """Test a process pool receives the complete body"""
+    # Arrange
+    document, chunks = headlines_chunks()
+    executor = ProcessPoolExecutor(max_workers=1)
+
+    # Act
+    try:
+        items = [item async for item in iter_rss_items(chunks, executor, inline_max_bytes=0)]
+    finally:
+        executor.shutdown()
+
+    # Assert
+    assert items == parse_items_from_rss(document.decode())
+
+def test_create_parse_executor(mocker):
+    """Test the pool matches the configured kind"""
+    # Arrange
+    mocker.patch.object(external_routing, "_parse_executor", None)
+
+    # Act & Assert
+    assert create_parse_executor("inline") is None
+
+    executor = create_parse_executor("thread", 1)
+    assert isinstance(executor, ThreadPoolExecutor)
+    assert create_parse_executor("process") is executor  # Created once per process
+    external_routing.close_parse_executor()
+    assert external_routing.get_parse_executor() is None
+
+    with pytest.raises(ValueError):
+        create_parse_executor("gpu")
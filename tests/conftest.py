@@ -0,0 +1,60 @@
+import json
+import pytest
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+
+@pytest.fixture
+def mock_acquire(mocker):
+    """Patch acquire_connection in a module so it yields a mocked connection
+
+    Returns a function taking the module path and returning the
+    patched acquire_connection and the connection it yields.
+    """
+
+    def _patch(module: str, conn=None):
+        conn = conn or AsyncMock()
+        conn.transaction = MagicMock()
+
+        @asynccontextmanager
+        async def _acquire():
+            yield conn
+
+        mock = mocker.patch(f"{module}.acquire_connection", side_effect=_acquire)
+        return mock, conn
+
+    return _patch
+
+
+@pytest.fixture
+def make_message():
+    """Build mocked incoming RabbitMQ messages
+
+    Returns a function taking the body, a dict encoded as JSON or raw
+    bytes, and optionally the headers and message_id of the message.
+    Every other property is unset and ack, nack and reject are
+    awaitable mocks.
+    """
+
+    def _make(body=None, headers=None, message_id=None):
+        body = {"weekNumber": 1} if body is None else body
+        message = MagicMock()
+        message.body = body if isinstance(body, bytes) else json.dumps(body).encode()
+        message.headers = headers or {}
+        message.message_id = message_id
+        message.content_type = "application/json"
+        message.content_encoding = None
+        message.delivery_mode = None
+        message.priority = None
+        message.correlation_id = None
+        message.reply_to = None
+        message.expiration = None
+        message.timestamp = None
+        message.type = None
+        message.app_id = None
+        message.ack = AsyncMock()
+        message.nack = AsyncMock()
+        message.reject = AsyncMock()
+        return message
+
+    return _make
@@ -0,0 +1,204 @@
+import pytest
+from unittest.mock import AsyncMock
+from core import cache
+from core.cache import ReadThroughCache
+
+@pytest.fixture(autouse=True)
+def no_redis(mocker):
+    """Use the memory tier only unless a test installs a client"""
+    mocker.patch.object(cache, "_redis", None)
+
+def counting_loader(value="value"):
+    """Build a loader that records how often it ran"""
+    return AsyncMock(return_value=value)
+
+@pytest.mark.asyncio
+async def test_get_or_load_caches_in_memory():
+    """Test a second read is served without the loader"""
+    # Arrange
+    read_cache = ReadThroughCache("test", ttl_seconds=60)
+    loader = counting_loader()
+
+    # Act
+    first = await read_cache.get_or_load(1, "a", loader)
+    second = await read_cache.get_or_load(1, "a", loader)
+
+    # Assert
+    assert first == second == "value"
+    loader.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_entries_expire_after_ttl(mocker):
+    """Test an expired entry is loaded again"""
+    # Arrange
+    read_cache = ReadThroughCache("test", ttl_seconds=10)
+    loader = counting_loader()
+    clock = mocker.patch("core.cache.time.monotonic", return_value=100.0)
+    await read_cache.get_or_load(1, "a", loader)
+
+    # Act
+    clock.return_value = 111.0
+    await read_cache.get_or_load(1, "a", loader)
+
+    # Assert
+    assert loader.call_count == 2
+
+@pytest.mark.asyncio
+async def test_least_recently_used_entry_is_evicted():
+    """Test the memory tier stays within max_entries"""
+    # Arrange
+    read_cache = ReadThroughCache("test", ttl_seconds=60, max_entries=2)
+    await read_cache.get_or_load(1, "a", counting_loader())
+    await read_cache.get_or_load(2, "b", counting_loader())
+    await read_cache.get_or_load(1, "a", counting_loader())  # "a" is now the most recent
+
+    # Act
+    await read_cache.get_or_load(3, "c", counting_loader())
+    loader = counting_loader()
+    await read_cache.get_or_load(2, "b", loader)
+
+    # Assert
+    assert len(read_cache) == 2
+    loader.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_only_the_group():
+    """Test invalidating a group keeps the values of other groups"""
+    # Arrange
+    read_cache = ReadThroughCache("test", ttl_seconds=60)
+    await read_cache.get_or_load(1, "a", counting_loader())
+    await read_cache.get_or_load(1, "b", counting_loader())
+    await read_cache.get_or_load(2, "a", counting_loader())
+
+    # Act
+    await read_cache.invalidate(1)
+
+    # Assert
+    assert len(read_cache) == 1
+
+@pytest.mark.asyncio
+async def test_shared_tier_is_read_before_the_loader(mocker):
+    """Test a memory miss is answered by Redis when it holds the value"""
+    # Arrange
+    client = AsyncMock()
+    client.hget.return_value = b'"shared"'
+    mocker.patch.object(cache, "_redis", client)
+    read_cache = ReadThroughCache("test", ttl_seconds=60, encode=lambda value: f'"{value}"', decode=lambda data: data.decode().strip('"'))
+    loader = counting_loader()
+
+    # Act
+    value = await read_cache.get_or_load(1, "a", loader)
+    await read_cache.invalidate(1)
+
+    # Assert
+    assert value == "shared"
+    loader.assert_not_called()
+    client.hget.assert_called_once_with("test:1", "a")
+    client.delete.assert_called_once_with("test:1")
+
+@pytest.mark.asyncio
+async def test_shared_tier_errors_fall_back_to_loader(mocker):
+    """Test an unavailable Redis is treated as a miss"""
+    # Arrange
+    client = AsyncMock()
+    client.hget.side_effect = ConnectionError("Redis is down")
+    client.hset.side_effect = ConnectionError("Redis is down")
+    mocker.patch.object(cache, "_redis", client)
+    read_cache = ReadThroughCache("test", ttl_seconds=60, encode=str, decode=bytes.decode)
+    loader = counting_loader()
+
+    # Act
+    value = await read_cache.get_or_load(1, "a", loader)
+
+    # Assert
+    assert value == "value"
+    loader.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_shared_tier_expiry_is_set_only_on_new_hash(mocker):
+    """Test writing to a hash does not extend its expiry"""
+    # Arrange
+    client = AsyncMock()
+    client.hget.return_value = None
+    mocker.patch.object(cache, "_redis", client)
+    read_cache = ReadThroughCache("test", ttl_seconds=60, encode=str, decode=bytes.decode)
+
+    # Act
+    await read_cache.get_or_load(1, "a", counting_loader())
+
+    # Assert
+    client.hset.assert_called_once_with("test:1", "a", "value")
+    client.expire.assert_called_once_with("test:1", 60, nx=True)
+
+@pytest.mark.asyncio
+async def test_value_loaded_during_invalidate_is_not_cached(mocker):
+    """Test a load that raced an invalidation does not cache its stale result"""
+    # Arrange
+    client = AsyncMock()
+    client.hget.return_value = None
+    mocker.patch.object(cache, "_redis", client)
+    read_cache = ReadThroughCache("test", ttl_seconds=60, encode=str, decode=bytes.decode)
+
+    async def stale_loader():
+        await read_cache.invalidate(1)
+        return "stale"
+
+    # Act
+    value = await read_cache.get_or_load(1, "a", stale_loader)
+    fresh = await read_cache.get_or_load(1, "a", counting_loader("fresh"))
+
+    # Assert
+    assert value == "stale"
+    assert fresh == "fresh"
+    assert [call.args[2] for call in client.hset.call_args_list] == ["fresh"]
+
+@pytest.mark.asyncio
+async def test_get_many_or_load_skips_caching_invalidated_groups():
+    """Test only the groups invalidated during the load are left uncached"""
+    # Arrange
+    read_cache = ReadThroughCache("test", ttl_seconds=60)
+
+    async def loader(groups):
+        await read_cache.invalidate(1)
+        return {1: "stale", 2: "two"}
+
+    # Act
+    values = await read_cache.get_many_or_load([1, 2], "a", loader)
+
+    # Assert
+    assert values == {1: "stale", 2: "two"}
+    assert len(read_cache) == 1
+    assert await read_cache.get_or_load(1, "a", counting_loader("fresh")) == "fresh"
+
+@pytest.mark.asyncio
+async def test_get_many_or_load_loads_only_missing_groups():
+    """Test cached groups are served and the rest are loaded in one call"""
+    # Arrange
+    read_cache = ReadThroughCache("test", ttl_seconds=60)
+    await read_cache.get_or_load(2, "a", counting_loader("cached"))
+    loader = AsyncMock(return_value={1: "one", 3: "three"})
+
+    # Act
+    values = await read_cache.get_many_or_load([1, 2, 3, 1], "a", loader)
+    single = await read_cache.get_or_load(3, "a", counting_loader("reloaded"))
+
+    # Assert
+    assert values == {1: "one", 2: "cached", 3: "three"}
+    assert list(values) == [1, 2, 3]
+    loader.assert_called_once_with([1, 3])
+    assert single == "three"
+
+@pytest.mark.asyncio
+async def test_get_many_or_load_skips_loader_when_all_cached():
+    """Test the loader does not run when every group is cached"""
+    # Arrange
+    read_cache = ReadThroughCache("test", ttl_seconds=60)
+    await read_cache.get_or_load(1, "a", counting_loader("one"))
+    loader = AsyncMock()
+
+    # Act
+    values = await read_cache.get_many_or_load([1], "a", loader)
+
+    # Assert
+    assert values == {1: "one"}
+    loader.assert_not_called()
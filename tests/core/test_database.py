@@ -0,0 +1,67 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from core import database
+from core.database import acquire_connection, close_pool, create_pool, get_pool
+
+@pytest.fixture(autouse=True)
+def reset_pool():
+    """Make sure every test starts without a pool"""
+    database._pool = None
+    yield
+    database._pool = None
+
+def test_get_pool_before_create():
+    """Test get_pool raises when the pool has not been created"""
+    # Act & Assert
+    with pytest.raises(RuntimeError):
+        get_pool()
+
+@pytest.mark.asyncio
+async def test_create_pool_is_created_once(mocker):
+    """Test the pool is only created once per process"""
+    # Arrange
+    mock_pool = MagicMock()
+    mock_create_pool = mocker.patch("core.database.asyncpg.create_pool", AsyncMock(return_value=mock_pool))
+
+    # Act
+    first = await create_pool()
+    second = await create_pool()
+
+    # Assert
+    assert first is mock_pool
+    assert second is mock_pool
+    mock_create_pool.assert_called_once()
+    assert get_pool() is mock_pool
+
+@pytest.mark.asyncio
+async def test_acquire_connection_uses_timeout(mocker):
+    """Test connections are acquired from the pool with the configured timeout"""
+    # Arrange
+    mock_conn = AsyncMock()
+    mock_pool = MagicMock()
+    mock_pool.acquire.return_value.__aenter__.return_value = mock_conn
+    database._pool = mock_pool
+
+    # Act
+    async with acquire_connection() as conn:
+        result = conn
+
+    # Assert
+    assert result is mock_conn
+    mock_pool.acquire.assert_called_once_with(timeout=database.DB_POOL_ACQUIRE_TIMEOUT)
+
+@pytest.mark.asyncio
+async def test_close_pool():
+    """Test closing the pool releases it"""
+    # Arrange
+    mock_pool = MagicMock()
+    mock_pool.close = AsyncMock()
+    database._pool = mock_pool
+
+    # Act
+    await close_pool()
+
+    # Assert
+    mock_pool.close.assert_called_once()
+    with pytest.raises(RuntimeError):
+        get_pool()
@@ -0,0 +1,48 @@
+from camel_converter import dict_to_snake
+from core.json_codec import SnakeCaseKeys, loads
+
+def test_loads_parses_bytes():
+    """Test bodies are parsed straight from bytes"""
+    # Act & Assert
+    assert loads(b'{"pickId": 1}') == {"pickId": 1}
+
+def test_snake_case_keys_matches_camel_converter():
+    """Test nested dicts and lists are converted like dict_to_snake"""
+    # Arrange
+    data = {
+        "pickId": 1,
+        "userTeamId": 2,
+        "pickDetails": [{"pickDetailId": 3, "gameId": 4}],
+        "season": {"seasonId": 5}
+    }
+
+    # Act
+    converted = SnakeCaseKeys().convert(data)
+
+    # Assert
+    assert converted == dict_to_snake(data)
+
+def test_snake_case_keys_memoizes_each_key_once():
+    """Test repeated keys are served from the table"""
+    # Arrange
+    keys = SnakeCaseKeys()
+
+    # Act
+    keys.convert({"pickDetailId": 1})
+    keys.convert({"pickDetailId": 2})
+
+    # Assert
+    assert len(keys) == 1
+    assert keys.key("pickDetailId") == "pick_detail_id"
+
+def test_snake_case_keys_stops_caching_when_full():
+    """Test unexpected keys cannot grow the table past its bound"""
+    # Arrange
+    keys = SnakeCaseKeys(max_keys=1)
+
+    # Act
+    converted = keys.convert({"firstKey": 1, "secondKey": 2})
+
+    # Assert
+    assert converted == {"first_key": 1, "second_key": 2}
+    assert len(keys) == 1
@@ -0,0 +1,62 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from core.migrations import Migration, apply_migrations, load_migrations
+
+@pytest.fixture
+def migration_files(tmp_path):
+    """Write a few migration files out of order"""
+    (tmp_path / "0002_second.sql").write_text("SELECT 2;")
+    (tmp_path / "0001_first.sql").write_text("SELECT 1;")
+    (tmp_path / "0010_tenth.sql").write_text("SELECT 10;")
+    (tmp_path / "README.md").write_text("not a migration")
+    return tmp_path
+
+def test_load_migrations_sorted_by_version(migration_files):
+    """Test migrations are loaded in version order and other files ignored"""
+    # Act
+    migrations = load_migrations(migration_files)
+
+    # Assert
+    assert [migration.version for migration in migrations] == [1, 2, 10]
+    assert migrations[0].name == "first"
+    assert migrations[2].sql == "SELECT 10;"
+
+def test_load_migrations_duplicate_version(migration_files):
+    """Test duplicate versions are rejected"""
+    # Arrange
+    (migration_files / "0002_other.sql").write_text("SELECT 3;")
+
+    # Act & Assert
+    with pytest.raises(ValueError):
+        load_migrations(migration_files)
+
+def test_packaged_migrations_start_with_baseline():
+    """Test the packaged migrations load and start with the baseline tables"""
+    # Act
+    migrations = load_migrations()
+
+    # Assert
+    assert migrations[0].version == 1
+    assert "CREATE TABLE IF NOT EXISTS headlines" in migrations[0].sql
+
+@pytest.mark.asyncio
+async def test_apply_migrations_skips_applied_versions():
+    """Test only pending migrations are executed and recorded"""
+    # Arrange
+    mock_conn = AsyncMock()
+    mock_conn.transaction = MagicMock()
+    mock_conn.fetch.return_value = [{"version": 1}]
+    migrations = [
+        Migration(version=1, name="first", sql="SELECT 1;"),
+        Migration(version=2, name="second", sql="SELECT 2;")
+    ]
+
+    # Act
+    applied = await apply_migrations(mock_conn, migrations)
+
+    # Assert
+    assert applied == [2]
+    mock_conn.transaction.assert_called_once()
+    executed = [call.args[0] for call in mock_conn.execute.call_args_list]
+    assert "SELECT 2;" in executed
+    assert "SELECT 1;" not in executed
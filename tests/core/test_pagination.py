@@ -0,0 +1,21 @@
+import pytest
+from core.pagination import decode_cursor, encode_cursor
+
+def test_cursor_round_trip():
+    """Test a decoded cursor gives back the encoded position"""
+    # Arrange
+    position = {"rank": 0.0607927, "id": 42}
+
+    # Act
+    cursor = encode_cursor(position)
+
+    # Assert
+    assert "=" not in cursor
+    assert decode_cursor(cursor, "rank", "id") == position
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "", encode_cursor({"rank": 1.0})])
+def test_decode_cursor_rejects_invalid_cursor(cursor):
+    """Test malformed cursors and missing fields raise ValueError"""
+    # Act & Assert
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, "rank", "id")
@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from events.batching import MessageBatcher
+from events.process_messages import process_message_batch
+
+@pytest.fixture(autouse=True)
+def no_processed_messages(mocker):
+    """Treat every message as new and skip recording it"""
+    mocker.patch("events.process_messages.find_processed", AsyncMock(return_value=set()))
+    mocker.patch("events.process_messages.mark_processed", AsyncMock())
+
+@pytest.mark.asyncio
+async def test_batcher_flushes_when_full():
+    """Test a batch is handed over as soon as it reaches max_size"""
+    # Arrange
+    handler = AsyncMock()
+    batcher = MessageBatcher("week_exchange", handler, max_size=2, max_wait_ms=10000)
+
+    # Act
+    await batcher.add("first")
+    await batcher.add("second")
+
+    # Assert
+    handler.assert_called_once_with(["first", "second"])
+
+@pytest.mark.asyncio
+async def test_batcher_flushes_after_timeout():
+    """Test a partial batch is handed over once max_wait_ms has passed"""
+    # Arrange
+    handler = AsyncMock()
+    batcher = MessageBatcher("week_exchange", handler, max_size=100, max_wait_ms=10)
+
+    # Act
+    await batcher.add("first")
+    handler.assert_not_called()
+    await asyncio.sleep(0.05)
+
+    # Assert
+    handler.assert_called_once_with(["first"])
+
+@pytest.mark.asyncio
+async def test_process_message_batch_acks_on_success(mocker, make_message):
+    """Test every message in the batch is acked after a successful write"""
+    # Arrange
+    messages = [make_message({"weekNumber": 1}), make_message({"weekNumber": 2})]
+    mock_update = mocker.patch("events.process_messages.update_message_batch_status", return_value=True)
+
+    # Act
+    await process_message_batch(messages, "week_exchange")
+
+    # Assert
+    mock_update.assert_called_once_with([{"week_number": 1}, {"week_number": 2}], "week_exchange")
+    for message in messages:
+        message.ack.assert_called_once()
+        message.nack.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_process_message_batch_rejects_only_failing_message(mocker, make_message):
+    """Test a failed batch is applied one message at a time and only the bad one is rejected"""
+    # Arrange
+    good_message = make_message({"weekNumber": 1})
+    bad_message = make_message({"weekNumber": 2})
+    mocker.patch("events.process_messages.update_message_batch_status", return_value=False)
+    mock_update = mocker.patch("events.process_messages.update_message_status", side_effect=[True, False])
+
+    # Act
+    await process_message_batch([good_message, bad_message], "week_exchange")
+
+    # Assert
+    assert mock_update.call_count == 2
+    good_message.ack.assert_called_once()
+    bad_message.ack.assert_not_called()
+    bad_message.reject.assert_called_once_with(requeue=False)
+    for message in (good_message, bad_message):
+        message.nack.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_process_message_batch_rejects_undecodable_message(mocker, make_message):
+    """Test a message that is not JSON is rejected without failing the batch"""
+    # Arrange
+    bad_message = make_message(b"not json")
+    good_message = make_message({"weekNumber": 1})
+    mock_update = mocker.patch("events.process_messages.update_message_batch_status", return_value=True)
+
+    # Act
+    await process_message_batch([bad_message, good_message], "week_exchange")
+
+    # Assert
+    bad_message.reject.assert_called_once_with(requeue=False)
+    good_message.ack.assert_called_once()
+    mock_update.assert_called_once_with([{"week_number": 1}], "week_exchange")
@@ -0,0 +1,69 @@
+import asyncio
+import pytest
+from events.dispatcher import PartitionedDispatcher
+
+@pytest.mark.asyncio
+async def test_same_key_is_processed_in_order(make_message):
+    """Test messages with the same partition key run one after another in order"""
+    # Arrange
+    processed = []
+    running = set()
+
+    async def handler(message, data):
+        key = (data["pick_id"], data["user_team_id"])
+        assert key not in running
+        running.add(key)
+        await asyncio.sleep(0.001)
+        processed.append((key, data["bet"]))
+        running.discard(key)
+
+    dispatcher = PartitionedDispatcher("pick_exchange", 4, ("pick_id", "user_team_id"), handler)
+    dispatcher.start()
+
+    # Act
+    for bet in range(5):
+        for pick_id in (1, 2, 3):
+            await dispatcher.dispatch(make_message({"pickId": pick_id, "userTeamId": "a", "bet": bet}))
+    await asyncio.gather(*(queue.join() for queue in dispatcher._queues))
+    await dispatcher.stop()
+
+    # Assert
+    assert len(processed) == 15
+    for pick_id in (1, 2, 3):
+        bets = [bet for key, bet in processed if key == (pick_id, "a")]
+        assert bets == [0, 1, 2, 3, 4]
+
+@pytest.mark.asyncio
+async def test_different_keys_run_in_parallel(make_message):
+    """Test messages with different keys are not held back by each other"""
+    # Arrange
+    running = 0
+    peak = 0
+
+    async def handler(message, data):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    dispatcher = PartitionedDispatcher("week_exchange", 8, ("week_number", "season_id"), handler)
+    dispatcher.start()
+
+    # Act
+    for week_number in range(32):
+        await dispatcher.dispatch(make_message({"weekNumber": week_number, "seasonId": "s"}))
+    await asyncio.gather(*(queue.join() for queue in dispatcher._queues))
+    await dispatcher.stop()
+
+    # Assert
+    assert peak > 1
+
+def test_lane_for_missing_key_uses_first_lane():
+    """Test messages without the partition key all go to the first lane"""
+    # Arrange
+    dispatcher = PartitionedDispatcher("week_exchange", 4, ("week_number", "season_id"), None)
+
+    # Act & Assert
+    assert dispatcher.lane_for(None) == 0
+    assert dispatcher.lane_for({"week_number": 1}) == 0
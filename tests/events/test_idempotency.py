@@ -0,0 +1,89 @@
+import pytest
+from unittest.mock import AsyncMock
+from events import idempotency
+from events.idempotency import RecentMessageKeys, find_processed, mark_processed, message_key
+from events.process_messages import process_message_batch
+
+@pytest.fixture(autouse=True)
+def fresh_recent_keys(mocker):
+    """Give every test an empty in-memory key cache"""
+    mocker.patch("events.idempotency._recent_keys", RecentMessageKeys(3))
+
+def test_recent_message_keys_evicts_least_recently_seen():
+    """Test the in-memory cache stays within its capacity"""
+    # Arrange
+    keys = RecentMessageKeys(2)
+    keys.add("a")
+    keys.add("b")
+
+    # Act
+    assert "a" in keys  # "a" becomes the most recently seen
+    keys.add("c")
+
+    # Assert
+    assert "a" in keys
+    assert "b" not in keys
+    assert len(keys) == 2
+
+def test_message_key_prefers_message_id(make_message):
+    """Test the AMQP message_id is used when present and the body hash otherwise"""
+    # Arrange
+    with_id = make_message({"pickId": 1}, message_id="abc")
+    first = make_message({"pickId": 1})
+    same_body = make_message({"pickId": 1})
+    other_body = make_message({"pickId": 2})
+
+    # Act & Assert
+    assert message_key(with_id, "pick_exchange") == "pick_exchange:id:abc"
+    assert message_key(first, "pick_exchange") == message_key(same_body, "pick_exchange")
+    assert message_key(first, "pick_exchange") != message_key(other_body, "pick_exchange")
+    assert message_key(first, "pick_exchange") != message_key(first, "week_exchange")
+
+@pytest.mark.asyncio
+async def test_find_processed_checks_memory_before_database(mock_acquire):
+    """Test only keys missing from memory are looked up in the durable table"""
+    # Arrange
+    idempotency._recent_keys.add("seen")
+    _, mock_conn = mock_acquire("events.idempotency")
+    mock_conn.fetch.return_value = [{"message_key": "stored"}]
+
+    # Act
+    processed = await find_processed(["seen", "stored", "new"])
+
+    # Assert
+    assert processed == {"seen", "stored"}
+    assert mock_conn.fetch.call_args[0][1] == ["stored", "new"]
+    assert "stored" in idempotency._recent_keys
+
+@pytest.mark.asyncio
+async def test_mark_processed_records_keys(mock_acquire):
+    """Test processed keys are remembered in memory and written durably"""
+    # Arrange
+    _, mock_conn = mock_acquire("events.idempotency")
+
+    # Act
+    await mark_processed(["a", "b"], "week_exchange")
+
+    # Assert
+    assert "a" in idempotency._recent_keys
+    assert mock_conn.executemany.call_args[0][1] == [("a", "week_exchange"), ("b", "week_exchange")]
+
+@pytest.mark.asyncio
+async def test_process_message_batch_acks_duplicates_without_writing(mocker, make_message):
+    """Test redelivered messages are acked without touching the feature tables"""
+    # Arrange
+    duplicate = make_message({"weekNumber": 1})
+    new = make_message({"weekNumber": 2})
+    duplicate_key = message_key(duplicate, "week_exchange")
+    mocker.patch("events.process_messages.find_processed", AsyncMock(return_value={duplicate_key}))
+    mock_mark = mocker.patch("events.process_messages.mark_processed", AsyncMock())
+    mock_update = mocker.patch("events.process_messages.update_message_batch_status", return_value=True)
+
+    # Act
+    await process_message_batch([duplicate, new], "week_exchange")
+
+    # Assert
+    duplicate.ack.assert_called_once()
+    new.ack.assert_called_once()
+    mock_update.assert_called_once_with([{"week_number": 2}], "week_exchange")
+    mock_mark.assert_called_once_with([message_key(new, "week_exchange")], "week_exchange")
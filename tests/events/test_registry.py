@@ -0,0 +1,71 @@
+import pytest
+from unittest.mock import AsyncMock
+from events import registry
+from events.process_messages import update_message_batch_status, update_message_status
+from events.registry import ExchangeHandler, get_exchange_handler, get_exchange_handlers, register_exchange
+
+def test_feature_exchanges_are_registered():
+    """Test every exchange the service consumes has a handler"""
+    # Act
+    exchanges = [handler.exchange for handler in get_exchange_handlers()]
+
+    # Assert
+    assert exchanges == [
+        "default_pick_exchange",
+        "league_exchange",
+        "pick_exchange",
+        "ranking_exchange",
+        "user_team_exchange",
+        "week_exchange"
+    ]
+
+def test_binding_carries_partition_key_and_settings():
+    """Test a handler's binding holds its queue, key and overrides"""
+    # Arrange
+    handler = ExchangeHandler("test_exchange", "test_queue", AsyncMock(), partition_key=["a", "b"], settings={"batch_size": 1})
+
+    # Act
+    binding = handler.binding()
+
+    # Assert
+    assert binding == {"exchange": "test_exchange", "queue": "test_queue", "batch_size": 1, "partition_key": ("a", "b")}
+
+def test_register_exchange_rejects_a_second_handler(mocker):
+    """Test an exchange cannot silently be taken over by another handler"""
+    # Arrange
+    mocker.patch.dict(registry._handlers, clear=True)
+    register_exchange(ExchangeHandler("test_exchange", "test_queue", AsyncMock()))
+
+    # Act & Assert
+    with pytest.raises(ValueError):
+        register_exchange(ExchangeHandler("test_exchange", "other_queue", AsyncMock()))
+
+@pytest.mark.asyncio
+async def test_update_message_status_uses_registered_handler(mocker):
+    """Test single messages are routed to the registered handler"""
+    # Arrange
+    handler = ExchangeHandler("test_exchange", "test_queue", AsyncMock(return_value=True))
+    mocker.patch.dict(registry._handlers, {"test_exchange": handler})
+
+    # Act
+    result = await update_message_status({"id": 1}, "test_exchange")
+
+    # Assert
+    assert result is True
+    handler.process_message.assert_called_once_with({"id": 1})
+    assert get_exchange_handler("unknown_exchange") is None
+    assert await update_message_status({"id": 1}, "unknown_exchange") is False
+
+@pytest.mark.asyncio
+async def test_batch_falls_back_to_single_message_handler(mocker):
+    """Test handlers without a batch handler apply messages one by one"""
+    # Arrange
+    handler = ExchangeHandler("test_exchange", "test_queue", AsyncMock(side_effect=[True, False, True]))
+    mocker.patch.dict(registry._handlers, {"test_exchange": handler})
+
+    # Act
+    result = await update_message_batch_status([{"id": 1}, {"id": 2}, {"id": 3}], "test_exchange")
+
+    # Assert
+    assert result is False
+    assert handler.process_message.call_count == 2
@@ -0,0 +1,176 @@
+import aio_pika
+import datetime
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from events.process_messages import process_message_batch
+from events.retry import ATTEMPTS_HEADER, RetryRouter, get_attempts, retry_delay_ms
+
+def make_router(max_attempts=3):
+    """Build a router on a mocked channel"""
+    channel = MagicMock()
+    channel.default_exchange.publish = AsyncMock()
+    channel.declare_queue = AsyncMock()
+    dead_letter_exchange = MagicMock()
+    dead_letter_exchange.publish = AsyncMock()
+    channel.declare_exchange = AsyncMock(return_value=dead_letter_exchange)
+    return RetryRouter(channel, "week_exchange", "week_for_displays", max_attempts, 1000, 3000), channel, dead_letter_exchange
+
+def test_retry_delay_grows_exponentially_up_to_the_cap():
+    """Test the backoff doubles per attempt and stops at the maximum"""
+    # Act & Assert
+    assert [retry_delay_ms(attempt, 1000, 5000) for attempt in range(1, 5)] == [1000, 2000, 4000, 5000]
+
+def test_get_attempts_reads_header(make_message):
+    """Test the attempt count defaults to zero"""
+    # Act & Assert
+    assert get_attempts(make_message()) == 0
+    assert get_attempts(make_message(headers={ATTEMPTS_HEADER: 2})) == 2
+
+@pytest.mark.asyncio
+async def test_declare_creates_retry_and_dead_letter_queues():
+    """Test one delay queue per retry delay plus the dead-letter queue"""
+    # Arrange
+    router, channel, _ = make_router(max_attempts=3)
+
+    # Act
+    await router.declare()
+
+    # Assert
+    declared = [call.args[0] for call in channel.declare_queue.call_args_list]
+    assert declared == ["week_for_displays.retry.1000", "week_for_displays.retry.2000", "week_for_displays.dlq"]
+    arguments = channel.declare_queue.call_args_list[1].kwargs["arguments"]
+    assert arguments["x-message-ttl"] == 2000
+    assert arguments["x-dead-letter-routing-key"] == "week_for_displays"
+    channel.declare_exchange.assert_called_once()
+    assert channel.declare_exchange.call_args.args[0] == "week_exchange.dlx"
+
+@pytest.mark.asyncio
+async def test_declare_shares_the_queue_of_capped_delays():
+    """Test attempts capped at the maximum delay share one queue named after it"""
+    # Arrange
+    router, channel, _ = make_router(max_attempts=5)
+
+    # Act
+    await router.declare()
+
+    # Assert
+    declared = [call.args[0] for call in channel.declare_queue.call_args_list]
+    assert declared[:-1] == ["week_for_displays.retry.1000", "week_for_displays.retry.2000", "week_for_displays.retry.3000"]
+
+@pytest.mark.asyncio
+async def test_retry_publishes_to_next_delay_queue(make_message):
+    """Test a failed message goes to the delay queue of its next attempt"""
+    # Arrange
+    router, channel, _ = make_router()
+    await router.declare()
+
+    # Act
+    await router.retry(make_message(headers={ATTEMPTS_HEADER: 1}), "boom")
+
+    # Assert
+    published, = channel.default_exchange.publish.call_args.args
+    assert channel.default_exchange.publish.call_args.kwargs["routing_key"] == "week_for_displays.retry.2000"
+    assert published.headers[ATTEMPTS_HEADER] == 2
+
+@pytest.mark.asyncio
+async def test_retry_keeps_message_properties(make_message):
+    """Test a retried message keeps the properties of the original"""
+    # Arrange
+    router, channel, _ = make_router()
+    await router.declare()
+    message = make_message()
+    message.message_id = "message-1"
+    message.correlation_id = "correlation-1"
+    message.timestamp = datetime.datetime(2024, 10, 10, tzinfo=datetime.timezone.utc)
+    message.type = "week.updated"
+    message.app_id = "weeks-service"
+    message.delivery_mode = aio_pika.DeliveryMode.NOT_PERSISTENT
+
+    # Act
+    await router.retry(message, "boom")
+
+    # Assert
+    published, = channel.default_exchange.publish.call_args.args
+    assert published.message_id == "message-1"
+    assert published.correlation_id == "correlation-1"
+    assert published.timestamp == message.timestamp
+    assert published.type == "week.updated"
+    assert published.app_id == "weeks-service"
+    assert published.delivery_mode == aio_pika.DeliveryMode.NOT_PERSISTENT
+
+@pytest.mark.asyncio
+async def test_retry_quarantines_after_max_attempts(make_message):
+    """Test a message that used up its attempts is moved to the dead-letter queue"""
+    # Arrange
+    router, channel, dead_letter_exchange = make_router(max_attempts=3)
+    await router.declare()
+
+    # Act
+    await router.retry(make_message(headers={ATTEMPTS_HEADER: 2}), "boom")
+
+    # Assert
+    channel.default_exchange.publish.assert_not_called()
+    dead_letter_exchange.publish.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_rerouted_then_acked(mocker, make_message):
+    """Test a failed batch is handed to the retry queues instead of requeued"""
+    # Arrange
+    mocker.patch("events.process_messages.find_processed", AsyncMock(return_value=set()))
+    mocker.patch("events.process_messages.update_message_batch_status", AsyncMock(side_effect=Exception("db down")))
+    mocker.patch("events.process_messages.update_message_status", AsyncMock(side_effect=Exception("db down")))
+    router = MagicMock()
+    router.retry = AsyncMock()
+    messages = [make_message(), make_message()]
+
+    # Act
+    await process_message_batch(messages, "week_exchange", router)
+
+    # Assert
+    assert router.retry.call_count == 2
+    for message in messages:
+        message.ack.assert_called_once()
+        message.nack.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_failed_reroute_requeues_message(mocker, make_message):
+    """Test a message is requeued when the retry queue cannot be reached"""
+    # Arrange
+    mocker.patch("events.process_messages.find_processed", AsyncMock(return_value=set()))
+    mocker.patch("events.process_messages.update_message_batch_status", AsyncMock(return_value=False))
+    router = MagicMock()
+    router.retry = AsyncMock(side_effect=Exception("broker down"))
+    message = make_message()
+
+    # Act
+    await process_message_batch([message], "week_exchange", router)
+
+    # Assert
+    message.ack.assert_not_called()
+    message.nack.assert_called_once_with(requeue=True)
+
+@pytest.mark.asyncio
+async def test_failed_batch_retries_only_the_failing_message(mocker, make_message):
+    """Test a failed batch is applied one message at a time to isolate the bad one"""
+    # Arrange
+    mocker.patch("events.process_messages.find_processed", AsyncMock(return_value=set()))
+    mock_mark = mocker.patch("events.process_messages.mark_processed", AsyncMock())
+    mocker.patch("events.process_messages.update_message_batch_status", AsyncMock(side_effect=KeyError("status")))
+    mock_update = mocker.patch(
+        "events.process_messages.update_message_status", AsyncMock(side_effect=[True, False, True])
+    )
+    router = MagicMock()
+    router.retry = AsyncMock()
+    messages = [make_message(), make_message(), make_message()]
+    messages[1].message_id = "bad"
+
+    # Act
+    await process_message_batch(messages, "week_exchange", router)
+
+    # Assert
+    assert mock_update.call_count == 3
+    router.retry.assert_called_once()
+    assert router.retry.call_args.args[0] is messages[1]
+    assert len(mock_mark.call_args.args[0]) == 2
+    for message in messages:
+        message.ack.assert_called_once()
@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from events.dispatcher import PartitionedDispatcher
+from events import rabbitmq_handler
+from events.rabbitmq_handler import get_binding_settings, rabbitmq_listener, setup_binding, stop_dispatchers
+from events.worker_pool import WorkerPool
+
+@pytest.mark.asyncio
+async def test_worker_pool_limits_concurrency():
+    """Test no more than `concurrency` handlers run at the same time"""
+    # Arrange
+    pool = WorkerPool("pick_exchange", concurrency=2)
+    running = 0
+    peak = 0
+
+    async def handler(value):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return value
+
+    # Act
+    results = await asyncio.gather(*(pool.run(handler, i) for i in range(6)))
+
+    # Assert
+    assert results == list(range(6))
+    assert peak == 2
+    assert pool.active == 0
+
+def test_binding_settings_override_defaults():
+    """Test a binding keeps its own settings over the defaults"""
+    # Act
+    settings = get_binding_settings({"exchange": "ranking_exchange", "queue": "ranking_for_displays", "batch_size": 50})
+
+    # Assert
+    assert settings["batch_size"] == 50
+    assert settings["prefetch_count"] > 0
+    assert settings["concurrency"] > 0
+
+@pytest.mark.asyncio
+async def test_setup_binding_sets_prefetch():
+    """Test each binding sets the prefetch on its own channel"""
+    # Arrange
+    channel = MagicMock()
+    channel.set_qos = AsyncMock()
+    channel.declare_exchange = AsyncMock()
+    queue = MagicMock()
+    queue.bind = AsyncMock()
+    queue.consume = AsyncMock()
+    channel.declare_queue = AsyncMock(return_value=queue)
+    binding = get_binding_settings({"exchange": "week_exchange", "queue": "week_for_displays", "prefetch_count": 25})
+
+    # Act
+    await setup_binding(channel, binding)
+
+    # Assert
+    channel.set_qos.assert_called_once_with(prefetch_count=25)
+    queue.consume.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_partitioned_binding_uses_lanes_by_default():
+    """Test a binding with a partition_key is consumed through its lanes unless it opts into batching"""
+    # Arrange
+    channel = MagicMock()
+    channel.set_qos = AsyncMock()
+    channel.declare_exchange = AsyncMock()
+    queue = MagicMock()
+    queue.bind = AsyncMock()
+    queue.consume = AsyncMock()
+    channel.declare_queue = AsyncMock(return_value=queue)
+    binding = get_binding_settings({"exchange": "pick_exchange", "queue": "pick_for_displays", "partition_key": ("pick_id",)})
+
+    # Act
+    await setup_binding(channel, binding)
+
+    # Assert
+    consumer = queue.consume.call_args.args[0]
+    assert isinstance(consumer.__self__, PartitionedDispatcher)
+    await stop_dispatchers()
+
+@pytest.mark.asyncio
+async def test_cancelled_listener_stops_lanes_and_closes_connection(mocker):
+    """Test shutting the listener down stops the lanes before the connection is closed"""
+    # Arrange
+    dispatcher = MagicMock()
+    dispatcher.stop = AsyncMock()
+    mocker.patch.object(rabbitmq_handler, "_dispatchers", [dispatcher])
+    connection = AsyncMock()
+    mocker.patch("events.rabbitmq_handler.aio_pika.connect_robust", AsyncMock(return_value=connection))
+    mocker.patch("events.rabbitmq_handler.get_exchange_handlers", return_value=[])
+
+    async def purge_forever():
+        await asyncio.sleep(60)
+
+    mocker.patch("events.rabbitmq_handler.run_message_key_purge", side_effect=purge_forever)
+    task = asyncio.create_task(rabbitmq_listener())
+    await asyncio.sleep(0)
+
+    # Act
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    # Assert
+    dispatcher.stop.assert_called_once()
+    connection.close.assert_called_once()
+    assert rabbitmq_handler._dispatchers == []
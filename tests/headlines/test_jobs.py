@@ -0,0 +1,125 @@
+import asyncio
+import pytest
+from collections import OrderedDict
+from fastapi import HTTPException
+from features.headlines import jobs
+from features.headlines.jobs import get_job, run_headline_scheduler, submit_refresh
+
+@pytest.fixture(autouse=True)
+def fresh_jobs(mocker):
+    """Give every test an empty job store and its own semaphore"""
+    mocker.patch.object(jobs, "_jobs", OrderedDict())
+    mocker.patch.object(jobs, "_active", {})
+    mocker.patch.object(jobs, "_tasks", set())
+    mocker.patch.object(jobs, "_semaphore", None)
+
+async def wait_for(job):
+    """Let the background task of a job run to completion"""
+    while not job.done:
+        await asyncio.sleep(0)
+
+@pytest.mark.asyncio
+async def test_submit_refresh_runs_in_background(mocker):
+    """Test a submitted refresh is queued and then succeeds"""
+    # Arrange
+    mock_create = mocker.patch("features.headlines.jobs.create_headlines_for_sport")
+
+    # Act
+    job = submit_refresh(1)
+    status_on_submit = job.status
+    await wait_for(job)
+
+    # Assert
+    assert status_on_submit == "queued"
+    assert job.status == "succeeded"
+    assert job.finished_at is not None
+    assert get_job(job.job_id) is job
+    mock_create.assert_called_once_with(1)
+
+@pytest.mark.asyncio
+async def test_submit_refresh_returns_active_job_of_the_sport(mocker):
+    """Test a sport is not refreshed twice at the same time"""
+    # Arrange
+    mocker.patch("features.headlines.jobs.create_headlines_for_sport")
+
+    # Act
+    first = submit_refresh(1)
+    second = submit_refresh(1)
+    await wait_for(first)
+    third = submit_refresh(1)
+    await wait_for(third)
+
+    # Assert
+    assert first is second
+    assert third is not first
+
+@pytest.mark.asyncio
+async def test_failed_refresh_records_error(mocker):
+    """Test the reason of a failed refresh can be polled"""
+    # Arrange
+    mocker.patch(
+        "features.headlines.jobs.create_headlines_for_sport",
+        side_effect=HTTPException(status_code=404, detail="No leagues found for sport 9.")
+    )
+
+    # Act
+    job = submit_refresh(9)
+    await wait_for(job)
+
+    # Assert
+    assert job.status == "failed"
+    assert job.error == "No leagues found for sport 9."
+
+@pytest.mark.asyncio
+async def test_refreshes_are_capped(mocker):
+    """Test no more than the configured number of sports refresh at once"""
+    # Arrange
+    in_flight = 0
+    peak = 0
+
+    async def slow_refresh(sport_id):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    mocker.patch("features.headlines.jobs.HEADLINES_REFRESH_CONCURRENCY", 2)
+    mocker.patch("features.headlines.jobs.create_headlines_for_sport", side_effect=slow_refresh)
+
+    # Act
+    submitted = [submit_refresh(sport_id) for sport_id in range(5)]
+    for job in submitted:
+        await wait_for(job)
+
+    # Assert
+    assert peak == 2
+
+@pytest.mark.asyncio
+async def test_scheduler_submits_every_sport(mocker):
+    """Test each round of the scheduler refreshes every sport with leagues"""
+    # Arrange
+    mocker.patch("features.headlines.jobs.HEADLINES_REFRESH_JITTER_SECONDS", 0)
+    mocker.patch("features.headlines.jobs.get_sport_ids", return_value=[1, 2])
+    mock_submit = mocker.patch("features.headlines.jobs.submit_refresh")
+    mocker.patch("features.headlines.jobs.asyncio.sleep", side_effect=[None, None, asyncio.CancelledError()])
+
+    # Act
+    with pytest.raises(asyncio.CancelledError):
+        await run_headline_scheduler()
+
+    # Assert
+    assert [call.args[0] for call in mock_submit.call_args_list] == [1, 2]
+
+@pytest.mark.asyncio
+async def test_scheduler_turned_off(mocker):
+    """Test an interval of 0 leaves refreshes to the API"""
+    # Arrange
+    mocker.patch("features.headlines.jobs.HEADLINES_REFRESH_INTERVAL_SECONDS", 0)
+    mock_get_sport_ids = mocker.patch("features.headlines.jobs.get_sport_ids")
+
+    # Act
+    await run_headline_scheduler()
+
+    # Assert
+    mock_get_sport_ids.assert_not_called()
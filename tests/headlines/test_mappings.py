@@ -1,5 +1,16 @@
+import json
 import pytest
-from features.headlines.mappings import map_headline_to_dtos
+from features.headlines.mappings import (
+    hash_link,
+    map_headline_to_dtos,
+    map_headlines_to_json,
+    map_headlines_to_next_cursor,
+    map_headlines_to_response,
+    map_items_to_headline_records,
+    map_json_to_headlines,
+    map_pages_to_response
+)
+from core.pagination import decode_cursor
 from features.headlines.models import Headline, HeadlineDto
 from datetime import datetime
 
@@ -190,3 +201,108 @@ def test_map_headline_to_dtos_maintains_order():
     assert result[0].heading == "First"
     assert result[1].heading == "Second"
     assert result[2].heading == "Third"
+
+def test_map_items_to_headline_records_skips_invalid_dates():
+    """Test feed items become table rows and undated items are dropped"""
+    # Arrange
+    items = [
+        {"title": "Heading", "description": "Story", "link": "https://example.com/1",
+         "pubDate": "Mon, 01 Jan 2024 12:00:00 +0000"},
+        {"title": "Undated", "description": "Story", "link": "https://example.com/2",
+         "pubDate": "Invalid Date Format"}
+    ]
+
+    # Act
+    records = map_items_to_headline_records(items, 3)
+
+    # Assert
+    assert len(records) == 1
+    heading, story, link, pub_date, league_id, link_hash = records[0]
+    assert (heading, story, link, league_id) == ("Heading", "Story", "https://example.com/1", 3)
+    assert pub_date.year == 2024
+    assert link_hash == hash_link("https://example.com/1")
+
+def test_hash_link_ignores_insignificant_differences():
+    """Test the same story keeps its identity across cosmetic link changes"""
+    # Act & Assert
+    assert hash_link(" https://example.com/story/#top ") == hash_link("https://example.com/story")
+    assert hash_link("https://example.com/story") != hash_link("https://example.com/other")
+
+def test_map_items_to_headline_records_keeps_first_of_duplicate_links():
+    """Test an item repeated in a feed is only written once"""
+    # Arrange
+    item = {"title": "Heading", "description": "Story", "link": "https://example.com/1",
+            "pubDate": "Mon, 01 Jan 2024 12:00:00 +0000"}
+
+    # Act
+    records = map_items_to_headline_records([item, {**item, "title": "Again", "link": "https://example.com/1/"}], 3)
+
+    # Assert
+    assert [record[0] for record in records] == ["Heading"]
+
+def test_map_items_to_headline_records_guards_the_column_limits():
+    """Test an item without a description is skipped and an over-length story is truncated"""
+    # Arrange
+    items = [
+        {"title": "No story", "link": "https://example.com/1",
+         "pubDate": "Mon, 01 Jan 2024 12:00:00 +0000"},
+        {"title": "Long story", "description": "x" * 600, "link": "https://example.com/2",
+         "pubDate": "Mon, 01 Jan 2024 12:00:00 +0000"},
+        {"title": "Long link", "description": "Story", "link": "https://example.com/" + "x" * 500,
+         "pubDate": "Mon, 01 Jan 2024 12:00:00 +0000"}
+    ]
+
+    # Act
+    records = map_items_to_headline_records(items, 3)
+
+    # Assert
+    assert [record[0] for record in records] == ["Long story"]
+    assert records[0][1] == "x" * 500
+
+def test_headlines_round_trip_through_json():
+    """Test headlines stored in the shared cache come back unchanged"""
+    # Arrange
+    headlines = [
+        HeadlineDto(heading="Heading", story="Story", link="https://example.com/1",
+                    pub_date=datetime(2024, 1, 1, 12, 0, 0), league_id=1)
+    ]
+
+    # Act
+    result = map_json_to_headlines(map_headlines_to_json(headlines))
+
+    # Assert
+    assert result == headlines
+
+
+def test_map_pages_to_response_embeds_pages():
+    """Test league pages are combined without re-encoding"""
+    # Arrange
+    page = b'{"headlines":[{"heading":"A"}]}'
+
+    # Act
+    body = map_pages_to_response({1: page, 2: None})
+
+    # Assert
+    assert page in body
+    assert json.loads(body) == {
+        "leagues": {"1": json.loads(page), "2": json.loads(map_headlines_to_response([]))}
+    }
+
+
+def test_map_headlines_to_next_cursor_points_after_last_headline():
+    """Test a full page carries the position of its last headline"""
+    # Arrange
+    headlines = [
+        HeadlineDto("A", "Story", "https://example.com/a", datetime(2024, 1, 2), 1),
+        HeadlineDto("B", "Story", "https://example.com/b", datetime(2024, 1, 1), 1)
+    ]
+
+    # Act
+    cursor = map_headlines_to_next_cursor(headlines, 2)
+
+    # Assert
+    assert decode_cursor(cursor, "pub_date", "link_hash") == {
+        "pub_date": "2024-01-01T00:00:00", "link_hash": hash_link("https://example.com/b")
+    }
+    assert map_headlines_to_next_cursor(headlines, 3) is None
+    assert map_headlines_to_next_cursor([], 1) is None
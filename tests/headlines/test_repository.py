@@ -3,11 +3,19 @@ from unittest.mock import AsyncMock, MagicMock
 from fastapi import HTTPException
 from features.headlines.repository import (
     add_headline,
+    delete_expired_headlines,
     delete_headlines_for_league,
-    get_all_headlines
+    get_all_headlines,
+    get_feed_cache,
+    get_headlines_for_leagues,
+    search_headlines,
+    sync_headlines_for_league,
+    save_feed_cache
 )
 from features.headlines.models import HeadlineDto
-from datetime import datetime
+from datetime import datetime, timedelta
+
+REPOSITORY = "features.headlines.repository"
 
 # Test data
 TEST_HEADLINE_DATA = {
@@ -25,7 +33,7 @@ TEST_HEADLINE_DATA_INVALID_DATE = {
 }
 
 @pytest.mark.asyncio
-async def test_add_headline_success(mocker):
+async def test_add_headline_success(mocker, mock_acquire):
     """Test successful addition of a headline"""
     # Arrange
     league_id = 1
@@ -34,20 +42,16 @@ async def test_add_headline_success(mocker):
     mock_conn = AsyncMock()
     mock_fetchrow = AsyncMock(return_value={"headline_id": expected_headline_id})
     mock_conn.fetchrow = mock_fetchrow
-    mock_conn.close = AsyncMock()
     
-    mock_connect = mocker.patch("features.headlines.repository.asyncpg.connect", return_value=mock_conn)
-    mock_get_db_config = mocker.patch("features.headlines.repository.get_db_config", return_value={})
+    mock_acquire_connection, _ = mock_acquire(REPOSITORY, mock_conn)
     
     # Act
     result = await add_headline(TEST_HEADLINE_DATA, league_id)
     
     # Assert
     assert result == expected_headline_id
-    mock_get_db_config.assert_called_once()
-    mock_connect.assert_called_once_with(**{})
+    mock_acquire_connection.assert_called_once()
     mock_fetchrow.assert_called_once()
-    mock_conn.close.assert_called_once()
     
     # Verify the SQL query parameters
     call_args = mock_fetchrow.call_args
@@ -57,7 +61,7 @@ async def test_add_headline_success(mocker):
     assert call_args[0][5] == league_id
 
 @pytest.mark.asyncio
-async def test_add_headline_no_result(mocker):
+async def test_add_headline_no_result(mocker, mock_acquire):
     """Test add headline when database returns no result"""
     # Arrange
     league_id = 1
@@ -65,27 +69,23 @@ async def test_add_headline_no_result(mocker):
     mock_conn = AsyncMock()
     mock_fetchrow = AsyncMock(return_value=None)
     mock_conn.fetchrow = mock_fetchrow
-    mock_conn.close = AsyncMock()
     
-    mocker.patch("features.headlines.repository.asyncpg.connect", return_value=mock_conn)
-    mocker.patch("features.headlines.repository.get_db_config", return_value={})
+    mock_acquire(REPOSITORY, mock_conn)
     
     # Act
     result = await add_headline(TEST_HEADLINE_DATA, league_id)
     
     # Assert
     assert result == 0
-    mock_conn.close.assert_called_once()
 
 @pytest.mark.asyncio
-async def test_add_headline_invalid_date_format(mocker):
+async def test_add_headline_invalid_date_format(mocker, mock_acquire):
     """Test add headline with invalid date format"""
     # Arrange
     league_id = 1
     
     mock_conn = AsyncMock()
-    mocker.patch("features.headlines.repository.asyncpg.connect", return_value=mock_conn)
-    mocker.patch("features.headlines.repository.get_db_config", return_value={})
+    mock_acquire(REPOSITORY, mock_conn)
     
     # Act
     result = await add_headline(TEST_HEADLINE_DATA_INVALID_DATE, league_id)
@@ -94,13 +94,12 @@ async def test_add_headline_invalid_date_format(mocker):
     assert result == 0  # Should return 0 on exception
 
 @pytest.mark.asyncio
-async def test_add_headline_database_exception(mocker):
+async def test_add_headline_database_exception(mocker, mock_acquire):
     """Test add headline when database connection fails"""
     # Arrange
     league_id = 1
     
-    mocker.patch("features.headlines.repository.asyncpg.connect", side_effect=Exception("Database connection failed"))
-    mocker.patch("features.headlines.repository.get_db_config", return_value={})
+    mocker.patch(f"{REPOSITORY}.acquire_connection", side_effect=Exception("Database connection failed"))
     
     # Act
     result = await add_headline(TEST_HEADLINE_DATA, league_id)
@@ -109,7 +108,7 @@ async def test_add_headline_database_exception(mocker):
     assert result == 0
 
 @pytest.mark.asyncio
-async def test_delete_headlines_for_league_success(mocker):
+async def test_delete_headlines_for_league_success(mocker, mock_acquire):
     """Test successful deletion of headlines for a league"""
     # Arrange
     league_id = 1
@@ -117,23 +116,19 @@ async def test_delete_headlines_for_league_success(mocker):
     mock_conn = AsyncMock()
     mock_execute = AsyncMock(return_value="DELETE 5")  # 5 rows deleted
     mock_conn.execute = mock_execute
-    mock_conn.close = AsyncMock()
     
-    mock_connect = mocker.patch("features.headlines.repository.asyncpg.connect", return_value=mock_conn)
-    mock_get_db_config = mocker.patch("features.headlines.repository.get_db_config", return_value={})
+    mock_acquire_connection, _ = mock_acquire(REPOSITORY, mock_conn)
     
     # Act
     result = await delete_headlines_for_league(league_id)
     
     # Assert
     assert result is True
-    mock_get_db_config.assert_called_once()
-    mock_connect.assert_called_once_with(**{})
+    mock_acquire_connection.assert_called_once()
     mock_execute.assert_called_once_with("DELETE FROM headlines WHERE league_id = $1;", league_id)
-    mock_conn.close.assert_called_once()
 
 @pytest.mark.asyncio
-async def test_delete_headlines_for_league_no_rows_deleted(mocker):
+async def test_delete_headlines_for_league_no_rows_deleted(mocker, mock_acquire):
     """Test delete headlines when no rows are deleted"""
     # Arrange
     league_id = 999
@@ -141,10 +136,8 @@ async def test_delete_headlines_for_league_no_rows_deleted(mocker):
     mock_conn = AsyncMock()
     mock_execute = AsyncMock(return_value="DELETE 0")  # 0 rows deleted
     mock_conn.execute = mock_execute
-    mock_conn.close = AsyncMock()
     
-    mocker.patch("features.headlines.repository.asyncpg.connect", return_value=mock_conn)
-    mocker.patch("features.headlines.repository.get_db_config", return_value={})
+    mock_acquire(REPOSITORY, mock_conn)
     
     # Act
     result = await delete_headlines_for_league(league_id)
@@ -153,7 +146,7 @@ async def test_delete_headlines_for_league_no_rows_deleted(mocker):
     assert result is False
 
 @pytest.mark.asyncio
-async def test_delete_headlines_for_league_invalid_response(mocker):
+async def test_delete_headlines_for_league_invalid_response(mocker, mock_acquire):
     """Test delete headlines with invalid database response"""
     # Arrange
     league_id = 1
@@ -161,10 +154,8 @@ async def test_delete_headlines_for_league_invalid_response(mocker):
     mock_conn = AsyncMock()
     mock_execute = AsyncMock(return_value="INVALID RESPONSE")
     mock_conn.execute = mock_execute
-    mock_conn.close = AsyncMock()
     
-    mocker.patch("features.headlines.repository.asyncpg.connect", return_value=mock_conn)
-    mocker.patch("features.headlines.repository.get_db_config", return_value={})
+    mock_acquire(REPOSITORY, mock_conn)
     
     # Act
     result = await delete_headlines_for_league(league_id)
@@ -173,7 +164,7 @@ async def test_delete_headlines_for_league_invalid_response(mocker):
     assert result is False
 
 @pytest.mark.asyncio
-async def test_get_all_headlines_success(mocker):
+async def test_get_all_headlines_success(mocker, mock_acquire):
     """Test successful retrieval of all headlines for a league"""
     # Arrange
     league_id = 1
@@ -187,10 +178,8 @@ async def test_get_all_headlines_success(mocker):
     mock_conn = AsyncMock()
     mock_fetch = AsyncMock(return_value=mock_rows)
     mock_conn.fetch = mock_fetch
-    mock_conn.close = AsyncMock()
     
-    mock_connect = mocker.patch("features.headlines.repository.asyncpg.connect", return_value=mock_conn)
-    mock_get_db_config = mocker.patch("features.headlines.repository.get_db_config", return_value={})
+    mock_acquire_connection, _ = mock_acquire(REPOSITORY, mock_conn)
     
     # Act
     result = await get_all_headlines(league_id, limit)
@@ -203,10 +192,8 @@ async def test_get_all_headlines_success(mocker):
     assert result[1].heading == "Test Headline 2"
     assert result[1].league_id == 1
     
-    mock_get_db_config.assert_called_once()
-    mock_connect.assert_called_once_with(**{})
+    mock_acquire_connection.assert_called_once()
     mock_fetch.assert_called_once()
-    mock_conn.close.assert_called_once()
     
     # Verify SQL query parameters
     call_args = mock_fetch.call_args
@@ -214,7 +201,7 @@ async def test_get_all_headlines_success(mocker):
     assert call_args[0][2] == limit
 
 @pytest.mark.asyncio
-async def test_get_all_headlines_empty_result(mocker):
+async def test_get_all_headlines_empty_result(mocker, mock_acquire):
     """Test get all headlines when no headlines found"""
     # Arrange
     league_id = 999
@@ -223,20 +210,17 @@ async def test_get_all_headlines_empty_result(mocker):
     mock_conn = AsyncMock()
     mock_fetch = AsyncMock(return_value=[])
     mock_conn.fetch = mock_fetch
-    mock_conn.close = AsyncMock()
     
-    mocker.patch("features.headlines.repository.asyncpg.connect", return_value=mock_conn)
-    mocker.patch("features.headlines.repository.get_db_config", return_value={})
+    mock_acquire(REPOSITORY, mock_conn)
     
     # Act
     result = await get_all_headlines(league_id, limit)
     
     # Assert
     assert result == []
-    mock_conn.close.assert_called_once()
 
 @pytest.mark.asyncio
-async def test_get_all_headlines_none_result(mocker):
+async def test_get_all_headlines_none_result(mocker, mock_acquire):
     """Test get all headlines when database returns None"""
     # Arrange
     league_id = 1
@@ -245,10 +229,8 @@ async def test_get_all_headlines_none_result(mocker):
     mock_conn = AsyncMock()
     mock_fetch = AsyncMock(return_value=None)
     mock_conn.fetch = mock_fetch
-    mock_conn.close = AsyncMock()
     
-    mocker.patch("features.headlines.repository.asyncpg.connect", return_value=mock_conn)
-    mocker.patch("features.headlines.repository.get_db_config", return_value={})
+    mock_acquire(REPOSITORY, mock_conn)
     
     # Act
     result = await get_all_headlines(league_id, limit)
@@ -257,14 +239,13 @@ async def test_get_all_headlines_none_result(mocker):
     assert result == []
 
 @pytest.mark.asyncio
-async def test_get_all_headlines_database_exception(mocker):
+async def test_get_all_headlines_database_exception(mocker, mock_acquire):
     """Test get all headlines when database exception occurs"""
     # Arrange
     league_id = 1
     limit = 10
     
-    mocker.patch("features.headlines.repository.asyncpg.connect", side_effect=Exception("Database error"))
-    mocker.patch("features.headlines.repository.get_db_config", return_value={})
+    mocker.patch(f"{REPOSITORY}.acquire_connection", side_effect=Exception("Database error"))
     
     # Act & Assert
     with pytest.raises(HTTPException) as exc_info:
@@ -272,3 +253,258 @@ async def test_get_all_headlines_database_exception(mocker):
     
     assert exc_info.value.status_code == 500
     assert "An error occurred while retrieving" in str(exc_info.value.detail)
+
+@pytest.mark.asyncio
+async def test_get_feed_cache_returns_validators(mock_acquire):
+    """Test the stored validators of a feed are returned"""
+    # Arrange
+    _, mock_conn = mock_acquire(REPOSITORY)
+    mock_conn.fetchrow.return_value = {"etag": '"v1"', "last_modified": None, "body_hash": "hash"}
+
+    # Act
+    result = await get_feed_cache("https://example.com/rss")
+
+    # Assert
+    assert result == {"etag": '"v1"', "last_modified": None, "body_hash": "hash"}
+
+@pytest.mark.asyncio
+async def test_get_feed_cache_failure_forces_full_fetch(mock_acquire):
+    """Test an unreadable cache is treated as a feed never fetched"""
+    # Arrange
+    _, mock_conn = mock_acquire(REPOSITORY)
+    mock_conn.fetchrow.side_effect = Exception("Database error")
+
+    # Act & Assert
+    assert await get_feed_cache("https://example.com/rss") is None
+
+@pytest.mark.asyncio
+async def test_save_feed_cache_upserts_by_url(mock_acquire):
+    """Test the validators are stored against the feed URL"""
+    # Arrange
+    _, mock_conn = mock_acquire(REPOSITORY)
+
+    # Act
+    await save_feed_cache("https://example.com/rss", '"v1"', None, "hash", ["a" * 64])
+
+    # Assert
+    query, *args = mock_conn.execute.call_args.args
+    assert "ON CONFLICT (url)" in query
+    assert args == ["https://example.com/rss", '"v1"', None, "hash", ["a" * 64]]
+
+@pytest.mark.asyncio
+async def test_sync_headlines_for_league_in_one_transaction(mock_acquire):
+    """Test the upsert and the delete of dropped items share one transaction"""
+    # Arrange
+    mock_acquire_connection, mock_conn = mock_acquire(REPOSITORY)
+    mock_conn.fetch.return_value = [{"inserted": True}, {"inserted": False}]
+    mock_conn.execute.return_value = "DELETE 3"
+    records = [
+        ("Heading 1", "Story", "https://example.com/1", datetime(2024, 1, 1), 1, "a" * 64),
+        ("Heading 2", "Story", "https://example.com/2", datetime(2024, 1, 2), 1, "b" * 64)
+    ]
+
+    # Act
+    result = await sync_headlines_for_league(1, records)
+
+    # Assert
+    assert result == {"inserted": 1, "updated": 1, "deleted": 3}
+    mock_acquire_connection.assert_called_once()
+    mock_conn.transaction.assert_called_once()
+    query, *args = mock_conn.fetch.call_args.args
+    assert "ON CONFLICT (league_id, link_hash)" in query
+    assert "IS DISTINCT FROM" in query
+    assert args[0] == 1
+    assert args[-1] == ["a" * 64, "b" * 64]
+    assert mock_conn.execute.call_args.args[1:] == (1, ["a" * 64, "b" * 64])
+
+@pytest.mark.asyncio
+async def test_sync_headlines_for_league_failure(mock_acquire):
+    """Test a failed synchronization is reported"""
+    # Arrange
+    _, mock_conn = mock_acquire(REPOSITORY)
+    mock_conn.fetch.side_effect = Exception("Database error")
+
+    # Act
+    result = await sync_headlines_for_league(1, [("Heading", "Story", "link", datetime(2024, 1, 1), 1, "a" * 64)])
+
+    # Assert
+    assert result is None
+
+@pytest.mark.asyncio
+async def test_sync_headlines_for_league_keeps_missing_headlines(mock_acquire):
+    """Test dropped items are kept when history is kept"""
+    # Arrange
+    _, mock_conn = mock_acquire(REPOSITORY)
+    mock_conn.fetch.return_value = [{"inserted": True}]
+
+    # Act
+    result = await sync_headlines_for_league(
+        1, [("Heading", "Story", "link", datetime(2024, 1, 1), 1, "a" * 64)], delete_missing=False
+    )
+
+    # Assert
+    assert result == {"inserted": 1, "updated": 0, "deleted": 0}
+    mock_conn.execute.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_delete_expired_headlines_in_batches(mock_acquire):
+    """Test each limit is applied in batches until a batch comes back short"""
+    # Arrange
+    _, mock_conn = mock_acquire(REPOSITORY)
+    mock_conn.execute.side_effect = ["DELETE 100", "DELETE 40", "DELETE 7"]
+
+    # Act
+    result = await delete_expired_headlines(1, 500, timedelta(days=90), 100, ["a" * 64])
+
+    # Assert
+    assert result == 147
+    calls = mock_conn.execute.call_args_list
+    assert len(calls) == 3
+    assert "OFFSET $2 LIMIT $3" in calls[0].args[0]
+    assert calls[0].args[1:] == (1, 500, 100)
+    assert "pub_date < now() - $2::interval" in calls[2].args[0]
+    assert "link_hash <> ALL($4::char(64)[])" in calls[2].args[0]
+    assert calls[2].args[1:] == (1, timedelta(days=90), 100, ["a" * 64])
+    mock_conn.transaction.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_delete_expired_headlines_without_limits(mock_acquire):
+    """Test nothing is deleted when both limits are off"""
+    # Arrange
+    _, mock_conn = mock_acquire(REPOSITORY)
+
+    # Act
+    result = await delete_expired_headlines(1, 0, None, 100)
+
+    # Assert
+    assert result == 0
+    mock_conn.execute.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_delete_expired_headlines_failure(mock_acquire):
+    """Test a failed deletion is reported"""
+    # Arrange
+    _, mock_conn = mock_acquire(REPOSITORY)
+    mock_conn.execute.side_effect = Exception("Database error")
+
+    # Act
+    result = await delete_expired_headlines(1, 500, None, 100)
+
+    # Assert
+    assert result is None
+
+
+@pytest.mark.asyncio
+async def test_search_headlines_first_page(mock_acquire):
+    """Test the first page is searched without a keyset position"""
+    # Arrange
+    mock_conn = AsyncMock()
+    mock_conn.fetch = AsyncMock(return_value=[])
+    mock_acquire(REPOSITORY, mock_conn)
+
+    # Act
+    result = await search_headlines("trade", None, 11)
+
+    # Assert
+    assert result == []
+    args = mock_conn.fetch.call_args[0]
+    assert "websearch_to_tsquery" in args[0]
+    assert "ORDER BY rank DESC, headline_id DESC" in args[0]
+    assert args[1:] == ("trade", None, None, None, 11)
+
+@pytest.mark.asyncio
+async def test_search_headlines_after_position(mock_acquire):
+    """Test later pages start after the given (rank, headline_id)"""
+    # Arrange
+    mock_conn = AsyncMock()
+    mock_conn.fetch = AsyncMock(return_value=[])
+    mock_acquire(REPOSITORY, mock_conn)
+
+    # Act
+    await search_headlines("trade", 3, 11, (0.5, 42))
+
+    # Assert
+    assert mock_conn.fetch.call_args[0][1:] == ("trade", 3, 0.5, 42, 11)
+
+@pytest.mark.asyncio
+async def test_search_headlines_error(mock_acquire):
+    """Test a database error is raised as a 500"""
+    # Arrange
+    mock_conn = AsyncMock()
+    mock_conn.fetch = AsyncMock(side_effect=Exception("syntax error"))
+    mock_acquire(REPOSITORY, mock_conn)
+
+    # Act & Assert
+    with pytest.raises(HTTPException) as exc_info:
+        await search_headlines("trade", None, 11)
+
+    assert exc_info.value.status_code == 500
+
+
+class FakeRecord(tuple):
+    """Row that unpacks like an asyncpg Record and is indexed by column"""
+    COLUMNS = ["heading", "story", "link", "pub_date", "league_id"]
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = self.COLUMNS.index(key)
+        return super().__getitem__(key)
+
+@pytest.mark.asyncio
+async def test_get_headlines_for_leagues_groups_by_league(mock_acquire):
+    """Test one query reads every league and rows are grouped by league"""
+    # Arrange
+    pub_date = datetime(2024, 1, 1, 12, 0, 0)
+    rows = [
+        ("Heading 1", "Story 1", "https://example.com/1", pub_date, 1),
+        ("Heading 2", "Story 2", "https://example.com/2", pub_date, 3),
+        ("Heading 3", "Story 3", "https://example.com/3", pub_date, 1)
+    ]
+    mock_conn = AsyncMock()
+    mock_conn.fetch = AsyncMock(return_value=[FakeRecord(row) for row in rows])
+    mock_acquire(REPOSITORY, mock_conn)
+
+    # Act
+    result = await get_headlines_for_leagues([1, 2, 3], 5)
+
+    # Assert
+    mock_conn.fetch.assert_called_once()
+    assert "CROSS JOIN LATERAL" in mock_conn.fetch.call_args[0][0]
+    assert mock_conn.fetch.call_args[0][1:] == ([1, 2, 3], 5)
+    assert [h.link for h in result[1]] == ["https://example.com/1", "https://example.com/3"]
+    assert result[2] == []
+    assert result[3][0].league_id == 3
+
+@pytest.mark.asyncio
+async def test_get_headlines_for_leagues_error(mock_acquire):
+    """Test a database error is raised as a 500"""
+    # Arrange
+    mock_conn = AsyncMock()
+    mock_conn.fetch = AsyncMock(side_effect=Exception("Database error"))
+    mock_acquire(REPOSITORY, mock_conn)
+
+    # Act & Assert
+    with pytest.raises(HTTPException) as exc_info:
+        await get_headlines_for_leagues([1], 5)
+
+    assert exc_info.value.status_code == 500
+
+
+@pytest.mark.asyncio
+async def test_get_all_headlines_after_position(mock_acquire):
+    """Test later pages are read by keyset, newest first"""
+    # Arrange
+    after = (datetime(2024, 1, 1), "a" * 64)
+    mock_conn = AsyncMock()
+    mock_conn.fetch = AsyncMock(return_value=[])
+    mock_acquire(REPOSITORY, mock_conn)
+
+    # Act
+    result = await get_all_headlines(1, 10, after)
+
+    # Assert
+    assert result == []
+    query = mock_conn.fetch.call_args[0][0]
+    assert "(pub_date, link_hash) <" in query
+    assert "ORDER BY pub_date DESC, link_hash DESC" in query
+    assert mock_conn.fetch.call_args[0][1:] == (1, 10, *after)
@@ -3,6 +3,8 @@ from fastapi.testclient import TestClient
 from fastapi import HTTPException
 from unittest.mock import AsyncMock, patch
 from features.headlines.routes import router
+from features.headlines.jobs import RefreshJob
+from features.headlines.mappings import map_headlines_to_next_cursor, map_headlines_to_response
 from features.headlines.models import HeadlineDto
 from datetime import datetime
 
@@ -64,4 +66,148 @@ def test_route_structure():
     has_get = any('GET' in route.methods for route in routes_with_methods)
 
     assert has_post, "Should have POST routes"
-    assert has_get, "Should have GET routes"
\ No newline at end of file
+    assert has_get, "Should have GET routes"
+def test_list_headlines_raw_response_matches_encoded_response():
+    """Test the pre-rendered body is the JSON FastAPI would have sent"""
+    # Arrange
+    page = map_headlines_to_response(TEST_HEADLINE_DTOS)
+
+    with patch("features.headlines.routes.HEADLINES_RAW_RESPONSES", True), \
+         patch("features.headlines.routes.get_headlines_page", new_callable=AsyncMock, return_value=page):
+        # Act
+        raw = client.get("/headlines/1")
+
+    with patch("features.headlines.routes.HEADLINES_RAW_RESPONSES", False), \
+         patch("features.headlines.routes.get_headlines_by_league", new_callable=AsyncMock, return_value=TEST_HEADLINE_DTOS):
+        encoded = client.get("/headlines/1")
+
+    # Assert
+    assert raw.status_code == encoded.status_code == 200
+    assert raw.headers["content-type"] == "application/json"
+    assert raw.json() == encoded.json()
+
+def test_list_headlines_raw_response_not_found():
+    """Test a league without a rendered page returns 404"""
+    # Arrange
+    with patch("features.headlines.routes.HEADLINES_RAW_RESPONSES", True), \
+         patch("features.headlines.routes.get_headlines_page", new_callable=AsyncMock, return_value=None):
+        # Act
+        response = client.get("/headlines/1")
+
+    # Assert
+    assert response.status_code == 404
+
+def test_create_headlines_returns_accepted_job():
+    """Test a refresh is accepted and its job can be polled"""
+    # Arrange
+    job = RefreshJob(job_id="abc", sport_id=1)
+
+    with patch("features.headlines.routes.submit_refresh", return_value=job):
+        # Act
+        response = client.post("/headlines/1")
+
+    with patch("features.headlines.routes.get_job", return_value=job):
+        poll = client.get("/headlines/jobs/abc")
+
+    # Assert
+    assert response.status_code == 202
+    assert response.json() == {"job_id": "abc", "status": "queued"}
+    assert poll.status_code == 200
+    assert poll.json()["sport_id"] == 1
+
+def test_get_refresh_job_not_found():
+    """Test polling an unknown job returns 404"""
+    # Act
+    response = client.get("/headlines/jobs/unknown")
+
+    # Assert
+    assert response.status_code == 404
+
+
+def test_search_headlines_passes_query():
+    """Test the search parameters reach the service"""
+    # Arrange
+    page = {"headlines": TEST_HEADLINE_DTOS, "next_cursor": "abc"}
+
+    with patch("features.headlines.routes.search_headlines_page", AsyncMock(return_value=page)) as mock_search:
+        # Act
+        response = client.get("/headlines/search", params={"q": "trade", "league_id": 1, "limit": 5})
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json()["next_cursor"] == "abc"
+    assert len(response.json()["headlines"]) == 2
+    mock_search.assert_called_once_with("trade", 1, 5, None)
+
+@pytest.mark.parametrize("params", [{}, {"q": ""}, {"q": "trade", "limit": 0}, {"q": "trade", "limit": 10000}])
+def test_search_headlines_invalid_parameters(params):
+    """Test missing terms and out of range limits are rejected"""
+    # Act
+    response = client.get("/headlines/search", params=params)
+
+    # Assert
+    assert response.status_code == 422
+
+
+def test_list_headlines_for_leagues_raw_response_matches_encoded_response():
+    """Test both response modes return the same body for several leagues"""
+    # Arrange
+    body = b'{"leagues":{"1":' + map_headlines_to_response(TEST_HEADLINE_DTOS) + b',"2":{"headlines":[],"next_cursor":null}}}'
+
+    with patch("features.headlines.routes.HEADLINES_RAW_RESPONSES", True), \
+         patch("features.headlines.routes.get_headlines_pages", new_callable=AsyncMock, return_value=body) as mock_pages:
+        # Act
+        raw = client.get("/headlines", params={"league_ids": "1,2,1", "limit": 5})
+
+    with patch("features.headlines.routes.HEADLINES_RAW_RESPONSES", False), \
+         patch("features.headlines.routes.get_headlines_by_leagues", new_callable=AsyncMock,
+               return_value={1: TEST_HEADLINE_DTOS, 2: []}):
+        encoded = client.get("/headlines", params={"league_ids": "1,2", "limit": 5})
+
+    # Assert
+    assert raw.status_code == encoded.status_code == 200
+    assert raw.json() == encoded.json()
+    mock_pages.assert_called_once_with([1, 2], 5)
+
+@pytest.mark.parametrize("league_ids", ["1,a", "1,,2", ",".join(str(i) for i in range(100))])
+def test_list_headlines_for_leagues_invalid_league_ids(league_ids):
+    """Test malformed or too many league ids are rejected"""
+    # Act
+    response = client.get("/headlines", params={"league_ids": league_ids})
+
+    # Assert
+    assert response.status_code == 400
+
+
+def test_list_headlines_passes_limit_and_cursor():
+    """Test later pages are read with the cursor and carry the next one"""
+    # Arrange
+    with patch("features.headlines.routes.get_headlines_by_league", new_callable=AsyncMock,
+               return_value=TEST_HEADLINE_DTOS) as mock_get:
+        # Act
+        response = client.get("/headlines/1", params={"limit": 2, "cursor": "abc"})
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json()["next_cursor"] == map_headlines_to_next_cursor(TEST_HEADLINE_DTOS, 2)
+    mock_get.assert_called_once_with(1, 2, "abc")
+
+def test_list_headlines_empty_later_page():
+    """Test a page past the last headline is empty rather than 404"""
+    # Arrange
+    with patch("features.headlines.routes.get_headlines_by_league", new_callable=AsyncMock, return_value=[]):
+        # Act
+        response = client.get("/headlines/1", params={"cursor": "abc"})
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json() == {"headlines": [], "next_cursor": None}
+
+@pytest.mark.parametrize("limit", [0, 10000])
+def test_list_headlines_limit_out_of_range(limit):
+    """Test the page size is capped"""
+    # Act
+    response = client.get("/headlines/1", params={"limit": limit})
+
+    # Assert
+    assert response.status_code == 422
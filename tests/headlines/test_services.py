@@ -1,11 +1,21 @@
+import asyncio
+import json
 import pytest
 from unittest.mock import AsyncMock
 from fastapi import HTTPException
 from features.headlines.services import (
     create_headlines_for_sport, 
     get_headlines_by_league, 
-    import_headlines
+    get_headlines_by_leagues,
+    get_headlines_page,
+    get_headlines_pages,
+    headline_cache,
+    headline_page_cache,
+    import_headlines,
+    search_headlines_page
 )
+from api.external_routing import FeedResponse
+from features.headlines.mappings import hash_link, map_headlines_to_next_cursor, map_items_to_headline_records
 from features.headlines.models import HeadlineDto
 from datetime import datetime
 
@@ -47,15 +57,40 @@ TEST_HEADLINE_DTOS = [
     )
 ]
 
+def feed(items, not_modified=False):
+    """Build the response of a feed fetch"""
+    return FeedResponse(items, '"v1"', None, "hash", not_modified)
+
+@pytest.fixture(autouse=True)
+def empty_headline_cache():
+    """Start every test with nothing cached in memory"""
+    headline_cache.clear()
+    headline_page_cache.clear()
+    yield
+    headline_cache.clear()
+    headline_page_cache.clear()
+
+@pytest.fixture(autouse=True)
+def retention(mocker):
+    """Start every refresh without expired headlines"""
+    return mocker.patch("features.headlines.services.delete_expired_headlines", return_value=0)
+
+@pytest.fixture(autouse=True)
+def feed_cache(mocker):
+    """Start every refresh without stored feed validators"""
+    return (
+        mocker.patch("features.headlines.services.get_feed_cache", return_value=None),
+        mocker.patch("features.headlines.services.save_feed_cache")
+    )
+
 @pytest.mark.asyncio
 async def test_create_headlines_for_sport_success(mocker):
     """Test successful creation of headlines for a sport"""
     # Arrange
     sport_id = 1
     mock_get_leagues = mocker.patch("features.headlines.services.get_leagues", return_value=TEST_LEAGUE_DATA)
-    mock_import_headlines = mocker.patch("features.headlines.services.import_headlines", return_value=TEST_HEADLINES_DATA)
-    mock_delete_headlines = mocker.patch("features.headlines.services.delete_headlines_for_league", return_value=True)
-    mock_add_headline = mocker.patch("features.headlines.services.add_headline", return_value=1)
+    mock_import_headlines = mocker.patch("features.headlines.services.import_headlines", return_value=feed(TEST_HEADLINES_DATA))
+    mock_sync_headlines = mocker.patch("features.headlines.services.sync_headlines_for_league", return_value={"inserted": 2, "updated": 0, "deleted": 0})
     
     # Act
     await create_headlines_for_sport(sport_id)
@@ -63,8 +98,8 @@ async def test_create_headlines_for_sport_success(mocker):
     # Assert
     mock_get_leagues.assert_called_once_with(sport_id)
     assert mock_import_headlines.call_count == 2  # Two leagues
-    assert mock_delete_headlines.call_count == 2  # Two leagues
-    assert mock_add_headline.call_count == 4  # Two headlines per league
+    assert mock_sync_headlines.call_count == 2  # One transaction per league
+    assert all(len(call.args[1]) == 2 for call in mock_sync_headlines.call_args_list)  # Two headlines per league
 
 @pytest.mark.asyncio
 async def test_create_headlines_for_sport_no_leagues(mocker):
@@ -87,7 +122,7 @@ async def test_create_headlines_for_sport_no_headlines_for_league(mocker):
     # Arrange
     sport_id = 1
     mock_get_leagues = mocker.patch("features.headlines.services.get_leagues", return_value=TEST_LEAGUE_DATA[:1])
-    mock_import_headlines = mocker.patch("features.headlines.services.import_headlines", return_value=None)
+    mock_import_headlines = mocker.patch("features.headlines.services.import_headlines", return_value=feed(None))
     
     # Act & Assert
     with pytest.raises(HTTPException) as exc_info:
@@ -102,9 +137,8 @@ async def test_create_headlines_for_sport_add_headline_fails(mocker):
     # Arrange
     sport_id = 1
     mock_get_leagues = mocker.patch("features.headlines.services.get_leagues", return_value=TEST_LEAGUE_DATA[:1])
-    mock_import_headlines = mocker.patch("features.headlines.services.import_headlines", return_value=TEST_HEADLINES_DATA[:1])
-    mock_delete_headlines = mocker.patch("features.headlines.services.delete_headlines_for_league", return_value=True)
-    mock_add_headline = mocker.patch("features.headlines.services.add_headline", return_value=None)
+    mock_import_headlines = mocker.patch("features.headlines.services.import_headlines", return_value=feed(TEST_HEADLINES_DATA[:1]))
+    mock_sync_headlines = mocker.patch("features.headlines.services.sync_headlines_for_league", return_value=None)
     
     # Act & Assert
     with pytest.raises(HTTPException) as exc_info:
@@ -163,43 +197,43 @@ async def test_import_headlines_success(mocker):
     """Test successful import of headlines from RSS feed"""
     # Arrange
     url = "https://example.com/rss"
-    mock_fetch_external_data = mocker.patch("features.headlines.services.fetch_external_data", return_value=TEST_HEADLINES_DATA)
+    mock_fetch_feed = mocker.patch("features.headlines.services.fetch_feed", return_value=feed(TEST_HEADLINES_DATA))
     
     # Act
     result = await import_headlines(url)
     
     # Assert
-    mock_fetch_external_data.assert_called_once_with(url)
-    assert result == TEST_HEADLINES_DATA
-    assert len(result) == 2
+    mock_fetch_feed.assert_called_once_with(url, None)
+    assert result.items == TEST_HEADLINES_DATA
+    assert len(result.items) == 2
 
 @pytest.mark.asyncio
 async def test_import_headlines_empty_feed(mocker):
     """Test import headlines when RSS feed is empty"""
     # Arrange
     url = "https://example.com/empty-rss"
-    mock_fetch_external_data = mocker.patch("features.headlines.services.fetch_external_data", return_value=[])
+    mock_fetch_feed = mocker.patch("features.headlines.services.fetch_feed", return_value=feed([]))
     
     # Act
     result = await import_headlines(url)
     
     # Assert
-    mock_fetch_external_data.assert_called_once_with(url)
-    assert result == []
+    mock_fetch_feed.assert_called_once_with(url, None)
+    assert result.items == []
 
 @pytest.mark.asyncio
 async def test_import_headlines_none_result(mocker):
     """Test import headlines when fetch returns None"""
     # Arrange
     url = "https://example.com/invalid-rss"
-    mock_fetch_external_data = mocker.patch("features.headlines.services.fetch_external_data", return_value=None)
+    mock_fetch_feed = mocker.patch("features.headlines.services.fetch_feed", return_value=feed(None))
     
     # Act
     result = await import_headlines(url)
     
     # Assert
-    mock_fetch_external_data.assert_called_once_with(url)
-    assert result is None
+    mock_fetch_feed.assert_called_once_with(url, None)
+    assert result.items is None
 
 @pytest.mark.asyncio
 async def test_create_headlines_for_sport_integration_flow(mocker):
@@ -207,9 +241,8 @@ async def test_create_headlines_for_sport_integration_flow(mocker):
     # Arrange
     sport_id = 1
     mock_get_leagues = mocker.patch("features.headlines.services.get_leagues", return_value=TEST_LEAGUE_DATA)
-    mock_import_headlines = mocker.patch("features.headlines.services.import_headlines", return_value=TEST_HEADLINES_DATA)
-    mock_delete_headlines = mocker.patch("features.headlines.services.delete_headlines_for_league", return_value=True)
-    mock_add_headline = mocker.patch("features.headlines.services.add_headline", return_value=1)
+    mock_import_headlines = mocker.patch("features.headlines.services.import_headlines", return_value=feed(TEST_HEADLINES_DATA))
+    mock_sync_headlines = mocker.patch("features.headlines.services.sync_headlines_for_league", return_value={"inserted": 2, "updated": 0, "deleted": 0})
     
     # Act
     await create_headlines_for_sport(sport_id)
@@ -219,16 +252,328 @@ async def test_create_headlines_for_sport_integration_flow(mocker):
     mock_get_leagues.assert_called_once_with(sport_id)
     
     # 2. Import headlines for each league
-    expected_import_calls = [mocker.call(league["url"]) for league in TEST_LEAGUE_DATA]
+    expected_import_calls = [mocker.call(league["url"], None) for league in TEST_LEAGUE_DATA]
     mock_import_headlines.assert_has_calls(expected_import_calls)
     
-    # 3. Delete existing headlines for each league
-    expected_delete_calls = [mocker.call(league["league_id"]) for league in TEST_LEAGUE_DATA]
-    mock_delete_headlines.assert_has_calls(expected_delete_calls)
-    
-    # 4. Add new headlines for each league
-    expected_add_calls = []
+    # 3. Replace the headlines of each league in one call
     for league in TEST_LEAGUE_DATA:
-        for headline in TEST_HEADLINES_DATA:
-            expected_add_calls.append(mocker.call(headline, league["league_id"]))
-    mock_add_headline.assert_has_calls(expected_add_calls)
+        records = next(
+            call.args[1] for call in mock_sync_headlines.call_args_list
+            if call.args[0] == league["league_id"]
+        )
+        assert [record[0] for record in records] == [headline["title"] for headline in TEST_HEADLINES_DATA]
+        assert all(record[4] == league["league_id"] for record in records)
+
+@pytest.mark.asyncio
+async def test_create_headlines_for_sport_refreshes_other_leagues_when_one_fails(mocker):
+    """Test a failing feed does not stop the other leagues from being refreshed"""
+    # Arrange
+    sport_id = 1
+    mocker.patch("features.headlines.services.get_leagues", return_value=TEST_LEAGUE_DATA)
+    mocker.patch(
+        "features.headlines.services.import_headlines",
+        side_effect=[HTTPException(status_code=504, detail="Timed out"), feed(TEST_HEADLINES_DATA)]
+    )
+    mock_sync_headlines = mocker.patch("features.headlines.services.sync_headlines_for_league", return_value={"inserted": 2, "updated": 0, "deleted": 0})
+
+    # Act & Assert
+    with pytest.raises(HTTPException) as exc_info:
+        await create_headlines_for_sport(sport_id)
+
+    assert exc_info.value.status_code == 504
+    mock_sync_headlines.assert_called_once()
+    assert mock_sync_headlines.call_args.args[0] == TEST_LEAGUE_DATA[1]["league_id"]
+
+@pytest.mark.asyncio
+async def test_create_headlines_for_sport_bounds_concurrent_fetches(mocker):
+    """Test no more than the configured number of feeds are fetched at once"""
+    # Arrange
+    leagues = [{"league_id": league_id, "url": f"https://example.com/rss{league_id}"} for league_id in range(6)]
+    in_flight = 0
+    peak = 0
+
+    async def slow_import(url, cached):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return feed(TEST_HEADLINES_DATA[:1])
+
+    mocker.patch("features.headlines.services.HEADLINES_FETCH_CONCURRENCY", 2)
+    mocker.patch("features.headlines.services.get_leagues", return_value=leagues)
+    mocker.patch("features.headlines.services.import_headlines", side_effect=slow_import)
+    mocker.patch("features.headlines.services.sync_headlines_for_league", return_value={"inserted": 1, "updated": 0, "deleted": 0})
+
+    # Act
+    await create_headlines_for_sport(1)
+
+    # Assert
+    assert peak == 2
+
+@pytest.mark.asyncio
+async def test_create_headlines_for_sport_skips_unchanged_feeds(mocker, feed_cache):
+    """Test an unchanged feed leaves the stored headlines untouched"""
+    # Arrange
+    mock_get_feed_cache, mock_save_feed_cache = feed_cache
+    cached = {"etag": '"v1"', "last_modified": None, "body_hash": "hash"}
+    mock_get_feed_cache.return_value = cached
+    mocker.patch("features.headlines.services.get_leagues", return_value=TEST_LEAGUE_DATA[:1])
+    mock_import_headlines = mocker.patch("features.headlines.services.import_headlines", return_value=feed(None, not_modified=True))
+    mock_sync_headlines = mocker.patch("features.headlines.services.sync_headlines_for_league")
+
+    # Act
+    await create_headlines_for_sport(1)
+
+    # Assert
+    mock_import_headlines.assert_called_once_with(TEST_LEAGUE_DATA[0]["url"], cached)
+    mock_sync_headlines.assert_not_called()
+    mock_save_feed_cache.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_unchanged_feed_saves_rotated_validators(mocker, feed_cache):
+    """Test an unchanged feed served with new validators stores them for the next refresh"""
+    # Arrange
+    mock_get_feed_cache, mock_save_feed_cache = feed_cache
+    mock_get_feed_cache.return_value = {"etag": '"v0"', "last_modified": None, "body_hash": "hash", "link_hashes": ["a" * 64]}
+    mocker.patch("features.headlines.services.get_leagues", return_value=TEST_LEAGUE_DATA[:1])
+    mocker.patch("features.headlines.services.import_headlines", return_value=feed(None, not_modified=True))
+
+    # Act
+    await create_headlines_for_sport(1)
+
+    # Assert
+    mock_save_feed_cache.assert_called_once_with(TEST_LEAGUE_DATA[0]["url"], '"v1"', None, "hash", ["a" * 64])
+
+@pytest.mark.asyncio
+async def test_unchanged_feed_still_expires_old_headlines(mocker, feed_cache, retention):
+    """Test an unchanged feed applies the retention without its own headlines"""
+    # Arrange
+    mock_get_feed_cache, _ = feed_cache
+    mock_get_feed_cache.return_value = {"etag": '"v1"', "last_modified": None, "body_hash": "hash", "link_hashes": ["a" * 64]}
+    retention.return_value = 2
+    mocker.patch("features.headlines.services.get_leagues", return_value=TEST_LEAGUE_DATA[:1])
+    mocker.patch("features.headlines.services.import_headlines", return_value=feed(None, not_modified=True))
+    mock_get_all_headlines = mocker.patch("features.headlines.services.get_all_headlines", return_value=TEST_HEADLINE_DTOS)
+    await get_headlines_by_league(1, 10)
+
+    # Act
+    await create_headlines_for_sport(1)
+    await get_headlines_by_league(1, 10)
+
+    # Assert
+    assert retention.call_args.args[0] == 1
+    assert retention.call_args.args[4] == ["a" * 64]
+    assert mock_get_all_headlines.call_count == 3  # Initial read, page warm up and the reload
+
+@pytest.mark.asyncio
+async def test_create_headlines_for_sport_saves_feed_validators(mocker, feed_cache):
+    """Test the validators of a stored feed are remembered for the next refresh"""
+    # Arrange
+    _, mock_save_feed_cache = feed_cache
+    mocker.patch("features.headlines.services.get_leagues", return_value=TEST_LEAGUE_DATA[:1])
+    mocker.patch("features.headlines.services.import_headlines", return_value=feed(TEST_HEADLINES_DATA))
+    mocker.patch("features.headlines.services.sync_headlines_for_league", return_value={"inserted": 1, "updated": 0, "deleted": 0})
+
+    # Act
+    await create_headlines_for_sport(1)
+
+    # Assert
+    link_hashes = [record[-1] for record in map_items_to_headline_records(TEST_HEADLINES_DATA, TEST_LEAGUE_DATA[0]["league_id"])]
+    mock_save_feed_cache.assert_called_once_with(TEST_LEAGUE_DATA[0]["url"], '"v1"', None, "hash", link_hashes)
+
+@pytest.mark.asyncio
+async def test_get_headlines_by_league_served_from_cache(mocker):
+    """Test repeated reads of a league only query the database once"""
+    # Arrange
+    mock_get_all_headlines = mocker.patch("features.headlines.services.get_all_headlines", return_value=TEST_HEADLINE_DTOS)
+
+    # Act
+    first = await get_headlines_by_league(1, 10)
+    second = await get_headlines_by_league(1, 10)
+
+    # Assert
+    assert first == second == TEST_HEADLINE_DTOS
+    mock_get_all_headlines.assert_called_once_with(1, 10)
+
+@pytest.mark.asyncio
+async def test_refresh_invalidates_cached_headlines_of_the_league(mocker):
+    """Test a league refresh that changed headlines drops its cached reads"""
+    # Arrange
+    mock_get_all_headlines = mocker.patch("features.headlines.services.get_all_headlines", return_value=TEST_HEADLINE_DTOS)
+    await get_headlines_by_league(TEST_LEAGUE_DATA[0]["league_id"], 10)
+    await get_headlines_by_league(TEST_LEAGUE_DATA[1]["league_id"], 10)
+    mocker.patch("features.headlines.services.get_leagues", return_value=TEST_LEAGUE_DATA[:1])
+    mocker.patch("features.headlines.services.import_headlines", return_value=feed(TEST_HEADLINES_DATA))
+    mocker.patch("features.headlines.services.sync_headlines_for_league", return_value={"inserted": 1, "updated": 0, "deleted": 0})
+
+    # Act
+    await create_headlines_for_sport(1)
+    await get_headlines_by_league(TEST_LEAGUE_DATA[0]["league_id"], 10)
+    await get_headlines_by_league(TEST_LEAGUE_DATA[1]["league_id"], 10)
+
+    # Assert
+    # The refreshed league is rendered once and read again, the other one is still cached
+    assert mock_get_all_headlines.call_count == 4
+
+@pytest.mark.asyncio
+async def test_get_headlines_page_renders_once(mocker):
+    """Test the response body is rendered on the first read and then reused"""
+    # Arrange
+    mock_get_all_headlines = mocker.patch("features.headlines.services.get_all_headlines", return_value=TEST_HEADLINE_DTOS)
+
+    # Act
+    first = await get_headlines_page(1, 10)
+    second = await get_headlines_page(1, 10)
+
+    # Assert
+    assert first is second
+    assert json.loads(first)["headlines"][0]["heading"] == "Test Headline 1"
+    mock_get_all_headlines.assert_called_once_with(1, 10)
+
+@pytest.mark.asyncio
+async def test_get_headlines_page_without_headlines(mocker):
+    """Test a league without headlines has no page"""
+    # Arrange
+    mocker.patch("features.headlines.services.get_all_headlines", return_value=[])
+
+    # Act & Assert
+    assert await get_headlines_page(1, 10) is None
+
+
+def search_row(headline_id, rank):
+    """Build a row returned by search_headlines"""
+    return {
+        "headline_id": headline_id, "heading": f"Heading {headline_id}", "story": "Story",
+        "link": f"https://example.com/{headline_id}", "pub_date": datetime(2024, 1, 1),
+        "league_id": 1, "rank": rank
+    }
+
+@pytest.mark.asyncio
+async def test_search_headlines_page_returns_next_cursor(mocker):
+    """Test a full page carries a cursor that resumes after its last row"""
+    # Arrange
+    rows = [search_row(3, 0.9), search_row(2, 0.5), search_row(1, 0.1)]
+    mock_search = mocker.patch(
+        "features.headlines.services.search_headlines", AsyncMock(side_effect=[rows, rows[2:]])
+    )
+
+    # Act
+    first = await search_headlines_page("trade", None, 2)
+    second = await search_headlines_page("trade", None, 2, first["next_cursor"])
+
+    # Assert
+    assert [h.link for h in first["headlines"]] == ["https://example.com/3", "https://example.com/2"]
+    assert mock_search.call_args_list[0][0] == ("trade", None, 3, None)
+    assert mock_search.call_args_list[1][0] == ("trade", None, 3, (0.5, 2))
+    assert len(second["headlines"]) == 1
+    assert second["next_cursor"] is None
+
+@pytest.mark.asyncio
+async def test_search_headlines_page_invalid_cursor(mocker):
+    """Test a malformed cursor is rejected before the database is queried"""
+    # Arrange
+    mock_search = mocker.patch("features.headlines.services.search_headlines", AsyncMock())
+
+    # Act & Assert
+    with pytest.raises(HTTPException) as exc_info:
+        await search_headlines_page("trade", None, 10, "garbage")
+
+    assert exc_info.value.status_code == 400
+    mock_search.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_headlines_by_leagues_shares_league_cache(mocker):
+    """Test leagues cached by the single league read are not queried again"""
+    # Arrange
+    mocker.patch("features.headlines.services.get_all_headlines", return_value=TEST_HEADLINE_DTOS)
+    mock_batch = mocker.patch(
+        "features.headlines.services.get_headlines_for_leagues", return_value={2: []}
+    )
+    await get_headlines_by_league(1, 10)
+
+    # Act
+    result = await get_headlines_by_leagues([1, 2], 10)
+
+    # Assert
+    assert result == {1: TEST_HEADLINE_DTOS, 2: []}
+    mock_batch.assert_called_once_with([2], 10)
+
+@pytest.mark.asyncio
+async def test_get_headlines_pages_renders_each_league(mocker):
+    """Test the combined body embeds each league's page"""
+    # Arrange
+    mock_batch = mocker.patch(
+        "features.headlines.services.get_headlines_for_leagues",
+        return_value={1: TEST_HEADLINE_DTOS, 2: []}
+    )
+
+    # Act
+    body = await get_headlines_pages([1, 2], 10)
+    page = await get_headlines_page(1, 10)
+
+    # Assert
+    data = json.loads(body)
+    assert len(data["leagues"]["1"]["headlines"]) == 2
+    assert data["leagues"]["2"] == {"headlines": [], "next_cursor": None}
+    assert json.loads(page) == data["leagues"]["1"]
+    mock_batch.assert_called_once_with([1, 2], 10)
+
+
+@pytest.mark.asyncio
+async def test_get_headlines_by_league_with_cursor_reads_after_position(mocker):
+    """Test later pages start after the position in the cursor and skip the cache"""
+    # Arrange
+    cursor = map_headlines_to_next_cursor(TEST_HEADLINE_DTOS, 2)
+    mock_get_all_headlines = mocker.patch("features.headlines.services.get_all_headlines", return_value=[])
+
+    # Act
+    result = await get_headlines_by_league(1, 2, cursor)
+
+    # Assert
+    assert result == []
+    mock_get_all_headlines.assert_called_once_with(
+        1, 2, (TEST_HEADLINE_DTOS[1].pub_date, hash_link(TEST_HEADLINE_DTOS[1].link))
+    )
+    assert len(headline_cache) == 0
+
+@pytest.mark.asyncio
+async def test_get_headlines_by_league_invalid_cursor(mocker):
+    """Test a malformed cursor is rejected with 400"""
+    # Arrange
+    mock_get_all_headlines = mocker.patch("features.headlines.services.get_all_headlines")
+
+    # Act & Assert
+    with pytest.raises(HTTPException) as exc_info:
+        await get_headlines_by_league(1, 10, "garbage")
+
+    assert exc_info.value.status_code == 400
+    mock_get_all_headlines.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_refresh_applies_retention_and_invalidates_expired_league(mocker, retention):
+    """Test retention runs after the sync and expired headlines drop the cached pages"""
+    # Arrange
+    mocker.patch("features.headlines.services.get_leagues", return_value=TEST_LEAGUE_DATA[:1])
+    mocker.patch("features.headlines.services.import_headlines", return_value=feed(TEST_HEADLINES_DATA))
+    mock_sync = mocker.patch(
+        "features.headlines.services.sync_headlines_for_league",
+        return_value={"inserted": 0, "updated": 0, "deleted": 0}
+    )
+    retention.return_value = 3
+    mock_get_all_headlines = mocker.patch("features.headlines.services.get_all_headlines", return_value=TEST_HEADLINE_DTOS)
+    await get_headlines_by_league(1, 10)
+
+    # Act
+    await create_headlines_for_sport(1)
+    await get_headlines_by_league(1, 10)
+
+    # Assert
+    assert mock_sync.call_args.args[2] is True  # Dropped items are deleted unless history is kept
+    league_id, max_items, max_age, batch_size, link_hashes = retention.call_args.args
+    assert league_id == 1
+    assert max_items > 0 and batch_size > 0
+    assert len(link_hashes) == len(TEST_HEADLINES_DATA)  # Headlines still in the feed never expire
+    assert mock_get_all_headlines.call_count == 3  # Initial read, page warm up and the reload
@@ -1,4 +1,5 @@
 import pytest
+from core.date_helpers import format_date
 from core.enums import CreatedStatus
 from features.leagues.mappings import map_to_created_league
 from features.leagues.services import process_league_message
@@ -23,37 +24,63 @@ async def test_process_league_message_delete_status(mocker):
     result = await process_league_message(test_data)
 
     # Assert
-    mock_delete.assert_called_once_with(test_data["sport_id"], test_data["name"])
+    mock_delete.assert_called_once_with(test_data["sport_id"], test_data["name"], format_date(test_data["event_date"]))
     assert result == True
 
 @pytest.mark.asyncio
-async def test_process_league_message_failed_league_creation(mocker):
+async def test_process_league_message_ignores_stale_league(mocker):
     # Arrange
     test_data = TEST_LEAGUE_DATA.copy()
     mock_delete = mocker.patch("features.leagues.services.delete_league", return_value=True)
-    mock_add = mocker.patch("features.leagues.services.add_created_league", return_value=0)
+    mock_add = mocker.patch("features.leagues.services.upsert_created_league", return_value=0)
 
     # Act
     league = map_to_created_league(test_data)
     result = await process_league_message(test_data)
 
     # Assert
-    mock_delete.assert_called_once_with(test_data["sport_id"], test_data["name"])
+    mock_delete.assert_not_called()
     mock_add.assert_called_once_with(league)
-    assert result == False
+    assert result == True
 
 @pytest.mark.asyncio
 async def test_process_league_message_successful_creation(mocker):
     # Arrange
     test_data = TEST_LEAGUE_DATA.copy()
     mock_delete = mocker.patch("features.leagues.services.delete_league", return_value=True)
-    mock_add = mocker.patch("features.leagues.services.add_created_league", return_value=1)
+    mock_add = mocker.patch("features.leagues.services.upsert_created_league", return_value=1)
 
     # Act
     league = map_to_created_league(test_data)
     result = await process_league_message(test_data)
 
     # Assert
-    mock_delete.assert_called_once_with(test_data["sport_id"], test_data["name"])
+    mock_delete.assert_not_called()
     mock_add.assert_called_once_with(league)
     assert result == True
+
+@pytest.mark.asyncio
+async def test_process_league_message_delete_failure(mocker):
+    """Test a league message fails when the league cannot be deleted"""
+    # Arrange
+    test_data = TEST_LEAGUE_DATA.copy()
+    test_data["status"] = CreatedStatus.DELETE
+    mocker.patch("features.leagues.services.delete_league", side_effect=Exception("Database error"))
+
+    # Act
+    result = await process_league_message(test_data)
+
+    # Assert
+    assert result == False
+
+@pytest.mark.asyncio
+async def test_process_league_message_upsert_failure(mocker):
+    """Test a league message fails when the league cannot be written"""
+    # Arrange
+    mocker.patch("features.leagues.services.upsert_created_league", side_effect=Exception("Database error"))
+
+    # Act
+    result = await process_league_message(TEST_LEAGUE_DATA.copy())
+
+    # Assert
+    assert result == False
@@ -0,0 +1,129 @@
+import pytest
+from features.picks.mappings import map_to_created_pick, map_to_created_pick_details
+import datetime
+from fastapi import HTTPException
+from features.picks.repository import apply_created_pick_batch, delete_pick, get_week_picks_with_details, save_created_pick
+from tests.picks.test_pick_services import TEST_PICK_DATA
+
+REPOSITORY = "features.picks.repository"
+
+@pytest.mark.asyncio
+async def test_save_created_pick_writes_details_in_one_transaction(mock_acquire):
+    """Test a pick and all of its details share one connection and transaction"""
+    # Arrange
+    mock_acquire_connection, mock_conn = mock_acquire(REPOSITORY)
+    mock_conn.fetchrow.return_value = {"created_pick_id": 42}
+    pick = map_to_created_pick(TEST_PICK_DATA)
+    pick_details = map_to_created_pick_details(TEST_PICK_DATA["pick_details"], 0, TEST_PICK_DATA["event_date"])
+
+    # Act
+    result = await save_created_pick(pick, pick_details)
+
+    # Assert
+    assert result == 42
+    mock_acquire_connection.assert_called_once()
+    mock_conn.transaction.assert_called_once()
+    records = mock_conn.copy_records_to_table.call_args.kwargs["records"]
+    assert len(records) == 2
+    assert all(record[5] == 42 for record in records)
+
+@pytest.mark.asyncio
+async def test_save_created_pick_without_details_skips_copy(mock_acquire):
+    """Test a pick without details is written without a COPY"""
+    # Arrange
+    _, mock_conn = mock_acquire(REPOSITORY)
+    mock_conn.fetchrow.return_value = {"created_pick_id": 7}
+
+    # Act
+    result = await save_created_pick(map_to_created_pick(TEST_PICK_DATA), [])
+
+    # Assert
+    assert result == 7
+    mock_conn.copy_records_to_table.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_save_created_pick_raises_on_failure(mock_acquire):
+    """Test a failed detail write fails the whole pick"""
+    # Arrange
+    _, mock_conn = mock_acquire(REPOSITORY)
+    mock_conn.fetchrow.return_value = {"created_pick_id": 42}
+    mock_conn.copy_records_to_table.side_effect = Exception("Database error")
+    pick_details = map_to_created_pick_details(TEST_PICK_DATA["pick_details"], 0, TEST_PICK_DATA["event_date"])
+
+    # Act & Assert
+    with pytest.raises(Exception, match="Database error"):
+        await save_created_pick(map_to_created_pick(TEST_PICK_DATA), pick_details)
+
+@pytest.mark.asyncio
+async def test_delete_pick_tells_missing_pick_from_failure(mock_acquire):
+    """Test deleting nothing returns False while a database error raises"""
+    # Arrange
+    _, mock_conn = mock_acquire(REPOSITORY)
+    mock_conn.execute.return_value = "DELETE 0"
+
+    # Act
+    result = await delete_pick(1, TEST_PICK_DATA["user_team_id"], map_to_created_pick(TEST_PICK_DATA).event_date)
+    mock_conn.execute.side_effect = Exception("Database error")
+
+    # Assert
+    assert result is False
+    with pytest.raises(Exception, match="Database error"):
+        await delete_pick(1, TEST_PICK_DATA["user_team_id"], map_to_created_pick(TEST_PICK_DATA).event_date)
+
+@pytest.mark.asyncio
+async def test_apply_created_pick_batch_skips_stale_pick(mock_acquire):
+    """Test a pick older than the stored row keeps its stored details"""
+    # Arrange
+    _, mock_conn = mock_acquire(REPOSITORY)
+    pick = map_to_created_pick(TEST_PICK_DATA)
+    pick_details = map_to_created_pick_details(TEST_PICK_DATA["pick_details"], 0, TEST_PICK_DATA["event_date"])
+    mock_conn.fetch.return_value = [{
+        "created_pick_id": 42,
+        "pick_id": pick.pick_id,
+        "user_team_id": str(pick.user_team_id),
+        "event_date": pick.event_date + datetime.timedelta(hours=1)
+    }]
+
+    # Act
+    result = await apply_created_pick_batch([(pick, pick_details)], [])
+
+    # Assert
+    assert result is True
+    upsert = mock_conn.executemany.call_args.args[0]
+    assert "created_picks.event_date <= EXCLUDED.event_date" in upsert
+    assert mock_conn.execute.call_args.args[1] == []
+    mock_conn.copy_records_to_table.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_get_week_picks_with_details_tells_no_picks_from_failure(mock_acquire):
+    """Test a week without picks reads as empty while a database error is a 500"""
+    # Arrange
+    _, mock_conn = mock_acquire(REPOSITORY)
+    mock_conn.fetch.return_value = []
+
+    # Act
+    result = await get_week_picks_with_details(3)
+    mock_conn.fetch.side_effect = Exception("Database error")
+
+    # Assert
+    assert result == []
+    with pytest.raises(HTTPException) as error:
+        await get_week_picks_with_details(3)
+    assert error.value.status_code == 500
+
+@pytest.mark.asyncio
+async def test_delete_pick_keeps_pick_written_by_newer_event(mock_acquire):
+    """Test a delete only removes a pick written by an event no newer than its own"""
+    # Arrange
+    _, mock_conn = mock_acquire(REPOSITORY)
+    mock_conn.execute.return_value = "DELETE 0"
+    event_date = map_to_created_pick(TEST_PICK_DATA).event_date
+
+    # Act
+    result = await delete_pick(1, TEST_PICK_DATA["user_team_id"], event_date)
+
+    # Assert
+    assert result is False
+    query, *args = mock_conn.execute.call_args.args
+    assert "event_date <= $3" in query
+    assert args == [1, TEST_PICK_DATA["user_team_id"], event_date]
@@ -0,0 +1,64 @@
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, patch
+from features.picks.routes import router
+
+app = FastAPI()
+app.include_router(router)
+client = TestClient(app)
+
+TEST_WEEK_PICKS = [
+    {
+        "created_pick_id": 10,
+        "pick_id": 1,
+        "bet": 100,
+        "amount_won": 0,
+        "week_id": 3,
+        "user_team_id": "550e8400-e29b-41d4-a716-446655440000",
+        "parlay_size": 1,
+        "event_date": "2024-10-10T12:00:00+00:00",
+        "pick_details": [{"created_pick_detail_id": 1, "pick_detail_id": 1, "game_id": 101,
+                          "spread": -3.5, "total": 45.5, "is_correct": 0, "football_team_id": "KC"}]
+    }
+]
+
+def test_list_week_picks_success():
+    """Test the picks of a week are returned with their details"""
+    # Arrange
+    with patch("features.picks.routes.get_week_picks", new_callable=AsyncMock, return_value=TEST_WEEK_PICKS) as mock_get:
+        # Act
+        response = client.get("/picks/week/3")
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json() == {"picks": TEST_WEEK_PICKS}
+    mock_get.assert_called_once_with(3)
+
+def test_list_week_picks_not_found():
+    """Test a week without picks returns 404"""
+    # Arrange
+    with patch("features.picks.routes.get_week_picks", new_callable=AsyncMock, return_value=[]):
+        # Act
+        response = client.get("/picks/week/3")
+
+    # Assert
+    assert response.status_code == 404
+
+def test_list_week_picks_database_error():
+    """Test a failed read returns 500 instead of 404"""
+    # Arrange
+    with patch("features.picks.services.get_week_picks_with_details", new_callable=AsyncMock,
+               side_effect=HTTPException(status_code=500, detail="An error occurred while retrieving picks.")):
+        # Act
+        response = client.get("/picks/week/3")
+
+    # Assert
+    assert response.status_code == 500
+
+def test_list_week_picks_invalid_week_id():
+    """Test list week picks with invalid week ID"""
+    # Act
+    response = client.get("/picks/week/invalid")
+
+    # Assert
+    assert response.status_code == 404
@@ -1,7 +1,8 @@
 import pytest
+from core.date_helpers import format_date
 from core.enums import CreatedStatus, PickWin
 from features.picks.mappings import map_to_created_pick, map_to_created_pick_details
-from features.picks.services import process_pick_message
+from features.picks.services import get_week_picks, process_pick_message, process_pick_messages
 
 # Example test data
 TEST_PICK_DATA = {
@@ -46,7 +47,7 @@ async def test_process_pick_message_delete_status(mocker):
     result = await process_pick_message(test_data)
     
     # Assert
-    mock_delete.assert_called_once_with(test_data["pick_id"], test_data["user_team_id"])
+    mock_delete.assert_called_once_with(test_data["pick_id"], test_data["user_team_id"], format_date(test_data["event_date"]))
     assert result == True
 
 @pytest.mark.asyncio
@@ -55,33 +56,34 @@ async def test_process_pick_message_successful_creation(mocker):
     # Arrange
     test_data = TEST_PICK_DATA.copy()
     mock_delete = mocker.patch("features.picks.services.delete_pick", return_value=True)
-    mock_add_pick = mocker.patch("features.picks.services.add_created_pick", return_value=1)
-    mock_add_detail = mocker.patch("features.picks.services.add_created_pick_detail", return_value=1)
+    mock_save = mocker.patch("features.picks.services.save_created_pick", return_value=1)
     
     # Act
     result = await process_pick_message(test_data)
     
     # Assert
-    mock_delete.assert_called_once_with(test_data["pick_id"], test_data["user_team_id"])
-    mock_add_pick.assert_called_once()
-    assert mock_add_detail.call_count == 2  # Two pick details
+    mock_delete.assert_not_called()
+    mock_save.assert_called_once()
+    pick, pick_details = mock_save.call_args.args
+    assert pick.pick_id == test_data["pick_id"]
+    assert len(pick_details) == 2  # Two pick details written with the pick
     assert result == True
 
 @pytest.mark.asyncio
-async def test_process_pick_message_failed_pick_creation(mocker):
-    """Test pick message processing when pick creation fails"""
+async def test_process_pick_message_ignores_stale_pick(mocker):
+    """Test pick message processing when a newer pick is already stored"""
     # Arrange
     test_data = TEST_PICK_DATA.copy()
     mock_delete = mocker.patch("features.picks.services.delete_pick", return_value=True)
-    mock_add_pick = mocker.patch("features.picks.services.add_created_pick", return_value=0)
+    mock_add_pick = mocker.patch("features.picks.services.save_created_pick", return_value=0)
     
     # Act
     result = await process_pick_message(test_data)
     
     # Assert
-    mock_delete.assert_called_once_with(test_data["pick_id"], test_data["user_team_id"])
+    mock_delete.assert_not_called()
     mock_add_pick.assert_called_once()
-    assert result == False
+    assert result == True
 
 @pytest.mark.asyncio
 async def test_process_pick_message_no_pick_details(mocker):
@@ -90,16 +92,15 @@ async def test_process_pick_message_no_pick_details(mocker):
     test_data = TEST_PICK_DATA.copy()
     test_data["pick_details"] = []
     mock_delete = mocker.patch("features.picks.services.delete_pick", return_value=True)
-    mock_add_pick = mocker.patch("features.picks.services.add_created_pick", return_value=1)
-    mock_add_detail = mocker.patch("features.picks.services.add_created_pick_detail")
+    mock_save = mocker.patch("features.picks.services.save_created_pick", return_value=1)
     
     # Act
     result = await process_pick_message(test_data)
     
     # Assert
-    mock_delete.assert_called_once_with(test_data["pick_id"], test_data["user_team_id"])
-    mock_add_pick.assert_called_once()
-    mock_add_detail.assert_not_called()
+    mock_delete.assert_not_called()
+    mock_save.assert_called_once()
+    assert mock_save.call_args.args[1] == []
     assert result == True
 
 @pytest.mark.asyncio
@@ -107,13 +108,29 @@ async def test_process_pick_message_exception_handling(mocker):
     """Test pick message processing when an exception occurs"""
     # Arrange
     test_data = TEST_PICK_DATA.copy()
-    mock_delete = mocker.patch("features.picks.services.delete_pick", side_effect=Exception("Database error"))
+    mock_upsert = mocker.patch("features.picks.services.save_created_pick", side_effect=Exception("Database error"))
+
+    # Act
+    result = await process_pick_message(test_data)
+
+    # Assert
+    mock_upsert.assert_called_once()
+    assert result == False
+
+@pytest.mark.asyncio
+async def test_process_pick_message_delete_exception_handling(mock_acquire):
+    """Test a pick message fails when the database rejects the delete"""
+    # Arrange
+    test_data = TEST_PICK_DATA.copy()
+    test_data["status"] = CreatedStatus.DELETE
+    _, mock_conn = mock_acquire("features.picks.repository")
+    mock_conn.execute.side_effect = Exception("Database error")
 
     # Act
     result = await process_pick_message(test_data)
 
     # Assert
-    mock_delete.assert_called_once_with(test_data["pick_id"], test_data["user_team_id"])
+    mock_conn.execute.assert_called_once()
     assert result == False
 
 def test_map_to_created_pick():
@@ -178,3 +195,65 @@ def test_map_to_created_pick_empty_details():
     
     # Assert
     assert created_pick.parlay_size == 0
+
+@pytest.mark.asyncio
+async def test_process_pick_messages_keeps_last_message_per_pick(mocker):
+    """Test a pick batch only applies the last message for each pick"""
+    # Arrange
+    first = TEST_PICK_DATA.copy()
+    updated = TEST_PICK_DATA.copy()
+    updated["bet"] = 250
+    deleted = TEST_PICK_DATA.copy()
+    deleted["pick_id"] = 2
+    deleted["status"] = CreatedStatus.DELETE
+    mock_apply = mocker.patch("features.picks.services.apply_created_pick_batch", return_value=True)
+
+    # Act
+    result = await process_pick_messages([first, deleted, updated])
+
+    # Assert
+    assert result == True
+    picks, deleted_keys = mock_apply.call_args[0]
+    assert len(picks) == 1
+    assert picks[0][0].bet == 250
+    assert len(picks[0][1]) == 2
+    assert deleted_keys == [(2, TEST_PICK_DATA["user_team_id"], format_date(TEST_PICK_DATA["event_date"]))]
+
+@pytest.mark.asyncio
+async def test_get_week_picks_groups_details_under_their_pick(mocker):
+    """Test joined rows are grouped into picks with nested details"""
+    # Arrange
+    pick = {
+        "pick_id": 1, "bet": 100, "amount_won": 0, "week_id": 3,
+        "user_team_id": TEST_PICK_DATA["user_team_id"], "parlay_size": 2, "event_date": "2024-10-10"
+    }
+    no_detail = {
+        "created_pick_detail_id": None, "pick_detail_id": None, "game_id": None,
+        "spread": None, "total": None, "is_correct": None, "football_team_id": None
+    }
+    rows = [
+        {**pick, "created_pick_id": 10, "created_pick_detail_id": 1, "pick_detail_id": 1, "game_id": 101,
+         "spread": -3.5, "total": 45.5, "is_correct": 0, "football_team_id": "KC"},
+        {**pick, "created_pick_id": 10, "created_pick_detail_id": 2, "pick_detail_id": 2, "game_id": 102,
+         "spread": 7.0, "total": 52.0, "is_correct": 0, "football_team_id": "BUF"},
+        {**pick, "created_pick_id": 11, "pick_id": 2, **no_detail}
+    ]
+    mock_read = mocker.patch("features.picks.services.get_week_picks_with_details", return_value=rows)
+
+    # Act
+    result = await get_week_picks(3)
+
+    # Assert
+    mock_read.assert_called_once_with(3)
+    assert [pick["created_pick_id"] for pick in result] == [10, 11]
+    assert [detail["game_id"] for detail in result[0]["pick_details"]] == [101, 102]
+    assert result[1]["pick_details"] == []
+
+@pytest.mark.asyncio
+async def test_get_week_picks_without_rows(mocker):
+    """Test a week without picks returns an empty list"""
+    # Arrange
+    mocker.patch("features.picks.services.get_week_picks_with_details", return_value=[])
+
+    # Act & Assert
+    assert await get_week_picks(3) == []